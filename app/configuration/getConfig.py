@@ -1,6 +1,10 @@
 import os
+import threading
 import warnings
-from app.configuration.configparser.wrapper import ConfigparserWrapper as ConfigParser
+from app.configuration.snapshot import ConfigSnapshot
+from app.configuration.watcher import ConfigWatcher
+from app.helper.jobs.jobs import JobEngine
+from app.helper.jobs.store import JobStore
 from app.helper.log.logger import Logger
 from app.helper.pattern.singleton import Singleton
 
@@ -8,13 +12,15 @@ from app.helper.pattern.singleton import Singleton
 class Config(metaclass=Singleton):
     """
     Get the configuration.ini and the source connection.
+
+    The values of the config.ini and the version.txt are read from an immutable ConfigSnapshot. reload() (called by
+    the ConfigWatcher if a file has changed) parses and validates the files in the background and replaces the
+    snapshot, the subscribers (e.g. the mode of the Logger, the TTLs of the JobEngine) are notified afterwards.
     """
 
     def __init__(self):
         # Parse the Config.ini
         self.config_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), "config.ini")
-        self.config = ConfigParser(self.config_path)
-        self.configparser = self.config.configparser
 
         try:
             self.is_local = True if os.environ["IS_LOCAL"].upper().strip() == "TRUE" else False
@@ -22,39 +28,158 @@ class Config(metaclass=Singleton):
         except Exception as e:
             warnings.warn(str(e))
             self.is_local = False
-        self.API_ID: int = self.configparser["API"]["ID"]
-        try:
-            api_version_file_path = "./version.txt"
-            api_version_file_path = "." + api_version_file_path if self.is_local else api_version_file_path
-            with open(api_version_file_path, "r") as file:
-                self.API_VERSION = file.read()
-        except Exception as e:
-            warnings.warn(str(e))
-            self.API_VERSION: str = "UNKNOWN"
-        self.configparser["API"]["VERSION"] = self.API_VERSION
-        self.logger = Logger(self.API_ID, Logger.SINK.STDOUT)
+        self.version_path = "../version.txt" if self.is_local else "./version.txt"
 
+        self.__subscribers = list()
+        self.__reload_lock = threading.Lock()
+        self.__snapshot, errors = ConfigSnapshot.parse(self.config_path, self.version_path, self.is_local)
+        for error in errors:
+            warnings.warn(error)
+        # can not be changed by a reload
+        self.API_ID: int = self.__snapshot.API_ID
+        self.logger = Logger(self.API_ID, Logger.SINK.STDOUT, mode=self.__snapshot.log_mode)
+        print("Debug mode : " + str(self.debug))
+
+        jobs = self.__snapshot.jobs
         try:
-            self.debug = False if self.configparser["API"]["DEBUG"].upper().strip() == "FALSE" else True
-            print("Debug mode : " + str(self.debug))
+            # the status and the results are shared with the other workers
+            store = JobStore(self.jobs_folder) if self.jobs_folder else None
+            self.job_engine = JobEngine(concurrency=jobs["CONCURRENCY"], max_queue_size=jobs["MAX_QUEUE_SIZE"],
+                                        executor=jobs["EXECUTOR"], result_ttl=jobs["RESULT_TTL"], store=store)
         except Exception as e:
             warnings.warn(str(e))
-            self.debug = True
+            self.job_engine = JobEngine()
 
-        try:
-            self.in_folder: str = "." + self.configparser["FOLDER"]["IN"] if self.is_local \
-                else self.configparser["FOLDER"]["IN"]
-            self.out_folder: str = "." + self.configparser["FOLDER"]["OUT"] if self.is_local \
-                else self.configparser["FOLDER"]["OUT"]
-            self.test_folder: str = "." + self.configparser["FOLDER"]["TEST"] if self.is_local \
-                else self.configparser["FOLDER"]["TEST"]
-            self.cache_folder: str = "." + self.configparser["FOLDER"]["CACHE"] if self.is_local \
-                else self.configparser["FOLDER"]["CACHE"]
+        self.subscribe(self.__apply)
+        # started by every worker on startup, see main.py
+        self.watcher = ConfigWatcher([self.config_path, self.version_path], self.reload,
+                                     self.__snapshot.reload_interval)
 
-        except Exception as e:
-            self.logger.log(self.logger.LEVEL.ERROR, 500, "Could not parse the config: " + str(e),
-                            "app.configuration.getConfig.Config")
-
-        self.configuration_dict = self.config.get_dict_anon(exclude=["pwd", "password", "secret", "url"])
         print("CONFIGURATION: (Some key/value pairs are anonymized or not present due to sensitive data)")
         print(self.configuration_dict)
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """
+        The current configuration, read it once if several values have to fit together
+        """
+        return self.__snapshot
+
+    @property
+    def revision(self) -> int:
+        """
+        Changes whenever the configuration changes, e.g. to invalidate caches
+        """
+        return self.__snapshot.revision
+
+    @property
+    def config(self):
+        return self.__snapshot.config
+
+    @property
+    def configparser(self):
+        return self.__snapshot.config.configparser
+
+    @property
+    def API_VERSION(self) -> str:
+        return self.__snapshot.API_VERSION
+
+    @property
+    def debug(self) -> bool:
+        return self.__snapshot.debug
+
+    @property
+    def in_folder(self) -> str:
+        return self.__snapshot.in_folder
+
+    @property
+    def out_folder(self) -> str:
+        return self.__snapshot.out_folder
+
+    @property
+    def test_folder(self) -> str:
+        return self.__snapshot.test_folder
+
+    @property
+    def cache_folder(self) -> str:
+        return self.__snapshot.cache_folder
+
+    @property
+    def jobs_folder(self) -> str:
+        return self.__snapshot.jobs_folder
+
+    @property
+    def response_cache_ttl(self) -> float:
+        return self.__snapshot.response_cache_ttl
+
+    @property
+    def configuration_dict(self) -> dict:
+        return self.__snapshot.configuration_dict
+
+    def subscribe(self, callback):
+        """
+        Registers a callback which is called with the new ConfigSnapshot after every reload
+        :param callback: (callable) callback(snapshot), called in the thread of the reload
+        """
+        with self.__reload_lock:
+            self.__subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """
+        Removes a callback of subscribe, e.g. of an object which is not used anymore
+        :param callback: (callable) the registered callback
+        :raises ValueError: if the callback is not registered
+        """
+        with self.__reload_lock:
+            self.__subscribers.remove(callback)
+
+    def reload(self) -> bool:
+        """
+        Parses and validates the config.ini and the version.txt and replaces the snapshot. An invalid configuration
+        is logged and the current snapshot is kept.
+        :return: (bool) True if the configuration was replaced
+        """
+        with self.__reload_lock:
+            try:
+                snapshot, errors = ConfigSnapshot.parse(self.config_path, self.version_path, self.is_local,
+                                                        self.__snapshot.revision + 1)
+                if snapshot.API_ID != self.API_ID:
+                    errors.append("The API ID can not be changed without a restart")
+                if errors:
+                    raise ValueError("Invalid configuration: " + "; ".join(errors))
+            except Exception as e:
+                self.logger.log(self.logger.LEVEL.ERROR, 500, "Could not reload the config: " + str(e),
+                                "app.configuration.getConfig.Config.reload")
+                return False
+            # readers see either the old or the new snapshot
+            self.__snapshot = snapshot
+            subscribers = list(self.__subscribers)
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                self.logger.log(self.logger.LEVEL.ERROR, 500, "Config subscriber failed: " + str(e),
+                                "app.configuration.getConfig.Config.reload")
+        self.logger.log(self.logger.LEVEL.INFO, 200, "Config reloaded, revision " + str(snapshot.revision),
+                        "app.configuration.getConfig.Config.reload")
+        return True
+
+    def bump_revision(self) -> int:
+        """
+        Marks the configuration as changed, caches which depend on it (e.g. cached_response) are invalidated
+        :return: (int) the new revision
+        """
+        with self.__reload_lock:
+            self.__snapshot = self.__snapshot.replace(revision=self.__snapshot.revision + 1)
+            return self.__snapshot.revision
+
+    def __apply(self, snapshot: ConfigSnapshot):
+        """
+        Applies the settings which can change at runtime, the concurrency and the executor of the JobEngine and the
+        folders of running FilePipelines need a restart. A RELOAD_INTERVAL of 0 stops the ConfigWatcher, enabling it
+        again needs a restart.
+        """
+        self.logger.mode = snapshot.log_mode
+        self.watcher.interval = snapshot.reload_interval
+        self.job_engine.max_queue_size = snapshot.jobs["MAX_QUEUE_SIZE"]
+        self.job_engine.result_ttl = snapshot.jobs["RESULT_TTL"]
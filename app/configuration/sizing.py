@@ -0,0 +1,173 @@
+import math
+import os
+
+"""
+Sizing of the gunicorn workers from the resources of the container, see gunicorn_conf.py.
+
+multiprocessing.cpu_count() returns the cores of the host, in a container the CPU quota of the cgroup (cgroup v2:
+cpu.max, v1: cpu.cfs_quota_us/cpu.cfs_period_us) and the CPU affinity limit the usable cores. The workers are derived
+from the usable cores and capped by the memory limit of the cgroup, the connections per worker from the memory which
+is left per worker. Every setting can be overwritten with its environment variable.
+"""
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+# v1 reports "no limit" as a huge number (page aligned 2^63)
+_UNLIMITED_MEMORY = 2 ** 60
+# memory which is reserved for the gunicorn master and the OS, the rest is shared by the workers
+RESERVED_MEMORY_SHARE = 0.2
+# estimated memory of an open connection incl. its request/response buffers
+CONNECTION_MEMORY = 256 * 1024
+# bounds of the derived worker connections
+MIN_WORKER_CONNECTIONS = 100
+MAX_WORKER_CONNECTIONS = 1000
+
+
+def _read(path: str) -> str:
+    """
+    Returns the stripped content of the file or None
+    """
+    try:
+        with open(path, "r") as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_quota(root: str = CGROUP_ROOT) -> tuple:
+    """
+    CPU quota of the cgroup
+    :param root: (str) mount point of the cgroup file system
+    :return: (float or None, str) number of cores (None = no quota) and the source
+    """
+    cpu_max = _read(os.path.join(root, "cpu.max"))
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(" ")
+        if quota == "max":
+            return None, "cgroup v2"
+        return int(quota) / int(period or 100000), "cgroup v2"
+    for folder in ("cpu", "cpu,cpuacct"):
+        quota = _read(os.path.join(root, folder, "cpu.cfs_quota_us"))
+        period = _read(os.path.join(root, folder, "cpu.cfs_period_us"))
+        if quota is not None and period is not None:
+            if int(quota) <= 0:
+                return None, "cgroup v1"
+            return int(quota) / int(period), "cgroup v1"
+    return None, "none"
+
+
+def memory_limit(root: str = CGROUP_ROOT) -> tuple:
+    """
+    Memory limit of the cgroup
+    :param root: (str) mount point of the cgroup file system
+    :return: (int or None, str) limit in bytes (None = no limit) and the source
+    """
+    memory_max = _read(os.path.join(root, "memory.max"))
+    if memory_max is not None:
+        return (None if memory_max == "max" else int(memory_max)), "cgroup v2"
+    limit = _read(os.path.join(root, "memory", "memory.limit_in_bytes"))
+    if limit is not None:
+        return (None if int(limit) >= _UNLIMITED_MEMORY else int(limit)), "cgroup v1"
+    return None, "none"
+
+
+def available_cpus(root: str = CGROUP_ROOT) -> tuple:
+    """
+    Usable cores: the CPU quota of the cgroup, at most the cores of the CPU affinity
+    :param root: (str) mount point of the cgroup file system
+    :return: (float, str) number of cores and the source
+    """
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    quota, source = cpu_quota(root)
+    if quota is not None and quota < cores:
+        return quota, source
+    return float(cores), "affinity"
+
+
+def worker_count(cpus: float, workers_per_core: float = 1.0, memory: int = None,
+                 memory_per_worker: int = 256 * 1024 ** 2, max_workers: int = None) -> int:
+    """
+    Workers for the usable cores, capped by the memory limit
+    :param cpus: (float) usable cores
+    :param workers_per_core: (float) workers per usable core
+    :param memory: (int) memory limit in bytes, None = no limit
+    :param memory_per_worker: (int) expected memory of a worker in bytes
+    :param max_workers: (int) upper bound, None = no bound
+    :return: (int) at least 1
+    """
+    workers = max(1, int(cpus * workers_per_core))
+    if memory is not None:
+        workers = min(workers, max(1, int(memory * (1 - RESERVED_MEMORY_SHARE) // memory_per_worker)))
+    if max_workers:
+        workers = min(workers, max_workers)
+    return workers
+
+
+def worker_connections(workers: int, memory: int = None, memory_per_worker: int = 256 * 1024 ** 2) -> int:
+    """
+    Concurrent connections per worker from the memory which is left per worker
+    :param workers: (int) number of workers
+    :param memory: (int) memory limit in bytes, None = no limit
+    :param memory_per_worker: (int) expected memory of a worker in bytes (without connections)
+    :return: (int) between MIN_WORKER_CONNECTIONS and MAX_WORKER_CONNECTIONS
+    """
+    if memory is None:
+        return MAX_WORKER_CONNECTIONS
+    left = memory * (1 - RESERVED_MEMORY_SHARE) / workers - memory_per_worker
+    return int(min(MAX_WORKER_CONNECTIONS, max(MIN_WORKER_CONNECTIONS, left // CONNECTION_MEMORY)))
+
+
+def gunicorn_settings(environ: dict = None, root: str = CGROUP_ROOT) -> dict:
+    """
+    Effective gunicorn settings from the environment variables and the cgroup limits:
+        WEB_CONCURRENCY (fixed number of workers), WORKERS_PER_CORE (1), MAX_WORKERS, MEMORY_PER_WORKER_MB (256),
+        WORKER_CONNECTIONS, TIMEOUT (30), GRACEFUL_TIMEOUT (TIMEOUT), KEEPALIVE (5), MAX_REQUESTS (1000),
+        MAX_REQUESTS_JITTER (MAX_REQUESTS / 10), WORKER_TMP_DIR (/dev/shm if available), PRELOAD_APP (false)
+    :param environ: (dict) environment variables, default: os.environ
+    :param root: (str) mount point of the cgroup file system
+    :return: (dict) gunicorn settings and the "sizing" decisions
+    """
+    environ = os.environ if environ is None else environ
+    cpus, cpu_source = available_cpus(root)
+    memory, memory_source = memory_limit(root)
+    memory_per_worker = int(float(environ.get("MEMORY_PER_WORKER_MB", 256)) * 1024 ** 2)
+
+    if environ.get("WEB_CONCURRENCY"):
+        workers = int(environ["WEB_CONCURRENCY"])
+        if workers <= 0:
+            raise ValueError("WEB_CONCURRENCY has to be > 0")
+        workers_source = "WEB_CONCURRENCY"
+    else:
+        workers = worker_count(cpus, float(environ.get("WORKERS_PER_CORE", 1)), memory, memory_per_worker,
+                               int(environ.get("MAX_WORKERS", 0)) or None)
+        workers_source = "cpu/memory"
+    connections = int(environ["WORKER_CONNECTIONS"]) if environ.get("WORKER_CONNECTIONS") \
+        else worker_connections(workers, memory, memory_per_worker)
+
+    timeout = int(environ.get("TIMEOUT", 30))
+    max_requests = int(environ.get("MAX_REQUESTS", 1000))
+    worker_tmp_dir = environ.get("WORKER_TMP_DIR") or ("/dev/shm" if os.path.isdir("/dev/shm") else None)
+    return {
+        "workers": workers,
+        "worker_connections": connections,
+        "timeout": timeout,
+        "graceful_timeout": int(environ.get("GRACEFUL_TIMEOUT", timeout)),
+        "keepalive": int(environ.get("KEEPALIVE", 5)),
+        "max_requests": max_requests,
+        # the workers are not all restarted at the same time
+        "max_requests_jitter": int(environ.get("MAX_REQUESTS_JITTER", max_requests // 10)),
+        # the heartbeat file of the workers is written to memory instead of a (possibly slow) disk
+        "worker_tmp_dir": worker_tmp_dir,
+        "preload_app": environ.get("PRELOAD_APP", "false").lower().strip() == "true",
+        "sizing": {
+            "cpus": round(cpus, 3),
+            "cpu_source": cpu_source,
+            "memory_limit": memory,
+            "memory_source": memory_source,
+            "memory_per_worker": memory_per_worker,
+            "workers_source": workers_source,
+            "host_cpu_count": os.cpu_count(),
+        },
+    }
@@ -0,0 +1,148 @@
+import warnings
+from app.configuration.configparser.wrapper import ConfigparserWrapper as ConfigParser
+from app.helper.log.logger import Logger
+
+"""
+Immutable snapshot of the parsed configuration (config.ini and version.txt).
+
+The Config reads all reloadable values from its current snapshot. A reload parses the files into a new snapshot and
+replaces the reference to it, so a request sees either the old or the new configuration but never a mix of both and
+no lock is needed to read it. The snapshot and its values must not be changed after parse().
+"""
+
+# keys of the config.ini which are hidden in "configuration_dict"
+SENSITIVE_KEYS = ["pwd", "password", "secret", "url"]
+
+
+class ConfigSnapshot:
+    """
+    Attributes:
+        revision (int): changes whenever the configuration changes, e.g. to invalidate caches
+        config (ConfigparserWrapper): the parsed config.ini
+        API_ID (str): id of the API, it can not be changed by a reload
+        API_VERSION (str): content of the version.txt
+        debug (bool): debug mode
+        in_folder, out_folder, test_folder, cache_folder, jobs_folder (str): folders of the service
+        jobs (dict): settings of the JobEngine (CONCURRENCY, MAX_QUEUE_SIZE, EXECUTOR, RESULT_TTL)
+        log_mode (Logger.MODE): mode of the Logger
+        response_cache_ttl (float): time to live of the cached responses in seconds
+        reload_interval (float): seconds between the checks of the ConfigWatcher, 0 = no reload
+        health (dict): settings of the health checks (INTERVAL, NON_CRITICAL), see app/routers/config.py
+        configuration_dict (dict): the config.ini without sensitive values, see "/config/"
+    """
+
+    __slots__ = ("revision", "config", "API_ID", "API_VERSION", "debug", "in_folder", "out_folder", "test_folder",
+                 "cache_folder", "jobs_folder", "jobs", "log_mode", "response_cache_ttl", "reload_interval", "health",
+                 "configuration_dict")
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("The ConfigSnapshot is immutable, use replace()")
+
+    def replace(self, **changes) -> "ConfigSnapshot":
+        """
+        Returns a copy of the snapshot with the given changes, e.g. snapshot.replace(revision=snapshot.revision + 1)
+        """
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return ConfigSnapshot(**values)
+
+    @staticmethod
+    def parse(config_path: str, version_path: str, is_local: bool, revision: int = 0) -> tuple:
+        """
+        Parses the config.ini and the version.txt, missing or invalid values get their defaults
+        :param config_path: (str) path of the config.ini
+        :param version_path: (str) path of the version.txt
+        :param is_local: (bool) the folders are relative to the parent folder if the service runs locally
+        :param revision: (int) revision of the new snapshot
+        :return: (ConfigSnapshot, list) the snapshot and the errors (invalid values which got their defaults)
+        :raises Exception: if the config.ini can not be parsed or has no API ID
+        """
+        errors = list()
+        config = ConfigParser(config_path)
+        configparser = config.configparser
+        api_id = configparser["API"]["ID"]
+
+        try:
+            with open(version_path, "r") as file:
+                api_version = file.read()
+        except Exception as e:
+            # not an invalid configuration, e.g. a local run from another folder
+            warnings.warn(str(e))
+            api_version = "UNKNOWN"
+        configparser["API"]["VERSION"] = api_version
+
+        try:
+            debug = configparser["API"]["DEBUG"].upper().strip() != "FALSE"
+        except Exception as e:
+            errors.append("API DEBUG: " + str(e))
+            debug = True
+
+        folders = dict()
+        for name in ("IN", "OUT", "TEST", "CACHE", "JOBS"):
+            try:
+                folders[name] = "." + configparser["FOLDER"][name] if is_local else configparser["FOLDER"][name]
+            except Exception as e:
+                errors.append("FOLDER " + name + ": " + str(e))
+                folders[name] = None
+
+        jobs = {"CONCURRENCY": 2, "MAX_QUEUE_SIZE": 100, "EXECUTOR": "thread", "RESULT_TTL": 3600.0}
+        try:
+            section = configparser["JOBS"]
+            jobs = {
+                "CONCURRENCY": int(section["CONCURRENCY"]),
+                "MAX_QUEUE_SIZE": int(section["MAX_QUEUE_SIZE"]),
+                "EXECUTOR": section["EXECUTOR"].lower().strip(),
+                "RESULT_TTL": float(section["RESULT_TTL"]),
+            }
+        except Exception as e:
+            errors.append("JOBS: " + str(e))
+
+        try:
+            log_mode = Logger.MODE[configparser.get("LOG", "MODE", fallback="INFO").upper().strip()]
+        except KeyError as e:
+            errors.append("LOG MODE: unknown mode " + str(e))
+            log_mode = Logger.MODE.INFO
+
+        try:
+            response_cache_ttl = configparser.getfloat("CACHE", "RESPONSE_TTL", fallback=300.0)
+            reload_interval = configparser.getfloat("CONFIG", "RELOAD_INTERVAL", fallback=0.0)
+            if response_cache_ttl < 0 or reload_interval < 0:
+                raise ValueError("has to be >= 0")
+        except ValueError as e:
+            errors.append("CACHE RESPONSE_TTL/CONFIG RELOAD_INTERVAL: " + str(e))
+            response_cache_ttl, reload_interval = 300.0, 0.0
+
+        health = {"INTERVAL": 10.0, "NON_CRITICAL": []}
+        try:
+            interval = configparser.getfloat("HEALTH", "INTERVAL", fallback=10.0)
+            if interval < 0:
+                raise ValueError("has to be >= 0")
+            non_critical = configparser.get("HEALTH", "NON_CRITICAL", fallback="")
+            health = {"INTERVAL": interval,
+                      "NON_CRITICAL": [name.strip() for name in non_critical.split(",") if name.strip()]}
+        except ValueError as e:
+            errors.append("HEALTH: " + str(e))
+
+        snapshot = ConfigSnapshot(
+            revision=revision,
+            config=config,
+            API_ID=api_id,
+            API_VERSION=api_version,
+            debug=debug,
+            in_folder=folders["IN"],
+            out_folder=folders["OUT"],
+            test_folder=folders["TEST"],
+            cache_folder=folders["CACHE"],
+            jobs_folder=folders["JOBS"],
+            jobs=jobs,
+            log_mode=log_mode,
+            response_cache_ttl=response_cache_ttl,
+            reload_interval=reload_interval,
+            health=health,
+            configuration_dict=config.get_dict_anon(exclude=SENSITIVE_KEYS),
+        )
+        return snapshot, errors
@@ -0,0 +1,16 @@
+from uvicorn.workers import UvicornWorker as _UvicornWorker
+
+"""
+Gunicorn worker class of the app, see gunicorn_conf.py.
+"""
+
+
+class UvicornWorker(_UvicornWorker):
+    """
+    UvicornWorker which applies the gunicorn setting "worker_connections" as concurrency limit, requests above the
+    limit are answered with 503 instead of piling up in the worker.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.limit_concurrency = self.cfg.worker_connections
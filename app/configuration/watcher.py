@@ -0,0 +1,104 @@
+import hashlib
+import os
+import threading
+
+"""
+Watches files (e.g. the config.ini and the version.txt) for changes, see Config.reload.
+
+Every "interval" seconds the files are checked with os.stat (mtime, size, inode), only if one of them differs the
+content is hashed. The callback is called if the content of a file has changed, so touching a file or a rewrite with
+the same content (e.g. a ConfigMap update of K8S which only swaps a symlink) does not reload anything.
+The background thread runs in the process which called start(), e.g. on startup of every gunicorn worker.
+"""
+
+
+class ConfigWatcher:
+    """
+    Use it like:
+        watcher = ConfigWatcher([config_path], config.reload, interval=5)
+        watcher.start()
+    """
+
+    def __init__(self, paths: list, callback, interval: float = 5.0):
+        """
+        :param paths: (list[str]) files to watch
+        :param callback: (callable) called without arguments in the background thread if a file has changed
+        :param interval: (float) seconds between the checks, 0 = start() does nothing. It can be changed while the
+            watcher runs (e.g. by a reload), the next check uses the new interval and 0 stops the checks.
+        """
+        self.paths = list(paths)
+        self.callback = callback
+        self.interval = interval
+        self.changes = 0
+        self.__signatures = {path: self.__signature(path) for path in self.paths}
+        self.__hashes = {path: self.__hash(path) for path in self.paths}
+        self.__stopped = threading.Event()
+        self.__thread = None
+        self.__pid = None
+
+    def check(self) -> bool:
+        """
+        Checks the files once and calls the callback if the content of a file has changed
+        :return: (bool) True if the callback was called
+        """
+        changed = False
+        for path in self.paths:
+            signature = self.__signature(path)
+            if signature == self.__signatures[path]:
+                continue
+            self.__signatures[path] = signature
+            content_hash = self.__hash(path)
+            if content_hash != self.__hashes[path]:
+                self.__hashes[path] = content_hash
+                changed = True
+        if changed:
+            self.changes += 1
+            self.callback()
+        return changed
+
+    def start(self):
+        """
+        Starts the background checks once per process
+        """
+        if self.interval <= 0 or self.__pid == os.getpid():
+            return
+        self.__pid = os.getpid()
+        self.__stopped.clear()
+        self.__thread = threading.Thread(target=self.__run, name="ConfigWatcher", daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Stops the background checks
+        :param timeout: (float) maximum time in seconds to wait for a running check
+        """
+        self.__stopped.set()
+        if self.__thread is not None and self.__pid == os.getpid():
+            self.__thread.join(timeout)
+        self.__thread = None
+        self.__pid = None
+
+    def __run(self):
+        # without an interval the thread only waits for stop()
+        while not self.__stopped.wait(self.interval if self.interval > 0 else None):
+            try:
+                self.check()
+            except Exception:
+                # e.g. a file which is replaced right now, the next check sees the new file
+                pass
+
+    @staticmethod
+    def __signature(path: str) -> tuple:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    @staticmethod
+    def __hash(path: str) -> bytes:
+        try:
+            with open(path, "rb") as file:
+                return hashlib.blake2b(file.read(), digest_size=16).digest()
+        except OSError:
+            return None
@@ -1,52 +1,98 @@
 import json
-import multiprocessing
 import os
+import tempfile
+from app.configuration.sizing import gunicorn_settings
 
 config_file = os.getenv("GUNICORN_CONF", "DEFAULT")
-workers_per_core_str = os.getenv("WORKERS_PER_CORE", "1")
-web_concurrency_str = os.getenv("WEB_CONCURRENCY", "1")
 host = os.getenv("HOST", "0.0.0.0")
 port = os.getenv("PORT", "8080")
 bind_env = os.getenv("BIND", None)
 use_loglevel = os.getenv("LOG_LEVEL", "info")
-timeout = os.getenv("TIMEOUT", 30)
-worker_class = os.getenv("WORKER_CLASS", "uvicorn.workers.UvicornWorker")
-keepalive = os.getenv("KEEPALIVE", 2)
-max_requests = os.getenv("MAX_REQUESTS", 1000)
+worker_class = os.getenv("WORKER_CLASS", "app.configuration.uvicorn_worker.UvicornWorker")
 
 if bind_env:
     use_bind = bind_env
 else:
     use_bind = f"{host}:{port}"
 
-cores = multiprocessing.cpu_count()
-workers_per_core = float(workers_per_core_str)
-default_web_concurrency = workers_per_core * cores
-if web_concurrency_str:
-    web_concurrency = int(web_concurrency_str)
-    assert web_concurrency > 0
-else:
-    web_concurrency = max(int(default_web_concurrency), 1)
+# workers, connections and timeouts from the cgroup limits and the environment, see app/configuration/sizing.py
+settings = gunicorn_settings()
 
 # Gunicorn config variables
 loglevel = use_loglevel
-workers = web_concurrency
+workers = settings["workers"]
+worker_connections = settings["worker_connections"]
 bind = use_bind
-keepalive = 120
+timeout = settings["timeout"]
+graceful_timeout = settings["graceful_timeout"]
+keepalive = settings["keepalive"]
+max_requests = settings["max_requests"]
+max_requests_jitter = settings["max_requests_jitter"]
+worker_tmp_dir = settings["worker_tmp_dir"]
+preload_app = settings["preload_app"]
 errorlog = "-"
 
-# For debugging and testing
+# shared directory of the metrics of all workers, see app/helper/metrics/metrics.py
+metrics_dir = os.environ.get("METRICS_DIR") or tempfile.mkdtemp(prefix="metrics-")
+os.environ["METRICS_DIR"] = metrics_dir
+
+
+def on_starting(server):
+    """
+    Removes the metrics of a previous run if METRICS_DIR is set explicitly
+    """
+    for name in os.listdir(metrics_dir):
+        if name.endswith(".db"):
+            os.remove(os.path.join(metrics_dir, name))
+
+
+def when_ready(server):
+    """
+    With PRELOAD_APP=true the master has imported the app before the workers are forked: the rule sets (incl. pandas)
+    are imported here as well and the gc is frozen, so the workers share these pages copy-on-write. Threads, sockets
+    and file buffers are created per worker, see app/helper/pattern/process_local.py
+    """
+    if preload_app:
+        from app.helper.anonymize import RuleSets  # noqa: F401
+        from app.helper.pattern.process_local import freeze
+        freeze()
+
+
+def post_fork(server, worker):
+    """
+    Measures the imports of the worker if STARTUP_PROFILE=true, see app/helper/profiling/startup.py
+    """
+    from app.helper.profiling import startup
+    startup.enable_from_env()
+
+
+def child_exit(server, worker):
+    """
+    The gauges (e.g. requests in progress) of an exited worker are removed, its counters are merged into one file
+    """
+    from app.helper.metrics.metrics import mark_process_dead
+    mark_process_dead(worker.pid, metrics_dir)
+
+
+# For debugging and testing: the effective settings as one json line at boot
 log_data = {
     "config_file": config_file,
     "loglevel": loglevel,
     "workers": workers,
+    "worker_connections": worker_connections,
     "bind": bind,
+    "timeout": timeout,
+    "graceful_timeout": graceful_timeout,
+    "keepalive": keepalive,
+    "max_requests": max_requests,
+    "max_requests_jitter": max_requests_jitter,
+    "worker_tmp_dir": worker_tmp_dir,
+    "preload_app": preload_app,
     # Additional, non-gunicorn variables
-    "workers_per_core": workers_per_core,
     "host": host,
     "port": port,
-    "timeout": timeout,
     "worker_class": worker_class,
-    "keepalive": keepalive
+    "metrics_dir": metrics_dir,
+    "sizing": settings["sizing"],
 }
-print(json.dumps(log_data))
\ No newline at end of file
+print(json.dumps(log_data))
@@ -0,0 +1,115 @@
+from app.helper.anonymize.CallbackCache import CallbackCache
+from app.helper.anonymize.DataFrameChange import DataFrameChange
+
+
+class AnonymizationPlan:
+    """
+    Compiled form of the strip/change/wild rules of the Anon-Class for dicts and lists of dicts.
+
+    Instead of walking the document once per strip- and change-element (nested_delete, nested_update, nested_alter),
+    the plan visits every node of a document exactly once and looks up what to do with a key in a memo of decisions.
+    The decision for a key name is computed only the first time the key is seen, so the cost per node does not grow
+    with the number of rules.
+
+    The result is the same as the one of the nested_lookup-based implementation:
+        - change is applied before strip, a stripped key is never changed
+        - strip matches the keys exactly, change matches them case insensitive as substring if wild_change is True
+        - nested matches inside a changed value are changed first, then the value itself
+
+    Attributes:
+        strip (frozenset): elements to strip from data
+        hard_delete(bool): If true, deletes the element/node, otherwise overwrites the value with "overwrite_value"
+        overwrite_value (str): Value to overwrite elements/nodes if "hard_delete" is False.
+        rules (list): flattened change configuration: (element, callback, parameters, conversion function)
+        wild_change (bool): if wild is True, treat the given key as a case insensitive substring when performing lookups.
+    """
+
+    # Upper bound of memoized key decisions, protects against documents with generated keys (ids as keys etc.)
+    MAX_DECISIONS = 100000
+
+    def __init__(self, strip: list = None, hard_delete: bool = True, overwrite_value: str = None,
+                 change: list = None, wild_change: bool = False, callback_cache: CallbackCache = None):
+        """
+        Args:
+            strip (list): elements/columns to strip from data
+                Defaults to None.
+            hard_delete(bool): If true, deletes the element/node, otherwise overwrites the value with "overwrite_value"
+                Defaults to True.
+            overwrite_value (str): Value to overwrite elements/nodes if "hard_delete" is False.
+                Defaults to None.
+            change (list): elements/columns an the corresponding change action, see Anonymize.change
+                Defaults to None.
+            wild_change (bool): if wild is True, treat the given key as a case insensitive substring when performing
+                lookups.
+                Defaults to False
+            callback_cache (CallbackCache, optional): memoization of the callbacks.
+                Defaults to None (no memoization)
+        """
+        self.strip = frozenset(strip) if strip else frozenset()
+        self.hard_delete = hard_delete
+        self.overwrite_value = overwrite_value
+        self.wild_change = wild_change
+        self.rules = list()
+        for conf in change or []:
+            element, func, func_params, conv_func = DataFrameChange.unpack_conf(conf)
+            if callback_cache is not None:
+                func = callback_cache.wrap(func, func_params)
+            for ele in element:
+                match = str(ele).lower() if wild_change else ele
+                self.rules.append((match, func, func_params if func_params else [], conv_func))
+        self._decisions = dict()
+
+    def decide(self, key) -> tuple:
+        """
+        Returns the decision for a key name: is it stripped and which callbacks have to be applied (in order).
+
+        Args:
+            key: name of the element
+
+        Returns:
+            (bool, tuple)
+        """
+        try:
+            return self._decisions[key]
+        except KeyError:
+            pass
+
+        strip = key in self.strip
+        callbacks = tuple() if strip else tuple(
+            (func, func_params, conv_func) for match, func, func_params, conv_func in self.rules
+            if (match in str(key).lower() if self.wild_change else match == key)
+        )
+        decision = (strip, callbacks)
+        if len(self._decisions) < self.MAX_DECISIONS:
+            self._decisions[key] = decision
+        return decision
+
+    def apply(self, document: object) -> object:
+        """
+        Anonymizes a single document (dict, list or scalar). The given document is not modified.
+
+        Args:
+            document (object): dict or list to process
+
+        Returns:
+            object
+        """
+        if isinstance(document, dict):
+            ret = dict()
+            for key, value in document.items():
+                strip, callbacks = self.decide(key)
+                if strip:
+                    # if hard_delete is True, delete the node/element, else overwrite it.
+                    if not self.hard_delete:
+                        ret[key] = self.overwrite_value
+                    continue
+                value = self.apply(value)
+                for func, func_params, conv_func in callbacks:
+                    if conv_func is not None:
+                        value = conv_func(value)
+                    value = func(value, *func_params)
+                ret[key] = value
+            return ret
+        if isinstance(document, list):
+            return [self.apply(elem) for elem in document]
+        return document
@@ -1,6 +1,32 @@
+from __future__ import annotations
+import copy
+import functools
+import hashlib
+import inspect
+import multiprocessing
+import os
+import pickle
+import sys
+import threading
+import types
 import warnings
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from importlib import metadata
+from typing import TYPE_CHECKING
 from nested_lookup import nested_alter, nested_delete, nested_update
+from app.helper.anonymize.DataFrameChange import DataFrameChange
+from app.helper.anonymize.AnonymizationPlan import AnonymizationPlan
+from app.helper.anonymize.CallbackCache import CallbackCache
+from app.helper.cache.disk_cache import DiskCache
+from app.helper.jobs.jobs import MP_START_METHOD
+from app.helper.pattern.process_local import ProcessLocal
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# libraries which change the results of the callbacks, their versions are part of the keys of the disk cache
+RESULT_LIBRARIES = ["pandas", "nested_lookup", "dateparser", "schwifty", "email-validator"]
 
 
 class Anonymize:
@@ -23,12 +49,26 @@ class Anonymize:
                 ],
                 [...] # another configuration.
             ]
+            For DataFrames the change is applied column-wise, see DataFrameChange. Callbacks which provide a
+            vectorized variant via the attribute "batch" are applied to the whole column at once.
         wild_change (bool): if wild is True, treat the given key as a case insensitive substring when performing lookups.
-        allowed_classes (list): defines which classes are allow in the anon.-process. 
+        allowed_classes (list): defines which classes are allow in the anon.-process. pandas is not imported by this
+            class, DataFrames are allowed as soon as pandas is loaded.
+        compiled (bool): if True, dicts and lists of dicts are processed with a compiled AnonymizationPlan, which
+            visits every document only once instead of once per strip- and change-element.
+        workers (int): number of worker processes for the parallel mode. The parallel mode is only used if workers > 1.
+            The process pool is created on first use and kept until close() is called.
+        chunk_size (int): number of list elements/DataFrame rows per chunk in the parallel mode.
+        callback_cache (CallbackCache): memoization of the change callbacks, None if "memoize" is False.
+            The counters can be read via callback_cache.stats(). In the parallel mode every worker has its own cache.
+        disk_cache (DiskCache): results of whole inputs on disk, keyed by the input, the rules and the library
+            versions (see fingerprint), None if disabled. The counters can be read via disk_cache.stats().
     """
 
     def __init__(self, strip: list = None, hard_delete: bool = True, overwrite_value: str = None,
-                 change: list = None, wild_change: bool = False):
+                 change: list = None, wild_change: bool = False, compiled: bool = False, workers: int = None,
+                 chunk_size: int = 10000, memoize: bool = False, memoize_max_entries: int = 100000,
+                 stable_pseudonyms: bool = False, disk_cache: DiskCache = None):
         """   
         Args:
             strip (list): elements/columns to strip from data
@@ -41,6 +81,27 @@ class Anonymize:
                 Defaults to None.
             wild_change (bool): if wild is True, treat the given key as a case insensitive substring when performing lookups.
                 Defaults to False
+            compiled (bool): if True, compiles the rules once into an AnonymizationPlan and processes dicts and lists
+                of dicts in a single pass per document.
+                Defaults to False
+            workers (int): if > 1, lists of dicts and DataFrames with more than "chunk_size" elements/rows are split
+                into chunks which are anonymized in a process pool with this number of worker processes.
+                All callbacks and conversion functions have to be picklable (module level functions, no lambdas).
+                Defaults to None (no parallel processing).
+            chunk_size (int): number of list elements/DataFrame rows per chunk in the parallel mode.
+                Defaults to 10000
+            memoize (bool): if True, the results of deterministic change callbacks are memoized per value in a
+                bounded LRU cache, see CallbackCache.
+                Defaults to False
+            memoize_max_entries (int): maximum number of memoized results.
+                Defaults to 100000
+            stable_pseudonyms (bool): if True, not deterministic callbacks (e.g. ch_ipv4 with random numbers) are
+                memoized too, so the same value always gets the same pseudonym within this Anonymize-instance.
+                Defaults to False
+            disk_cache (DiskCache): if given, the result of every input is stored on disk and the same input is not
+                anonymized again, also after a restart or in other workers which share the cache folder.
+                Randomized callbacks (e.g. ch_ipv4 with random numbers) return the cached pseudonyms then.
+                Defaults to None
     
         """
         self.strip = strip
@@ -48,7 +109,63 @@ class Anonymize:
         self.overwrite_value = overwrite_value
         self.change = change
         self.wild_change = wild_change
-        self.allowed_classes = [dict, pd.core.frame.DataFrame, list]
+        self.compiled = compiled
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.callback_cache = CallbackCache(memoize_max_entries, stable_pseudonyms) if memoize else None
+        self.disk_cache = disk_cache
+        self.__plan = None
+        self.__init_pool()
+
+    def __init_pool(self):
+        # process pool of the parallel mode and the configuration its workers got, see __anon_parallel
+        self.__pool = ProcessLocal(self.__create_pool, close=lambda pool: pool.shutdown())
+        self.__pool_config = None
+        self.__pool_lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        """
+        The process pool is not sent to other processes (e.g. the workers of the parallel mode)
+        """
+        state = self.__dict__.copy()
+        for name in ("_Anonymize__pool", "_Anonymize__pool_config", "_Anonymize__pool_lock"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.__init_pool()
+
+    def close(self):
+        """
+        Shuts down the process pool of the parallel mode, the next parallel call starts a new one
+        """
+        with self.__pool_lock:
+            self.__pool.close()
+
+    @property
+    def allowed_classes(self) -> list:
+        """
+        dict, list and pd.core.frame.DataFrame if pandas is loaded (there can't be a DataFrame otherwise)
+
+        Returns:
+            list
+        """
+        pandas = sys.modules.get("pandas")
+        return [dict, list] if pandas is None else [dict, pandas.DataFrame, list]
+
+    @property
+    def plan(self) -> AnonymizationPlan:
+        """
+        The compiled strip/change/wild rules, created on first use.
+
+        Returns:
+            AnonymizationPlan
+        """
+        if self.__plan is None:
+            self.__plan = AnonymizationPlan(self.strip, self.hard_delete, self.overwrite_value, self.change,
+                                            self.wild_change, self.callback_cache)
+        return self.__plan
 
     def perform_anonymization(self, data: object):
         """
@@ -65,19 +182,132 @@ class Anonymize:
         possible = True if object_type in self.allowed_classes else False
         anon_data = None
 
-        if possible:
-            if object_type in [dict, list]:
-                anon_data = self.__anon_dict(data)
-            elif object_type == pd.core.frame.DataFrame:
-                anon_data = self.__anon_dataframe(data)
-            else:
-                warnings.warn("Data of type/class " + object_type + " is currently not supported."
-                              "This Statement should not be reachable, please contact a developer")
+        if possible and self.disk_cache is not None:
+            anon_data = self.__anon_disk_cached(data)
+        elif possible:
+            anon_data = self.__anon(data)
         else:
             warnings.warn("Data of type/class " + object_type + " is currently not supported")
 
         return anon_data
 
+    def fingerprint(self) -> str:
+        """
+        Description of the rules and of the versions of the libraries which the results depend on, e.g. for the keys of
+        the disk cache. Callbacks are described by their module, name, byte code, defaults and closure, see _describe.
+
+        Returns:
+            str
+        """
+        rules = [self.strip, self.hard_delete, self.overwrite_value, self.change, self.wild_change]
+        return repr((_describe(rules), _library_versions()))
+
+    def __anon_disk_cached(self, data: object) -> object:
+        """
+        Returns the result of the disk cache or anonymizes the data and stores the result
+
+        Returns:
+            [dict, pd.core.frame.DataFrame, list]
+        """
+        try:
+            data_bytes = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            warnings.warn("The data can't be serialized for the disk cache and is not cached. Error: " + str(e))
+            return self.__anon(data)
+        key = DiskCache.key(data_bytes, self.fingerprint())
+        cached = self.disk_cache.get(key)
+        if cached is not None:
+            return pickle.loads(cached)
+        anon_data = self.__anon(data)
+        if anon_data is not None:
+            self.disk_cache.put(key, pickle.dumps(anon_data, protocol=pickle.HIGHEST_PROTOCOL))
+        return anon_data
+
+    def __anon(self, data: object) -> object:
+        """
+        Anonymizes the data with the mode which fits its type
+
+        Returns:
+            [dict, pd.core.frame.DataFrame, list]
+        """
+        object_type = type(data)
+        anon_data = None
+        if self.__use_parallel(data):
+            anon_data = self.__anon_parallel(data)
+        elif object_type in [dict, list]:
+            anon_data = self.__anon_dict(data)
+        elif _is_dataframe(data):
+            anon_data = self.__anon_dataframe(data)
+        else:
+            warnings.warn("Data of type/class " + object_type + " is currently not supported."
+                          "This Statement should not be reachable, please contact a developer")
+        return anon_data
+
+    def __use_parallel(self, data: object) -> bool:
+        """
+        Checks if the parallel mode is enabled and worth it for the given data.
+        Falls back to the sequential mode with a warning if the change configuration can't be sent to other processes.
+
+        Returns:
+            bool
+        """
+        if self.workers is None or self.workers <= 1 or type(data) == dict or len(data) <= self.chunk_size:
+            return False
+        try:
+            pickle.dumps(self.change)
+        except Exception as e:
+            warnings.warn("The change configuration can't be sent to the worker processes, the data will be processed "
+                          "sequentially. Please only use module level functions as callbacks. Error: " + str(e))
+            return False
+        return True
+
+    def __anon_parallel(self, data: object) -> object:
+        """
+        Splits a list of dicts or a DataFrame into chunks of "chunk_size", anonymizes them in a process pool with
+        "workers" processes and reassembles the results in the original order.
+
+        Returns:
+            [list[dict], pd.core.frame.DataFrame]
+        """
+        # the workers get a sequential copy of this configuration
+        sequential = copy.copy(self)
+        sequential.workers = None
+        sequential.__plan = None
+        # the whole input is cached, not the chunks
+        sequential.disk_cache = None
+
+        if _is_dataframe(data):
+            chunks = [data.iloc[i:i + self.chunk_size] for i in range(0, len(data), self.chunk_size)]
+        else:
+            chunks = [data[i:i + self.chunk_size] for i in range(0, len(data), self.chunk_size)]
+
+        config = pickle.dumps(sequential)
+        with self.__pool_lock:
+            if config != self.__pool_config and self.__pool.created:
+                # the rules or the number of workers have changed, the workers got the old configuration
+                self.__pool.close()
+            self.__pool_config = config
+            executor = self.__pool.get()
+        # map returns the results in the order of the chunks
+        results = list(executor.map(_anon_chunk, chunks))
+
+        if any(result is None for result in results):
+            return None
+        if _is_dataframe(data):
+            import pandas as pd
+            return pd.concat(results)
+        return [elem for result in results for elem in result]
+
+    def __create_pool(self) -> ProcessPoolExecutor:
+        """
+        Process pool of the parallel mode, the workers get the configuration of the last __anon_parallel call
+        """
+        # a fork of a worker with running threads (event loop, job engine, log sinks) can deadlock, the processes
+        # are started by a fork server (spawn where it is not available) which has no threads
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(pickle.loads(self.__pool_config),),
+                                   mp_context=multiprocessing.get_context(MP_START_METHOD))
+
     def __anon_dict(self, data: object) -> [dict]:
         """
         Anonymizes (Removes, alters) given parts of a dict or a list of dicts
@@ -99,6 +329,12 @@ class Anonymize:
         else:
             is_list_of_dicts = False
 
+        # compiled mode: visit every document exactly once
+        if self.compiled:
+            if is_list_of_dicts:
+                return [self.plan.apply(elem) for elem in data]
+            return self.plan.apply(data)
+
         # local anon function for one dict
         def _anon_dict_strip_intern(data: object):
             """
@@ -139,6 +375,10 @@ class Anonymize:
                 except:
                     conv_func = None
 
+                # memoize the callback if enabled
+                if self.callback_cache is not None:
+                    func = self.callback_cache.wrap(func, func_params)
+
                 # loop over all given names which should be altered
                 for ele in element:
                     data = nested_alter(document=data, key=ele, callback_function=func,
@@ -174,12 +414,98 @@ class Anonymize:
         Returns:
             pandas.core.frame.DataFrame
         """
+        # process the change-elements column-wise, vectorized where the callback supports it
+        data = DataFrameChange(self.change, self.wild_change, self.callback_cache).apply(data)
+
         # Check if any strip values are provided
         if self.strip != None:
             # if hard_delete is True, delete the node/element, else overwrite it.
             if self.hard_delete:
-                data = pd.DataFrame(data).drop(labels=self.strip, axis=1)
+                data = data.drop(labels=self.strip, axis=1)
             else:
                 data[self.strip] = self.overwrite_value
 
         return data
+
+
+def _is_dataframe(data: object) -> bool:
+    """
+    Checks for a pd.core.frame.DataFrame without importing pandas
+    """
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and type(data) == pandas.DataFrame
+
+
+def _describe(rule: object, seen: frozenset = frozenset()) -> object:
+    """
+    Stable description of a rule, functions and classes are described by their module and name instead of their address.
+    Functions (incl. lambdas and closures) are also described by their byte code, constants, default values and the
+    contents of their closure cells, so two lambdas with different bodies or captured values get different keys.
+    """
+    if isinstance(rule, (list, tuple)):
+        return [_describe(elem, seen) for elem in rule]
+    if isinstance(rule, dict):
+        return sorted((repr(key), _describe(value, seen)) for key, value in rule.items())
+    if isinstance(rule, type):
+        return rule.__module__, rule.__qualname__
+    if id(rule) in seen:
+        # e.g. a recursive closure
+        return "<recursion>"
+    seen = seen | {id(rule)}
+    if isinstance(rule, functools.partial):
+        return "partial", _describe(rule.func, seen), _describe(rule.args, seen), _describe(rule.keywords, seen)
+    if inspect.ismethod(rule):
+        return "method", _describe(rule.__func__, seen), _describe(rule.__self__, seen)
+    if inspect.isfunction(rule):
+        closure = [cell.cell_contents for cell in rule.__closure__ or ()]
+        return (rule.__module__, rule.__qualname__, _describe_code(rule.__code__, seen),
+                _describe(rule.__defaults__, seen), _describe(rule.__kwdefaults__, seen), _describe(closure, seen))
+    if callable(rule):
+        return type(rule).__module__, type(rule).__qualname__, repr(rule)
+    return repr(rule)
+
+
+def _describe_code(code: types.CodeType, seen: frozenset) -> str:
+    """
+    Hash of the byte code, the constants (incl. nested functions) and the referenced names of a function
+    """
+    constants = [_describe_code(const, seen) if isinstance(const, types.CodeType) else repr(const)
+                 for const in code.co_consts]
+    return hashlib.blake2b(repr((code.co_code, constants, code.co_names)).encode("utf8"), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _library_versions() -> tuple:
+    """
+    Versions of this project and of the RESULT_LIBRARIES
+    """
+    try:
+        with open(os.path.join(os.path.dirname(__file__), "..", "..", "..", "version.txt"), "r") as file:
+            versions = ["app==" + file.read().strip()]
+    except OSError:
+        versions = ["app==unknown"]
+    for library in RESULT_LIBRARIES:
+        try:
+            versions.append(library + "==" + metadata.version(library))
+        except metadata.PackageNotFoundError:
+            versions.append(library + "==unknown")
+    return tuple(versions)
+
+
+# Anonymize-instance of a worker process in the parallel mode, see Anonymize.__anon_parallel
+_worker_anonymize = None
+
+
+def _init_worker(anonymize: Anonymize):
+    """
+    Initializer of the worker processes, receives the configuration only once per process.
+    """
+    global _worker_anonymize
+    _worker_anonymize = anonymize
+
+
+def _anon_chunk(chunk: object) -> object:
+    """
+    Anonymizes a single chunk inside a worker process.
+    """
+    return _worker_anonymize.perform_anonymization(chunk)
@@ -0,0 +1,158 @@
+import threading
+from collections import OrderedDict
+
+
+class CallbackCache:
+    """
+    Bounded LRU memoization of change callbacks, see Anonymize(memoize=True).
+
+    The cache is keyed by (callback, type of the value, value, parameters), so repeating values like IBANs, e-mails,
+    postal codes or timestamps are processed by the callback only once.
+
+    Callbacks declare through the attribute "deterministic" if they can be cached:
+        - True/False
+        - or a function which gets the parameters of the callback and returns True/False,
+          e.g. ch_ipv4 is only deterministic if "assign_rand_num" is False.
+    Callbacks without the attribute are treated as not deterministic.
+    Not deterministic callbacks bypass the cache, unless "stable_pseudonyms" is True. Then the first result of a value is
+    reused for every occurrence, e.g. the same random ip for the same original ip.
+
+    Attributes:
+        max_entries (int): maximum number of cached results, the least recently used result is evicted first
+        stable_pseudonyms (bool): cache not deterministic callbacks too
+        hits (int): number of results served from the cache
+        misses (int): number of callback calls for cacheable values
+        evictions (int): number of results which were evicted from the cache
+        bypassed (int): number of callback calls which were not cacheable (not deterministic or unhashable value)
+    """
+
+    def __init__(self, max_entries: int = 100000, stable_pseudonyms: bool = False):
+        """
+        Args:
+            max_entries (int, optional): maximum number of cached results.
+                Defaults to 100000
+            stable_pseudonyms (bool, optional): if True, not deterministic callbacks are cached too.
+                Defaults to False
+        """
+        self.max_entries = max_entries
+        self.stable_pseudonyms = stable_pseudonyms
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bypassed = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        """
+        Only the configuration is sent to other processes (e.g. the parallel mode), every process has its own entries.
+        """
+        return {"max_entries": self.max_entries, "stable_pseudonyms": self.stable_pseudonyms}
+
+    def __setstate__(self, state: dict):
+        self.__init__(**state)
+
+    def is_cacheable(self, func, func_params: list = None) -> bool:
+        """
+        Checks the "deterministic" declaration of the callback for the given parameters
+
+        Args:
+            func (callable): change callback
+            func_params (list, optional): parameters of the change callback
+
+        Returns:
+            bool
+        """
+        if self.stable_pseudonyms:
+            return True
+        deterministic = getattr(func, "deterministic", False)
+        if callable(deterministic):
+            return bool(deterministic(*(func_params or [])))
+        return bool(deterministic)
+
+    def wrap(self, func, func_params: list = None):
+        """
+        Returns the callback with memoization for the given parameters, or the callback itself if it is not cacheable.
+        The returned function has the same signature as the callback: func(value, *func_params)
+
+        Args:
+            func (callable): change callback
+            func_params (list, optional): parameters of the change callback
+
+        Returns:
+            callable
+        """
+        if not self.is_cacheable(func, func_params):
+            def bypass(value, *params):
+                self.bypassed += 1
+                return func(value, *params)
+            return bypass
+
+        params_key = _freeze(func_params or [])
+
+        def memoized(value, *params):
+            try:
+                key = (func, type(value), value, params_key)
+                hash(key)
+            except TypeError:
+                self.bypassed += 1
+                return func(value, *params)
+            return self.get_or_call(key, func, value, params)
+
+        return memoized
+
+    def get_or_call(self, key: tuple, func, value: object, func_params: tuple) -> object:
+        """
+        Returns the cached result for the key or calls the callback and caches its result.
+        """
+        with self.__lock:
+            try:
+                result = self.__entries[key]
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return result
+            except KeyError:
+                self.misses += 1
+
+        result = func(value, *func_params)
+
+        with self.__lock:
+            self.__entries[key] = result
+            if len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def stats(self) -> dict:
+        """
+        Returns the counters of the cache
+
+        Returns:
+            dict
+        """
+        return {
+            "entries": len(self.__entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bypassed": self.bypassed,
+        }
+
+    def clear(self):
+        """
+        Removes all cached results, the counters are kept.
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+
+def _freeze(value: object) -> object:
+    """
+    Converts lists/dicts of the parameters into hashable tuples.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(elem) for elem in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(elem)) for key, elem in value.items()))
+    return value
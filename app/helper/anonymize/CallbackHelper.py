@@ -1,16 +1,33 @@
 import datetime
+import re
+from functools import lru_cache
 import warnings
-import dateparser
 import ipaddress
 import random
 from random import randint
-from schwifty import IBAN
+import numpy as np
+import pandas as pd
 from email_validator import validate_email, EmailNotValidError
+from app.helper.anonymize.DateParser import parse_datetime, parse_datetime_batch
+from app.helper.anonymize.Iban import anonymize_iban, anonymize_iban_batch, iban_checksum
+from app.helper.anonymize.IpAddress import PackedIps, anonymize_ips, IPV4_RE, IPV4_PREFIX, IPV6_PREFIX
 
 """
 Anon Helper/Callback methods to use in the change argument of the Anon-Clas 
+
+Callbacks can provide a vectorized variant for pd.Series through the attribute "batch" (e.g. ch_postal_code.batch),
+which is used by the DataFrameChange-engine for DataFrames. The batch variants take the same parameters as the scalar
+callback.
+Callbacks declare through the attribute "deterministic" if their results can be memoized, see CallbackCache.
 """
 
+# common case of an e-mail address: dot-atom local part and an ascii domain with a tld
+_EMAIL_PATTERN = r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*" \
+                 r"@((?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63})"
+_EMAIL_RE = re.compile(_EMAIL_PATTERN)
+# number of normalized e-mail domains to keep in the cache
+EMAIL_DOMAIN_CACHE_SIZE = 4096
+
 
 def ch_postal_code(postal_code: str, pc_len: int = 5, len_check: bool = True, change_last_n: int = 1,
                    change_with: str = "0") -> str:
@@ -55,7 +72,8 @@ def ch_postal_code(postal_code: str, pc_len: int = 5, len_check: bool = True, ch
 def ch_datetime(date: object, return_unix_timestamp: bool = False,
                 year_replace: int = None, month_replace: int = None, day_replace: int = None,
                 hour_replace: int = None, minute_replace: int = None, second_replace: int = None,
-                save_parse_mode: bool = True, save_parse_overwrite: str = "#ANONYMIZED_COULD_NOT_PARSE"):
+                save_parse_mode: bool = True, save_parse_overwrite: str = "#ANONYMIZED_COULD_NOT_PARSE",
+                formats: list = None, languages: list = None):
     """
     Parses the given date/timestamp string or unix timestamp and replaces parts of the timestamp with the specified
     replace parameters for anonymization purpose.
@@ -64,6 +82,7 @@ def ch_datetime(date: object, return_unix_timestamp: bool = False,
         date (str): date(time) represented as string.
             The function can even process human readable date strings like '21 July 2013' or '1 min ago'
             through the 'dateparser'-package (https://pypi.org/project/dateparser/)
+            Unix timestamps, ISO-8601 strings and the given "formats" are parsed without dateparser, see DateParser.py
         return_unix_timestamp (bool, optional): If true, a unix timestamp, seconds since epoch (1970) is returned
             Defaults to False,
         year_replace (int, optional): Value to replace the current year. 
@@ -81,6 +100,10 @@ def ch_datetime(date: object, return_unix_timestamp: bool = False,
             Defaults to None
         save_parse_mode (bool, optional): If true and a date can not be parsed it get´s overwritten with 'save_parse_overwrite'
         save_parse_overwrite (str, optional): Overwrite-value if the parsing of a date fails and 'save_parse_mode' = True
+        formats (list, optional): explicit strptime formats which are tried before dateparser, e.g. ["%d.%m.%Y"]
+            Defaults to DateParser.DATETIME_FORMATS
+        languages (list, optional): languages of the dateparser fallback.
+            Defaults to DateParser.DATETIME_LANGUAGES
 
     Returns:
         [datetime.datetime; int]
@@ -89,43 +112,64 @@ def ch_datetime(date: object, return_unix_timestamp: bool = False,
         else:
             datetime.datetime
     """
+    year_replace = _check_year_replace(year_replace, return_unix_timestamp)
+    ts = parse_datetime(date, formats, languages)
+    return _anon_datetime(date, ts, return_unix_timestamp, year_replace, month_replace, day_replace, hour_replace,
+                          minute_replace, second_replace, save_parse_mode, save_parse_overwrite)
+
+
+def ch_datetime_batch(dates: object, return_unix_timestamp: bool = False,
+                      year_replace: int = None, month_replace: int = None, day_replace: int = None,
+                      hour_replace: int = None, minute_replace: int = None, second_replace: int = None,
+                      save_parse_mode: bool = True, save_parse_overwrite: str = "#ANONYMIZED_COULD_NOT_PARSE",
+                      formats: list = None, languages: list = None) -> object:
+    """
+    Batch variant of ch_datetime for a list or pd.Series of dates, every distinct value is parsed only once.
+    All parameters are the same as in ch_datetime.
+
+    Returns:
+        [list, pd.Series] in the provided structure
+    """
+    year_replace = _check_year_replace(year_replace, return_unix_timestamp)
+    values = list(dates)
+    ret = [
+        _anon_datetime(date, ts, return_unix_timestamp, year_replace, month_replace, day_replace, hour_replace,
+                       minute_replace, second_replace, save_parse_mode, save_parse_overwrite)
+        for date, ts in zip(values, parse_datetime_batch(values, formats, languages))
+    ]
+    if isinstance(dates, pd.Series):
+        return pd.Series(ret, index=dates.index, name=dates.name, dtype=object)
+    return ret
 
-    # check if a number was supplied and convert it to a string
-    try:
-        date / 1
-        date = str(date)
-        wasNumber = True
-    except:
-        wasNumber = False
 
-    # check if the year fits for a unix timestamp. If not, choose a random year between 1970 and todays year.
+def _check_year_replace(year_replace: int, return_unix_timestamp: bool) -> int:
+    """
+    check if the year fits for a unix timestamp. If not, choose a random year between 1970 and todays year.
+    """
     if year_replace is not None and year_replace < 1970 and return_unix_timestamp:
         year_today = datetime.date.today().year
-        year_replace = randint(1970, datetime.date.today().year)
+        year_replace = randint(1970, year_today)
         warnings.warn(
             "The parameter 'year_replace' can´t be smaller than 1970 for a unix timestamp." +
             "The random year " + str(year_replace) + " was choosen between 1970 and " + str(year_today))
+    return year_replace
 
-    def early_return():
-        # if save_parse_mode is True, overwrite the date value on error, else return it without modification
-        if save_parse_mode:
-            warnings.warn("The given date " + date if date else "" + " could not be parsed, the overwrite value " +
-                          save_parse_overwrite + " will be returned.")
-            ts = save_parse_overwrite
-        else:
-            warnings.warn("The given date " + date if date else "" + " could not be parsed, the original value is returned.")
-            ts = date
-        return ts
 
-    # try to parse the date
-    try:
-        ts = dateparser.parse(date)
-    except:
-        return early_return()
-
-    # just opt out if None was provided
+def _anon_datetime(date: object, ts: datetime.datetime, return_unix_timestamp: bool,
+                   year_replace: int, month_replace: int, day_replace: int,
+                   hour_replace: int, minute_replace: int, second_replace: int,
+                   save_parse_mode: bool, save_parse_overwrite: str):
+    """
+    Replaces the given parts of the parsed timestamp "ts", see ch_datetime.
+    """
     if ts is None:
-        return early_return()
+        # if save_parse_mode is True, overwrite the date value on error, else return it without modification
+        if save_parse_mode:
+            warnings.warn("The given date " + str(date) + " could not be parsed, the overwrite value " +
+                          str(save_parse_overwrite) + " will be returned.")
+            return save_parse_overwrite
+        warnings.warn("The given date " + str(date) + " could not be parsed, the original value is returned.")
+        return date
 
     # assing the own value of the timestamp to the replace params if none is provided
     year_replace = ts.year if year_replace is None else year_replace
@@ -163,17 +207,22 @@ def ch_ipv4(ip: str, ip_check: bool = True, change_parts: list = [3], assign_ran
         Change the under "change_parts" specified parts with this value if "assign_rand_num" = False.
         Defaults to 0.
 
+    IPv6 addresses keep their first IpAddress.IPV6_PREFIX bits, the remaining bits are randomized if
+    "assign_rand_num" is True, otherwise set to zero.
+
     :return: (str
     """
 
-    # check if it´s an valid ip adress
-    if ip_check:
+    # check if it´s an valid ip adress, dotted quads are checked without ipaddress
+    if ip_check and not (isinstance(ip, str) and IPV4_RE.fullmatch(ip)):
         try:
             # try to parse it
-            ipaddress.ip_address(ip)
+            address = ipaddress.ip_address(ip)
         except ValueError as ve:
-            warnings.warn("The given ip adresse '" + ip if ip else "" + "' is not an valid ip. The original value will be returned")
+            warnings.warn("The given ip adresse '" + str(ip) + "' is not an valid ip. The original value will be returned")
             return ip
+        if address.version == 6:
+            return anonymize_ips([ip], IPV4_PREFIX, IPV6_PREFIX, randomize=assign_rand_num)[0]
 
     ip_list: list = ip.split(".")
 
@@ -189,7 +238,7 @@ def ch_ipv4(ip: str, ip_check: bool = True, change_parts: list = [3], assign_ran
             try:
                 ip_list[part] = replacement
             except Exception as e:
-                warnings.warn("The part '" + part + "' of the given ip '" + ip +
+                warnings.warn("The part '" + str(part) + "' of the given ip '" + str(ip) +
                               "' could not be replaced. Error: " + str(e))
         else:
             warnings.warn("The specified part " + str(part) + " is not valid. Valid are values between 0 - 3.")
@@ -202,52 +251,353 @@ def ch_ipv4(ip: str, ip_check: bool = True, change_parts: list = [3], assign_ran
 
 def ch_iban(iban: str, overwrite_acccount: str = "0123456789") -> str:
     """
-    Remove the account from the iban.
-    Based on python library schwifty, currently only works with german IBANs.
+    Remove the account from the iban and recompute the check digits.
+    SEPA countries are processed by the native IBAN engine (see Iban.py), all other countries by the python library
+    schwifty as slow-path fallback.
     :param iban: iban code
         Gets validated. If not valid, returns the IBAN without anonymization.
     :param overwrite_acccount: (str, optional) Value to overwrite the account
         Defaults to 0123456789.
-        Should be numeric and 10 digits long.
+        Should be numeric. It is padded with leading zeros or cut from the left to the length of the account part
+        of the country.
     :return: (str)
         anon iban.
     """
     # check the provided overwrite account
-    if len(overwrite_acccount) != 10:
-        warnings.warn("The provided overwrite_account should be of length 10 but is: " + str(len(overwrite_acccount)))
     if not overwrite_acccount.isdigit():
         warnings.warn("The provided overwrite_account should only consist of digits, but is: " + overwrite_acccount)
 
+    try:
+        anon_iban = anonymize_iban(iban, overwrite_acccount)
+    except (ValueError, AttributeError, TypeError):
+        warnings.warn("The iban '" + str(iban) + "' is not valid. The original value will be returned.")
+        return iban
+    if anon_iban is None:
+        anon_iban = _ch_iban_schwifty(iban, overwrite_acccount)
+    return anon_iban
+
+
+def ch_iban_batch(ibans: object, overwrite_acccount: str = "0123456789") -> object:
+    """
+    Batch variant of ch_iban for a list or pd.Series of ibans, every distinct iban is processed only once.
+    :param ibans: (list, pd.Series) iban codes
+    :param overwrite_acccount: (str, optional) see ch_iban
+    :return: [list, pd.Series] in the provided structure
+    """
+    if not overwrite_acccount.isdigit():
+        warnings.warn("The provided overwrite_account should only consist of digits, but is: " + overwrite_acccount)
+
+    values = list(ibans)
+    ret = list()
+    invalid = 0
+    for iban, anon_iban in zip(values, anonymize_iban_batch(values, overwrite_acccount)):
+        if isinstance(anon_iban, ValueError):
+            invalid += 1
+            anon_iban = iban
+        elif anon_iban is None:
+            anon_iban = _ch_iban_schwifty(iban, overwrite_acccount)
+        ret.append(anon_iban)
+    if invalid:
+        warnings.warn(str(invalid) + " of the provided ibans are not valid. The original values will be returned.")
+
+    if isinstance(ibans, pd.Series):
+        return pd.Series(ret, index=ibans.index, name=ibans.name, dtype=object)
+    return ret
+
+
+def _ch_iban_schwifty(iban: str, overwrite_acccount: str) -> str:
+    """
+    Slow path of ch_iban for countries which are not in Iban.IBAN_LAYOUTS, based on python library schwifty.
+    """
+    from schwifty import IBAN
+    
     # check if it´s an valid iban
     try:
         _iban = IBAN(iban)
     except ValueError as ve:
         warnings.warn("The iban '" + iban + "' is not valid. The original value will be returned.")
         return iban
-    # bring together the parts of the iban
-    anon_iban = _iban.country_code + _iban.checksum_digits + _iban.bank_code + overwrite_acccount
-    return anon_iban
+    # replace the account part of the bban and bring together the parts of the iban
+    bban = str(_iban.bban)
+    account = _iban.account_code
+    position = bban.rfind(account) if account else -1
+    if position < 0:
+        warnings.warn("The account of the iban '" + iban + "' could not be found. The original value will be returned.")
+        return iban
+    bban = bban[:position] + overwrite_acccount.rjust(len(account), "0")[-len(account):] + bban[position + len(account):]
+    return _iban.country_code + iban_checksum(_iban.country_code, bban) + bban
 
 
-def ch_email(email: str, overwrite_local_part: str = "anonymized") -> str:
+def ch_email(email: str, overwrite_local_part: str = "anonymized", check_deliverability: bool = False) -> str:
     """
     changes the local part of a valid e-mail adress to overwrite_local_part and returns it.
     :param email: email adress
     :param overwrite_local_part: overwrite value for the local part.
     (email: info@lv1871.de; info is the local part and @lv1871 is the domain)
+    :param check_deliverability: If true, the domain is checked via DNS (network access, slow).
+        Otherwise only the syntax is validated (offline).
+        Defaults to False.
     :return: (str)
         anonymized e-mail
     """
+    # fast path: common addresses are matched by a regex and only the domain is validated (cached per domain)
+    match = _EMAIL_RE.fullmatch(email) if isinstance(email, str) else None
+    if match is not None and _email_lengths_ok(email):
+        domain = _normalize_email_domain(match.group(1), check_deliverability)
+        if domain is None:
+            warnings.warn("The provided e-mail '" + email + "' is not valid. The original value will be returned.")
+            return email
+        return overwrite_local_part + "@" + domain
+
     try:
-        valid_email = validate_email(email)
-    except EmailNotValidError as e:
-        warnings.warn("The provided e-mail '" + email + "' is not valid. The original value will be returned.")
+        valid_email = validate_email(email, check_deliverability=check_deliverability)
+    except (EmailNotValidError, TypeError, AttributeError) as e:
+        warnings.warn("The provided e-mail '" + str(email) + "' is not valid. The original value will be returned.")
         return email
 
     anon_email = overwrite_local_part + "@" + valid_email["domain"]
     return anon_email
 
 
+def ch_postal_code_batch(postal_codes: pd.Series, pc_len: int = 5, len_check: bool = True, change_last_n: int = 1,
+                         change_with: str = "0") -> pd.Series:
+    """
+    Vectorized variant of ch_postal_code for a whole pd.Series of postal codes.
+    Cells which are not strings are returned unchanged.
+
+    Args:
+        postal_codes (pd.Series): postal codes to process
+        pc_len (int): length of the postal code.
+            Defaults to 5
+        len_check (bool): should the length of the postal code be checked?
+            Defaults to True
+        change_last_n (int):
+
+        change_with (str):
+
+    Returns:
+        pd.Series
+    """
+    if not _is_string_series(postal_codes):
+        return _map_scalar(postal_codes, ch_postal_code, pc_len, len_check, change_last_n, change_with)
+
+    change_last_n = abs(change_last_n)
+    lengths = postal_codes.str.len()
+    mask = lengths.notna()
+    if len_check:
+        len_ok = lengths == pc_len
+        failed = int((mask & ~len_ok).sum())
+        if failed:
+            warnings.warn("The length check (len == " + str(pc_len) + ") was not successful for " + str(failed) +
+                          " postalcode-strings. The initially given strings will be returned")
+        mask = mask & len_ok
+
+    changed = postal_codes.str[:-change_last_n] + change_with * change_last_n
+    return postal_codes.where(~mask, changed)
+
+
+def ch_ipv4_batch(ips: pd.Series, ip_check: bool = True, change_parts: list = [3], assign_rand_num: bool = True,
+                  change_with: str = "0") -> pd.Series:
+    """
+    Vectorized variant of ch_ipv4 for a whole pd.Series of ip-addresses.
+    Valid IPv4 and IPv6 adresses are processed as packed integers, see IpAddress.PackedIps, all other values are passed
+    to ch_ipv4 one by one. Missing values are returned unchanged.
+
+    :param ips: (pd.Series) ip adresses to parse/anonymize.
+    :param ip_check: (bool, optional) see ch_ipv4
+    :param change_parts: (list, optional) see ch_ipv4
+    :param assign_rand_num: (bool, optional) see ch_ipv4
+    :param change_with: (str, optional) see ch_ipv4
+    :return: (pd.Series)
+    """
+    if not _is_string_series(ips):
+        return _map_scalar(ips, ch_ipv4, ip_check, change_parts, assign_rand_num, change_with)
+
+    packed = PackedIps(ips)
+    mask = packed.version != 0
+    ret = ips.copy()
+    # missing values are returned unchanged
+    scalar = ~mask & ips.notna().to_numpy(dtype=bool)
+    if scalar.any():
+        ret[scalar] = _map_scalar(ips[scalar], ch_ipv4, ip_check, change_parts, assign_rand_num, change_with)
+    if not mask.any():
+        return ret
+
+    parts = list()
+    for part in change_parts:
+        # check if a valid part is specified
+        if 0 <= part <= 3:
+            parts.append(part)
+        else:
+            warnings.warn("The specified part " + str(part) + " is not valid. Valid are values between 0 - 3.")
+
+    change_value = None if assign_rand_num else _octet_value(change_with)
+    if not assign_rand_num and change_value is None:
+        # replacements which are no octet can't be packed, e.g. "x" or "000"
+        v4 = packed.version == 4
+        octets = ips[v4].str.split(".", expand=True)
+        for part in parts:
+            octets[part] = str(change_with)
+        ret[v4] = octets[0] + "." + octets[1] + "." + octets[2] + "." + octets[3]
+        packed.version[v4] = 0
+    else:
+        packed.replace_ipv4_octets(parts, change_value)
+
+    if assign_rand_num:
+        packed.randomize(32, IPV6_PREFIX)
+    else:
+        packed.truncate(32, IPV6_PREFIX)
+    packed_mask = packed.version != 0
+    ret[packed_mask] = packed.to_strings()[packed_mask]
+    return ret
+
+
+def ch_ip(ip: str, prefix_v4: int = IPV4_PREFIX, prefix_v6: int = IPV6_PREFIX, randomize: bool = False,
+          key: str = None) -> str:
+    """
+    Anonymizes an IPv4 or IPv6 address by its prefix: the first "prefix" bits (the network) are kept and the host bits
+    are set to zero or randomized, see IpAddress.py.
+    Values which are not valid ip-addresses are returned unchanged.
+    :param ip: (str) ip adresse to anonymize.
+    :param prefix_v4: (int, optional) number of bits to keep for IPv4 addresses. Defaults to 24.
+    :param prefix_v6: (int, optional) number of bits to keep for IPv6 addresses. Defaults to 48.
+    :param randomize: (bool, optional) If true, the host bits are randomized, otherwise set to zero.
+        Defaults to False.
+    :param key: (str, optional) If provided, the randomized host bits are derived from the address and the key,
+        so the same address always gets the same pseudonym.
+        Defaults to None.
+    :return: (str)
+    """
+    return anonymize_ips([ip], prefix_v4, prefix_v6, randomize, key)[0]
+
+
+def ch_ip_batch(ips: object, prefix_v4: int = IPV4_PREFIX, prefix_v6: int = IPV6_PREFIX, randomize: bool = False,
+                key: str = None) -> object:
+    """
+    Batch variant of ch_ip for a list or pd.Series of ip-addresses. All parameters are the same as in ch_ip.
+    :return: [list, pd.Series] in the provided structure
+    """
+    return anonymize_ips(ips, prefix_v4, prefix_v6, randomize, key)
+
+
+def ch_email_batch(emails: object, overwrite_local_part: str = "anonymized",
+                   check_deliverability: bool = False) -> object:
+    """
+    Batch variant of ch_email for a list or pd.Series of e-mail adresses.
+    Common addresses are matched by the compiled fast-path regex and every distinct domain is validated only once,
+    all other values are passed to ch_email one by one. Missing values are returned unchanged.
+    :param emails: (list, pd.Series) email adresses
+    :param overwrite_local_part: overwrite value for the local part.
+    :param check_deliverability: see ch_email
+    :return: [list, pd.Series] in the provided structure
+        anonymized e-mails
+    """
+    ret = list()
+    invalid = 0
+    for email in emails:
+        match = _EMAIL_RE.fullmatch(email) if isinstance(email, str) else None
+        if match is not None and _email_lengths_ok(email):
+            domain = _normalize_email_domain(match.group(1), check_deliverability)
+            if domain is None:
+                invalid += 1
+                ret.append(email)
+            else:
+                ret.append(overwrite_local_part + "@" + domain)
+        elif email is None or (pd.api.types.is_scalar(email) and pd.isna(email)):
+            # missing values are returned unchanged
+            ret.append(email)
+        else:
+            ret.append(ch_email(email, overwrite_local_part, check_deliverability))
+
+    if invalid:
+        warnings.warn(str(invalid) + " of the provided e-mails are not valid. The original values will be returned.")
+    if isinstance(emails, pd.Series):
+        return pd.Series(ret, index=emails.index, name=emails.name, dtype=object)
+    return ret
+
+
+@lru_cache(maxsize=EMAIL_DOMAIN_CACHE_SIZE)
+def _normalize_email_domain(domain: str, check_deliverability: bool = False) -> str:
+    """
+    Validates and normalizes the domain of an e-mail address, None if the domain is not valid.
+    """
+    try:
+        return validate_email("a@" + domain, check_deliverability=check_deliverability)["domain"]
+    except EmailNotValidError:
+        return None
+
+
+def _email_lengths_ok(email: str) -> bool:
+    """
+    Maximum lengths of an e-mail address (254) and its local part (64)
+    """
+    return len(email) <= 254 and email.index("@") <= 64
+
+
+def _is_string_series(series: pd.Series) -> bool:
+    """
+    Checks if the .str-accessor can be used on the given series.
+    """
+    return pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype)
+
+
+def _map_scalar(series: pd.Series, func, *func_params) -> pd.Series:
+    """
+    Applies a scalar callback to every cell of the series.
+    """
+    return series.map(lambda value: func(value, *func_params))
+
+
+def _ch_datetime_deterministic(return_unix_timestamp: bool = False, year_replace: int = None, *args, **kwargs) -> bool:
+    """
+    ch_datetime chooses a random year if "year_replace" < 1970 and a unix timestamp is returned.
+    """
+    return not (year_replace is not None and year_replace < 1970 and return_unix_timestamp)
+
+
+def _octet_value(value: object) -> int:
+    """
+    Returns the value as int if it is a valid octet of an ip-address (e.g. "0" or 255), otherwise None.
+    """
+    value = str(value)
+    if re.fullmatch(r"25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d", value):
+        return int(value)
+    return None
+
+
+def _ch_ip_deterministic(prefix_v4: int = IPV4_PREFIX, prefix_v6: int = IPV6_PREFIX, randomize: bool = False,
+                         key: str = None, *args, **kwargs) -> bool:
+    """
+    ch_ip is random if "randomize" is True and no key is provided.
+    """
+    return not randomize or key is not None
+
+
+def _ch_ipv4_deterministic(ip_check: bool = True, change_parts: list = [3], assign_rand_num: bool = True,
+                           *args, **kwargs) -> bool:
+    """
+    ch_ipv4 assigns random numbers if "assign_rand_num" is True.
+    """
+    return not assign_rand_num
+
+
+# vectorized variants, see DataFrameChange
+ch_postal_code.batch = ch_postal_code_batch
+ch_ipv4.batch = ch_ipv4_batch
+ch_ip.batch = ch_ip_batch
+ch_email.batch = ch_email_batch
+ch_datetime.batch = ch_datetime_batch
+ch_iban.batch = ch_iban_batch
+
+# can the results be memoized? see CallbackCache
+ch_postal_code.deterministic = True
+ch_datetime.deterministic = _ch_datetime_deterministic
+ch_ipv4.deterministic = _ch_ipv4_deterministic
+ch_ip.deterministic = _ch_ip_deterministic
+ch_iban.deterministic = True
+ch_email.deterministic = True
+
+
 def _unix_timestamp_epoch(dt: datetime.datetime) -> int:
     """
     Returns an unix timestamp in milliseconds since epoch format
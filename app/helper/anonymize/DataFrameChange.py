@@ -0,0 +1,132 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from app.helper.anonymize.CallbackCache import CallbackCache
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+"""
+Column-wise change engine for pandas DataFrames, used by the Anon-Class for the "change" argument.
+
+Batch callback protocol:
+    A change callback (see CallbackHelper.py) can provide a vectorized variant of itself through the attribute
+    "batch". The batch variant gets the whole pd.Series as first argument followed by the same parameters as the
+    scalar callback and has to return a pd.Series with the same index.
+    If no batch variant exists, the scalar callback is applied cell by cell.
+"""
+
+
+class DataFrameChange:
+    """
+    Applies the change configuration of the Anon-Class column by column to a pd.core.frame.DataFrame
+
+    Attributes:
+        change (list): elements/columns an the corresponding change action, see Anonymize.change
+        wild_change (bool): if wild is True, treat the given key as a case insensitive substring when matching columns.
+        callback_cache (CallbackCache): memoization of the callbacks which are applied cell by cell
+    """
+
+    def __init__(self, change: list = None, wild_change: bool = False, callback_cache: CallbackCache = None):
+        """
+        Args:
+            change (list): elements/columns an the corresponding change action, see Anonymize.change
+                Defaults to None.
+            wild_change (bool): if wild is True, treat the given key as a case insensitive substring when matching
+                columns.
+                Defaults to False
+            callback_cache (CallbackCache, optional): memoization of the callbacks which are applied cell by cell.
+                Defaults to None (no memoization)
+        """
+        self.change = change
+        self.wild_change = wild_change
+        self.callback_cache = callback_cache
+
+    def apply(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Applies all change configurations to the matching columns of the DataFrame.
+        The given DataFrame is not modified, a (shallow) copy with the changed columns is returned.
+
+        Args:
+            data (pd.DataFrame): DataFrame to process
+
+        Returns:
+            pd.DataFrame
+        """
+        # exit early if no config is provided
+        if self.change is None:
+            return data
+
+        data = data.copy(deep=False)
+        for conf in self.change:
+            element, func, func_params, conv_func = self.unpack_conf(conf)
+            for column in self.matching_columns(data.columns, element):
+                data[column] = self.apply_series(data[column], func, func_params, conv_func, self.callback_cache)
+
+        return data
+
+    @staticmethod
+    def unpack_conf(conf: list) -> tuple:
+        """
+        Splits a single change configuration into its parts. Parameters and the conversion function are optional.
+
+        Args:
+            conf (list): [elements, callback, parameters, conversion function]
+
+        Returns:
+            (list, callable, list, callable)
+        """
+        element = conf[0]
+        func = conf[1]
+        func_params = conf[2] if len(conf) > 2 else None
+        conv_func = conf[3] if len(conf) > 3 else None
+        return element, func, func_params, conv_func
+
+    def matching_columns(self, columns: pd.Index, element: list) -> list:
+        """
+        Returns the columns of the DataFrame which match any of the given element names.
+
+        Args:
+            columns (pd.Index): columns of the DataFrame
+            element (list): names of the elements to alter
+
+        Returns:
+            list
+        """
+        matches = list()
+        for ele in element:
+            if self.wild_change:
+                key = str(ele).lower()
+                found = [column for column in columns if key in str(column).lower()]
+            else:
+                found = [ele] if ele in columns else []
+            # keep the order of the configuration and process every column only once per configuration
+            matches.extend(column for column in found if column not in matches)
+        return matches
+
+    @staticmethod
+    def apply_series(series: pd.Series, func, func_params: list = None, conv_func=None,
+                     callback_cache: CallbackCache = None) -> pd.Series:
+        """
+        Applies the callback to a whole column. Uses the vectorized variant "func.batch" if the callback provides one,
+        otherwise the scalar callback is called for every cell.
+
+        Args:
+            series (pd.Series): column to process
+            func (callable): change callback
+            func_params (list, optional): parameters of the change callback
+            conv_func (callable, optional): conversion function which is applied to every cell before the callback
+            callback_cache (CallbackCache, optional): memoization of the callback if it is applied cell by cell
+
+        Returns:
+            pd.Series
+        """
+        func_params = func_params if func_params else []
+        if conv_func is not None:
+            series = series.map(conv_func)
+
+        batch = getattr(func, "batch", None)
+        if batch is not None:
+            return batch(series, *func_params)
+        if callback_cache is not None:
+            func = callback_cache.wrap(func, func_params)
+        return series.map(lambda value: func(value, *func_params))
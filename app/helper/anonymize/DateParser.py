@@ -0,0 +1,173 @@
+from __future__ import annotations
+import datetime
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from dateparser.date import DateDataParser
+
+"""
+Tiered date parser for the ch_datetime-callback.
+
+The tiers are tried in the following order, the first one which succeeds wins:
+    1. datetime.datetime objects are returned as they are
+    2. unix timestamps in seconds, milliseconds or microseconds (10, 13 or 16 digits, numbers or strings)
+    3. ISO-8601 strings like '2021-01-01' or '2021-01-01T10:00:00+02:00' (datetime.fromisoformat)
+    4. explicit strptime formats, see DATETIME_FORMATS or the "formats" parameter
+    5. a reused, language restricted dateparser.DateDataParser for human readable strings like '21 July 2013'
+
+The results of strings are kept in a bounded LRU cache, so repeating values are parsed only once.
+Relative dates like '1 min ago' are not cached, their result depends on the time of the call.
+"""
+
+# languages of the DateDataParser fallback, restricting them avoids the language detection of dateparser.parse
+DATETIME_LANGUAGES = ["en", "de"]
+# explicit strptime formats which are tried before the DateDataParser fallback, e.g. ["%d.%m.%Y", "%Y%m%d%H%M%S"]
+DATETIME_FORMATS = []
+# number of parsed strings to keep in the cache
+DATETIME_CACHE_SIZE = 65536
+
+# same rule as dateparser for unix timestamps: seconds with optional milli- and microseconds
+_TIMESTAMP_RE = re.compile(r"^(\d{10})(\d{3})?(\d{3})?(?![^.])")
+# ISO-8601 date at the start of the string
+_ISO_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+# words of relative dates, those results must not be cached
+_RELATIVE_RE = re.compile(r"ago|now|today|yesterday|tomorrow|in \d|vor |heute|gestern|morgen|jetzt", re.IGNORECASE)
+
+_date_data_parsers = dict()
+
+
+def parse_datetime(date: object, formats: list = None, languages: list = None) -> datetime.datetime:
+    """
+    Parses a date/timestamp string, a number (unix timestamp) or a datetime object.
+
+    Args:
+        date (object): value to parse
+        formats (list, optional): explicit strptime formats, tried after ISO-8601.
+            Defaults to DATETIME_FORMATS
+        languages (list, optional): languages of the dateparser fallback.
+            Defaults to DATETIME_LANGUAGES
+
+    Returns:
+        datetime.datetime or None if the value can't be parsed
+    """
+    if isinstance(date, datetime.datetime):
+        return date
+    if isinstance(date, int) and not isinstance(date, bool):
+        ts = _parse_int_timestamp(date)
+        if ts is not None:
+            return ts
+        date = str(date)
+    elif isinstance(date, float):
+        date = str(date)
+    if not isinstance(date, str):
+        return None
+
+    formats = tuple(DATETIME_FORMATS if formats is None else formats)
+    languages = tuple(DATETIME_LANGUAGES if languages is None else languages)
+    if _RELATIVE_RE.search(date):
+        return _parse_datetime_string.__wrapped__(date, formats, languages)
+    return _parse_datetime_string(date, formats, languages)
+
+
+def parse_datetime_batch(dates: list, formats: list = None, languages: list = None) -> list:
+    """
+    Parses a list of values, every distinct value is parsed only once.
+
+    Args:
+        dates (list): values to parse
+        formats (list, optional): see parse_datetime
+        languages (list, optional): see parse_datetime
+
+    Returns:
+        list[datetime.datetime], None for values which can't be parsed
+    """
+    parsed = dict()
+    ret = list()
+    for date in dates:
+        try:
+            ts = parsed[date]
+        except KeyError:
+            ts = parsed[date] = parse_datetime(date, formats, languages)
+        except TypeError:
+            # unhashable values
+            ts = parse_datetime(date, formats, languages)
+        ret.append(ts)
+    return ret
+
+
+def get_date_data_parser(languages: tuple) -> DateDataParser:
+    """
+    Returns the DateDataParser for the given languages, it is created only once per combination of languages.
+
+    Args:
+        languages (tuple): languages of the parser
+
+    Returns:
+        DateDataParser
+    """
+    try:
+        return _date_data_parsers[languages]
+    except KeyError:
+        # dateparser is imported on first use, it takes several hundred milliseconds
+        from dateparser.date import DateDataParser
+        parser = _date_data_parsers[languages] = DateDataParser(languages=list(languages))
+        return parser
+
+
+@lru_cache(maxsize=DATETIME_CACHE_SIZE)
+def _parse_datetime_string(date: str, formats: tuple, languages: tuple) -> datetime.datetime:
+    """
+    Parses a string with the tiers 2 - 5 of the module description.
+    """
+    date = date.strip()
+    ts = _parse_timestamp(date)
+    if ts is not None:
+        return ts
+
+    if _ISO_RE.match(date):
+        try:
+            return datetime.datetime.fromisoformat(date)
+        except ValueError:
+            pass
+
+    for date_format in formats:
+        try:
+            return datetime.datetime.strptime(date, date_format)
+        except ValueError:
+            pass
+
+    try:
+        return get_date_data_parser(languages).get_date_data(date).date_obj
+    except Exception:
+        return None
+
+
+def _parse_int_timestamp(date: int) -> datetime.datetime:
+    """
+    Integer variant of _parse_timestamp, without the conversion to a string.
+    """
+    for digits, divisor in ((10, 1), (13, 1000), (16, 1000000)):
+        if 10 ** (digits - 1) <= date < 10 ** digits:
+            seconds, fraction = divmod(date, divisor)
+            try:
+                return datetime.datetime.fromtimestamp(seconds).replace(microsecond=fraction * (1000000 // divisor))
+            except (OverflowError, OSError, ValueError):
+                return None
+    return None
+
+
+def _parse_timestamp(date: str) -> datetime.datetime:
+    """
+    Parses a unix timestamp string with 10, 13 or 16 digits to a (local) datetime, like dateparser does.
+    """
+    match = _TIMESTAMP_RE.match(date)
+    if match is None:
+        return None
+    seconds, millis, micros = match.groups()
+    microsecond = int(millis or 0) * 1000 + int(micros or 0)
+    try:
+        return datetime.datetime.fromtimestamp(int(seconds)).replace(microsecond=microsecond)
+    except (OverflowError, OSError, ValueError):
+        return None
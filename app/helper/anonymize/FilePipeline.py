@@ -0,0 +1,243 @@
+import json
+import os
+import warnings
+import pandas as pd
+from app.helper.anonymize.Anonymize import Anonymize
+from app.helper.cache.disk_cache import DiskCache
+
+
+class FilePipeline:
+    """
+    Streams files from the "in_folder" through an Anon-Class into the "out_folder" in chunks of a fixed size, so the
+    memory usage does not depend on the size of the file.
+
+    Supported formats (by file extension):
+        - NDJSON (.ndjson, .jsonl): one json object per line, anonymized as list of dicts
+        - CSV (.csv): anonymized as DataFrame, all values are read as strings to keep e.g. leading zeros
+
+    Every file is written to "<out_folder>/<name>.part" first and renamed to "<out_folder>/<name>" when it is complete.
+    After every chunk a checkpoint "<out_folder>/<name>.checkpoint" is written, so an interrupted file is resumed
+    from the last complete chunk and files with an up to date output are skipped.
+    With a disk cache, the output of an input file (keyed by its content and the rules) is copied from the cache instead
+    of being anonymized again, e.g. for the same nightly extract under a new name or in another worker.
+
+    Attributes:
+        anonymize (Anonymize): anonymization rules which are applied to every chunk
+        in_folder (str): folder with the input files
+        out_folder (str): folder for the anonymized files
+        chunk_size (int): number of records/rows per chunk
+        disk_cache (DiskCache): cache of the output files, None if disabled
+    """
+
+    NDJSON_EXTENSIONS = [".ndjson", ".jsonl"]
+    CSV_EXTENSIONS = [".csv"]
+
+    def __init__(self, anonymize: Anonymize, in_folder: str = None, out_folder: str = None, chunk_size: int = 10000,
+                 disk_cache: DiskCache = None):
+        """
+        Args:
+            anonymize (Anonymize): anonymization rules which are applied to every chunk
+            in_folder (str, optional): folder with the input files.
+                Defaults to the "in_folder" of the Config.
+            out_folder (str, optional): folder for the anonymized files.
+                Defaults to the "out_folder" of the Config.
+            chunk_size (int, optional): number of records/rows per chunk.
+                Defaults to 10000
+            disk_cache (DiskCache, optional): cache of the output files.
+                Defaults to None
+        """
+        if in_folder is None or out_folder is None:
+            from app.configuration.getConfig import Config
+            configuration = Config()
+            in_folder = configuration.in_folder if in_folder is None else in_folder
+            out_folder = configuration.out_folder if out_folder is None else out_folder
+        self.anonymize = anonymize
+        self.in_folder = in_folder
+        self.out_folder = out_folder
+        self.chunk_size = chunk_size
+        self.disk_cache = disk_cache
+
+    def run(self) -> list:
+        """
+        Processes all supported files of the "in_folder"
+
+        Returns:
+            list[dict]: statistics per file, see process_file
+        """
+        stats = list()
+        for file_name in sorted(os.listdir(self.in_folder)):
+            if os.path.isfile(os.path.join(self.in_folder, file_name)) and self.is_supported(file_name):
+                stats.append(self.process_file(file_name))
+        return stats
+
+    def is_supported(self, file_name: str) -> bool:
+        """
+        Checks the file extension
+        """
+        extension = os.path.splitext(file_name)[1].lower()
+        return extension in self.NDJSON_EXTENSIONS + self.CSV_EXTENSIONS
+
+    def process_file(self, file_name: str) -> dict:
+        """
+        Anonymizes a single file of the "in_folder" chunk by chunk.
+
+        Args:
+            file_name (str): name of the file inside the "in_folder"
+
+        Returns:
+            dict: {"file": file_name, "status": "processed"|"resumed"|"skipped"|"cached"|"unsupported", "records": int}
+
+        Raises:
+            ValueError: if a line of a NDJSON file is not a json object
+        """
+        in_path = os.path.join(self.in_folder, file_name)
+        out_path = os.path.join(self.out_folder, file_name)
+        part_path = out_path + ".part"
+        checkpoint_path = out_path + ".checkpoint"
+
+        if not self.is_supported(file_name):
+            warnings.warn("The file '" + file_name + "' is not supported and will be skipped.")
+            return {"file": file_name, "status": "unsupported", "records": 0}
+
+        os.makedirs(self.out_folder, exist_ok=True)
+        # skip files which were already processed completely
+        if os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(in_path):
+            return {"file": file_name, "status": "skipped", "records": 0}
+
+        cache_key = None
+        if self.disk_cache is not None:
+            extension = os.path.splitext(file_name)[1].lower()
+            cache_key = DiskCache.key(DiskCache.hash_file(in_path), extension, self.anonymize.fingerprint())
+            records = self.disk_cache.get(DiskCache.key(cache_key, "records"))
+            if records is not None and self.disk_cache.get_file(cache_key, out_path):
+                for path in (part_path, checkpoint_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                return {"file": file_name, "status": "cached", "records": int(records)}
+
+        checkpoint = self.__read_checkpoint(checkpoint_path, in_path)
+        status = "resumed" if checkpoint["records"] > 0 else "processed"
+
+        with open(part_path, "ab") as out_file:
+            # throw away everything after the last complete chunk
+            out_file.truncate(checkpoint["out_offset"])
+            out_file.seek(checkpoint["out_offset"])
+            extension = os.path.splitext(file_name)[1].lower()
+            if extension in self.NDJSON_EXTENSIONS:
+                records = self.__process_ndjson(in_path, out_file, checkpoint, checkpoint_path)
+            else:
+                records = self.__process_csv(in_path, out_file, checkpoint, checkpoint_path)
+
+        os.replace(part_path, out_path)
+        # an empty file has no chunk and therefore no checkpoint
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        if cache_key is not None:
+            self.disk_cache.put_file(cache_key, out_path)
+            self.disk_cache.put(DiskCache.key(cache_key, "records"), str(records).encode())
+        return {"file": file_name, "status": status, "records": records}
+
+    def __process_ndjson(self, in_path: str, out_file, checkpoint: dict, checkpoint_path: str) -> int:
+        """
+        Reads the NDJSON file line by line, starting at the offset of the checkpoint.
+
+        Returns:
+            int: number of records in the file
+        """
+        with open(in_path, "rb") as in_file:
+            in_file.seek(checkpoint["in_offset"])
+            chunk = list()
+            for line in iter(in_file.readline, b""):
+                if line.strip():
+                    chunk.append(self.__parse_ndjson_line(line, in_path, in_file.tell() - len(line)))
+                if len(chunk) >= self.chunk_size:
+                    self.__write_ndjson_chunk(chunk, in_file.tell(), out_file, checkpoint, checkpoint_path)
+                    chunk = list()
+            if chunk:
+                self.__write_ndjson_chunk(chunk, in_file.tell(), out_file, checkpoint, checkpoint_path)
+        return checkpoint["records"]
+
+    @staticmethod
+    def __parse_ndjson_line(line: bytes, in_path: str, offset: int) -> dict:
+        """
+        Parses a line of a NDJSON file, only json objects can be anonymized
+
+        Raises:
+            ValueError: with the file and the line number if the line is not a json object
+        """
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if not isinstance(record, dict):
+            # only counted for the error, a resumed file does not know the line number of its offset
+            with open(in_path, "rb") as in_file:
+                line_number = in_file.read(offset).count(b"\n") + 1
+            raise ValueError("The line " + str(line_number) + " of the file '" + in_path + "' is not a json object.")
+        return record
+
+    def __write_ndjson_chunk(self, chunk: list, in_offset: int, out_file, checkpoint: dict, checkpoint_path: str):
+        """
+        Anonymizes a chunk of records and appends it to the output file
+        """
+        anon = self.anonymize.perform_anonymization(chunk)
+        out_file.write("".join(json.dumps(record, ensure_ascii=False, default=str) + "\n"
+                               for record in anon).encode("utf8"))
+        self.__write_checkpoint(checkpoint, checkpoint_path, out_file, in_offset, len(chunk))
+
+    def __process_csv(self, in_path: str, out_file, checkpoint: dict, checkpoint_path: str) -> int:
+        """
+        Reads the CSV file in chunks of "chunk_size" rows, the rows of the checkpoint are parsed again and discarded.
+        A row can span several lines (quoted newlines), so they can not be skipped by line numbers.
+
+        Returns:
+            int: number of rows in the file
+        """
+        skip = checkpoint["records"]
+        try:
+            reader = pd.read_csv(in_path, chunksize=self.chunk_size, dtype=str, keep_default_na=False)
+        except pd.errors.EmptyDataError:
+            # not even a header
+            return 0
+        with reader:
+            # a file with only a header has one empty chunk, it is written to keep the header
+            for chunk in reader:
+                if skip > 0 and skip >= len(chunk):
+                    skip -= len(chunk)
+                    continue
+                chunk, skip = chunk.iloc[skip:], 0
+                anon = self.anonymize.perform_anonymization(chunk)
+                out_file.write(anon.to_csv(index=False, header=checkpoint["records"] == 0).encode("utf8"))
+                self.__write_checkpoint(checkpoint, checkpoint_path, out_file, 0, len(chunk))
+        return checkpoint["records"]
+
+    @staticmethod
+    def __read_checkpoint(checkpoint_path: str, in_path: str) -> dict:
+        """
+        Returns the checkpoint of the file, or an empty one if there is none or the input file has changed since.
+        """
+        stat = os.stat(in_path)
+        empty = {"in_offset": 0, "out_offset": 0, "records": 0, "in_size": stat.st_size, "in_mtime": stat.st_mtime}
+        try:
+            with open(checkpoint_path, "r") as file:
+                checkpoint = json.load(file)
+        except (OSError, ValueError):
+            return empty
+        if checkpoint.get("in_size") != stat.st_size or checkpoint.get("in_mtime") != stat.st_mtime:
+            return empty
+        return checkpoint
+
+    @staticmethod
+    def __write_checkpoint(checkpoint: dict, checkpoint_path: str, out_file, in_offset: int, records: int):
+        """
+        Flushes the output file and atomically replaces the checkpoint with the new offsets.
+        """
+        out_file.flush()
+        os.fsync(out_file.fileno())
+        checkpoint["in_offset"] = in_offset
+        checkpoint["out_offset"] = out_file.tell()
+        checkpoint["records"] += records
+        tmp_path = checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(checkpoint, file)
+        os.replace(tmp_path, checkpoint_path)
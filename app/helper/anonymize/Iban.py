@@ -0,0 +1,174 @@
+import re
+import string
+
+"""
+IBAN engine for the ch_iban-callback without per-value schwifty objects.
+
+The BBAN layout of every SEPA country is precomputed in IBAN_LAYOUTS (source: SWIFT IBAN registry as shipped with
+schwifty). An IBAN is validated by its length, the format of its BBAN and the integer mod-97 checksum (ISO 13616),
+the account part of the BBAN is masked and a valid check digit is recomputed for the anonymized IBAN.
+National check digits inside the BBAN (e.g. BE, FR, ES) are kept as they are.
+"""
+
+# country: (BBAN format, start of the account part in the BBAN, end of the account part in the BBAN)
+# the account part contains everything which identifies the owner
+IBAN_LAYOUTS = {
+    "AD": ("4!n4!n12!c", 8, 20),
+    "AT": ("5!n11!n", 5, 16),
+    "AX": ("3!n11!n", 3, 13),
+    "BE": ("3!n7!n2!n", 3, 10),
+    "BG": ("4!a4!n2!n8!c", 10, 18),
+    "BL": ("5!n5!n11!c2!n", 10, 21),
+    "CH": ("5!n12!c", 5, 17),
+    "CY": ("3!n5!n16!c", 8, 24),
+    # account prefix and account number
+    "CZ": ("4!n6!n10!n", 4, 20),
+    "DE": ("8!n10!n", 8, 18),
+    "DK": ("4!n9!n1!n", 4, 14),
+    "EE": ("2!n2!n11!n1!n", 4, 15),
+    "ES": ("4!n4!n1!n1!n10!n", 10, 20),
+    "FI": ("3!n11!n", 3, 13),
+    "FR": ("5!n5!n11!c2!n", 10, 21),
+    "GB": ("4!a6!n8!n", 10, 18),
+    "GF": ("5!n5!n11!c2!n", 10, 21),
+    "GG": ("4!a6!n8!n", 10, 18),
+    "GI": ("4!a15!c", 4, 19),
+    "GP": ("5!n5!n11!c2!n", 10, 21),
+    "GR": ("3!n4!n16!c", 7, 23),
+    "HR": ("7!n10!n", 7, 17),
+    # the national check digits before and after the account are kept
+    "HU": ("3!n4!n1!n15!n1!n", 8, 23),
+    "IE": ("4!a6!n8!n", 10, 18),
+    "IM": ("4!a6!n8!n", 10, 18),
+    # account number and kennitala (national id of the owner)
+    "IS": ("4!n2!n6!n10!n", 6, 22),
+    "IT": ("1!a5!n5!n12!c", 11, 23),
+    "JE": ("4!a6!n8!n", 10, 18),
+    "LI": ("5!n12!c", 5, 17),
+    "LT": ("5!n11!n", 5, 16),
+    "LU": ("3!n13!c", 3, 16),
+    "LV": ("4!a13!c", 4, 17),
+    "MC": ("5!n5!n11!c2!n", 10, 21),
+    "MF": ("5!n5!n11!c2!n", 10, 21),
+    "MQ": ("5!n5!n11!c2!n", 10, 21),
+    "MT": ("4!a5!n18!c", 9, 27),
+    "NC": ("5!n5!n11!c2!n", 10, 21),
+    "NL": ("4!a10!n", 4, 14),
+    "NO": ("4!n6!n1!n", 4, 10),
+    "PF": ("5!n5!n11!c2!n", 10, 21),
+    "PL": ("8!n16!n", 8, 24),
+    "PM": ("5!n5!n11!c2!n", 10, 21),
+    "PT": ("4!n4!n11!n2!n", 8, 19),
+    "RE": ("5!n5!n11!c2!n", 10, 21),
+    "RO": ("4!a16!c", 4, 20),
+    "SE": ("3!n16!n1!n", 3, 19),
+    "SI": ("5!n8!n2!n", 5, 13),
+    # account prefix and account number
+    "SK": ("4!n6!n10!n", 4, 20),
+    "SM": ("1!a5!n5!n12!c", 11, 23),
+    "TF": ("5!n5!n11!c2!n", 10, 21),
+    "VA": ("3!n15!n", 3, 18),
+    "WF": ("5!n5!n11!c2!n", 10, 21),
+    "YT": ("5!n5!n11!c2!n", 10, 21),
+}
+
+# letters are converted to the numbers 10 - 35 for the checksum
+_LETTER_DIGITS = str.maketrans({letter: str(index + 10) for index, letter in enumerate(string.ascii_uppercase)})
+_FORMAT_CHARACTERS = {"n": "[0-9]", "a": "[A-Z]", "c": "[A-Z0-9]"}
+_bban_regex = dict()
+
+
+def normalize_iban(iban: str) -> str:
+    """
+    Removes spaces and converts the IBAN to upper case
+    :param iban: iban code
+    :return: (str)
+    """
+    return iban.replace(" ", "").upper()
+
+
+def iban_checksum(country_code: str, bban: str) -> str:
+    """
+    Computes the two check digits of an IBAN with the integer mod-97 algorithm
+    :param country_code: two letter country code
+    :param bban: basic bank account number
+    :return: (str) check digits
+    """
+    numeric = (bban + country_code + "00").translate(_LETTER_DIGITS)
+    return "%02d" % (98 - int(numeric) % 97)
+
+
+def is_valid_iban(iban: str) -> bool:
+    """
+    Checks the length, the BBAN format and the checksum of a normalized IBAN of a country in IBAN_LAYOUTS.
+    :param iban: normalized iban code
+    :return: (bool)
+    """
+    layout = IBAN_LAYOUTS.get(iban[:2])
+    if layout is None or not get_bban_regex(layout[0]).fullmatch(iban[4:]):
+        return False
+    return iban_checksum(iban[:2], iban[4:]) == iban[2:4]
+
+
+def anonymize_iban(iban: str, overwrite_account: str = "0123456789") -> str:
+    """
+    Masks the account part of the IBAN and recomputes the check digits.
+    The overwrite value is padded with leading zeros or cut from the left to the length of the account part.
+    :param iban: iban code, spaces and lower case letters are allowed
+    :param overwrite_account: value to overwrite the account
+    :return: (str) anonymized iban, None if the country is not in IBAN_LAYOUTS
+    :raises ValueError: if the iban is not valid
+    """
+    iban = normalize_iban(iban)
+    country_code = iban[:2]
+    layout = IBAN_LAYOUTS.get(country_code)
+    if layout is None:
+        return None
+    if not is_valid_iban(iban):
+        raise ValueError("The iban '" + iban + "' is not valid.")
+
+    bban_format, start, end = layout
+    bban = iban[4:]
+    bban = bban[:start] + overwrite_account.rjust(end - start, "0")[-(end - start):] + bban[end:]
+    return country_code + iban_checksum(country_code, bban) + bban
+
+
+def anonymize_iban_batch(ibans: list, overwrite_account: str = "0123456789") -> list:
+    """
+    Anonymizes a list of IBANs, every distinct IBAN is processed only once.
+    :param ibans: iban codes
+    :param overwrite_account: value to overwrite the account
+    :return: (list) anonymized ibans. None for countries which are not in IBAN_LAYOUTS,
+        the ValueError for invalid ibans or values which are not strings.
+    """
+    processed = dict()
+    ret = list()
+    for iban in ibans:
+        try:
+            anon = processed[iban]
+        except (KeyError, TypeError):
+            try:
+                anon = anonymize_iban(iban, overwrite_account)
+            except (ValueError, AttributeError, TypeError) as e:
+                anon = ValueError(str(e))
+            try:
+                processed[iban] = anon
+            except TypeError:
+                pass
+        ret.append(anon)
+    return ret
+
+
+def get_bban_regex(bban_format: str) -> re.Pattern:
+    """
+    Compiles a BBAN format of the IBAN registry like "8!n10!n" to a regex, every format is compiled only once.
+    :param bban_format: BBAN format
+    :return: (re.Pattern)
+    """
+    try:
+        return _bban_regex[bban_format]
+    except KeyError:
+        pattern = "".join(_FORMAT_CHARACTERS[kind] + "{" + length + "}"
+                          for length, kind in re.findall(r"(\d+)!([nac])", bban_format))
+        regex = _bban_regex[bban_format] = re.compile(pattern)
+        return regex
@@ -0,0 +1,211 @@
+import hashlib
+import ipaddress
+import re
+import numpy as np
+import pandas as pd
+
+"""
+IP anonymization engine for whole arrays of ip-addresses (e.g. access logs).
+
+The addresses are parsed into packed integers once: IPv4 as 32 bit integer, IPv6 as two 64 bit integers (hi, lo).
+All anonymization steps work on those integers with bit masks via NumPy and the strings are created only at the end.
+    - truncation: keep the first "prefix" bits (the network) and set the host bits to zero
+    - randomization: replace the host bits with random bits; with a key the bits are derived from the address by a
+      keyed mixing function, so the same address always gets the same pseudonym (keyed pseudonymization).
+      The mixing function is fast (splitmix64), but not a cryptographic hash.
+
+IPv4 addresses are parsed with .str-operations, IPv6 addresses with the ipaddress module.
+Values which are not valid ip-addresses are returned unchanged.
+"""
+
+IPV4_PREFIX = 24
+IPV6_PREFIX = 48
+
+# dotted quad with octets between 0-255 and without leading zeros, as accepted by ipaddress.ip_address
+IPV4_PATTERN = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)(?:\.(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)){3}"
+IPV4_RE = re.compile(IPV4_PATTERN)
+
+_ALL_BITS = (1 << 64) - 1
+
+
+class PackedIps:
+    """
+    Array of ip-addresses as packed integers
+
+    Attributes:
+        version (np.ndarray[uint8]): 4, 6 or 0 for values which are not valid ip-addresses
+        hi (np.ndarray[uint64]): upper 64 bits of IPv6 addresses, 0 for IPv4
+        lo (np.ndarray[uint64]): lower 64 bits of IPv6 addresses, the address for IPv4
+        values (pd.Series): the original values
+    """
+
+    def __init__(self, ips: object):
+        """
+        :param ips: (list, pd.Series) ip-addresses as strings
+        """
+        values = ips if isinstance(ips, pd.Series) else pd.Series(list(ips), dtype=object)
+        self.values = values
+        size = len(values)
+        self.version = np.zeros(size, dtype=np.uint8)
+        self.hi = np.zeros(size, dtype=np.uint64)
+        self.lo = np.zeros(size, dtype=np.uint64)
+        if size == 0:
+            return
+
+        is_str = values.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+        strings = values.where(is_str, "").astype(object)
+
+        # IPv4: vectorized via .str-operations
+        v4 = strings.str.fullmatch(IPV4_PATTERN).fillna(False).to_numpy(dtype=bool)
+        if v4.any():
+            octets = strings[v4].str.split(".", expand=True).astype(np.uint64).to_numpy()
+            self.lo[v4] = (octets[:, 0] << np.uint64(24)) | (octets[:, 1] << np.uint64(16)) | \
+                          (octets[:, 2] << np.uint64(8)) | octets[:, 3]
+            self.version[v4] = 4
+
+        # IPv6: one by one, only values which contain a colon
+        v6_candidates = np.flatnonzero(~v4 & strings.str.contains(":", regex=False).fillna(False).to_numpy(dtype=bool))
+        for index in v6_candidates:
+            try:
+                address = int(ipaddress.IPv6Address(strings.iat[index]))
+            except ValueError:
+                continue
+            self.hi[index] = address >> 64
+            self.lo[index] = address & _ALL_BITS
+            self.version[index] = 6
+
+    def truncate(self, prefix_v4: int = IPV4_PREFIX, prefix_v6: int = IPV6_PREFIX) -> "PackedIps":
+        """
+        Keeps the first "prefix" bits of every address and sets the host bits to zero (in place).
+        :param prefix_v4: (int) prefix length for IPv4 (0 - 32)
+        :param prefix_v6: (int) prefix length for IPv6 (0 - 128)
+        :return: self
+        """
+        v4, v6 = self.version == 4, self.version == 6
+        self.lo[v4] &= np.uint64(_ipv4_mask(prefix_v4))
+        hi_mask, lo_mask = _ipv6_masks(prefix_v6)
+        self.hi[v6] &= np.uint64(hi_mask)
+        self.lo[v6] &= np.uint64(lo_mask)
+        return self
+
+    def randomize(self, prefix_v4: int = IPV4_PREFIX, prefix_v6: int = IPV6_PREFIX, key: object = None,
+                  seed: int = None) -> "PackedIps":
+        """
+        Keeps the first "prefix" bits of every address and replaces the host bits with random bits (in place).
+        :param prefix_v4: (int) prefix length for IPv4 (0 - 32)
+        :param prefix_v6: (int) prefix length for IPv6 (0 - 128)
+        :param key: (str, bytes, optional) if provided, the host bits are derived from the address and the key, so
+            the same address always gets the same pseudonym. Otherwise they are random.
+        :param seed: (int, optional) seed of the random generator if no key is provided
+        :return: self
+        """
+        if key is None:
+            rng = np.random.default_rng(seed)
+            random_hi = rng.integers(0, _ALL_BITS, size=len(self.lo), dtype=np.uint64, endpoint=True)
+            random_lo = rng.integers(0, _ALL_BITS, size=len(self.lo), dtype=np.uint64, endpoint=True)
+        else:
+            seeds = _key_seeds(key)
+            random_lo = _mix(self.lo ^ _mix(self.hi, seeds[0]), seeds[1])
+            random_hi = _mix(self.hi ^ _mix(self.lo, seeds[2]), seeds[3])
+
+        v4, v6 = self.version == 4, self.version == 6
+        mask = np.uint64(_ipv4_mask(prefix_v4))
+        self.lo[v4] = (self.lo[v4] & mask) | (random_lo[v4] & ~mask & np.uint64(0xFFFFFFFF))
+        hi_mask, lo_mask = _ipv6_masks(prefix_v6)
+        hi_mask, lo_mask = np.uint64(hi_mask), np.uint64(lo_mask)
+        self.hi[v6] = (self.hi[v6] & hi_mask) | (random_hi[v6] & ~hi_mask)
+        self.lo[v6] = (self.lo[v6] & lo_mask) | (random_lo[v6] & ~lo_mask)
+        return self
+
+    def replace_ipv4_octets(self, octets: list, value: int = None, seed: int = None) -> "PackedIps":
+        """
+        Replaces the given octets (0 - 3) of the IPv4 addresses with "value" or random numbers (in place).
+        :param octets: (list) octets to replace
+        :param value: (int, optional) replacement between 0 and 255. Random numbers if None.
+        :param seed: (int, optional) seed of the random generator
+        :return: self
+        """
+        mask = 0
+        for octet in octets:
+            mask |= 0xFF << (8 * (3 - octet))
+        if value is None:
+            replacement = np.random.default_rng(seed).integers(0, 0xFFFFFFFF, size=len(self.lo), dtype=np.uint64,
+                                                              endpoint=True)
+        else:
+            replacement = np.full(len(self.lo), value * 0x01010101, dtype=np.uint64)
+        v4 = self.version == 4
+        mask = np.uint64(mask)
+        self.lo[v4] = (self.lo[v4] & ~mask) | (replacement[v4] & mask)
+        return self
+
+    def to_strings(self) -> pd.Series:
+        """
+        Converts the packed integers back to strings, values which are not valid ip-addresses are kept unchanged.
+        :return: (pd.Series) with the index of the original values
+        """
+        ret = self.values.to_numpy(dtype=object, copy=True)
+        v4 = self.version == 4
+        if v4.any():
+            lo = self.lo[v4]
+            parts = [pd.Series((lo >> np.uint64(shift)) & np.uint64(0xFF)).astype(str) for shift in (24, 16, 8, 0)]
+            ret[v4] = (parts[0] + "." + parts[1] + "." + parts[2] + "." + parts[3]).to_numpy()
+        for index in np.flatnonzero(self.version == 6):
+            ret[index] = ipaddress.IPv6Address((int(self.hi[index]) << 64) | int(self.lo[index])).compressed
+        return pd.Series(ret, index=self.values.index, name=self.values.name, dtype=object)
+
+
+def anonymize_ips(ips: object, prefix_v4: int = IPV4_PREFIX, prefix_v6: int = IPV6_PREFIX, randomize: bool = False,
+                  key: object = None) -> object:
+    """
+    Anonymizes an array of IPv4 and IPv6 addresses by truncation or randomization of the host bits.
+    :param ips: (list, pd.Series) ip-addresses
+    :param prefix_v4: (int, optional) number of bits to keep for IPv4. Defaults to 24.
+    :param prefix_v6: (int, optional) number of bits to keep for IPv6. Defaults to 48.
+    :param randomize: (bool, optional) If true, the host bits are randomized, otherwise set to zero.
+    :param key: (str, bytes, optional) key for stable pseudonyms if "randomize" is True, see PackedIps.randomize
+    :return: [list, pd.Series] in the provided structure
+    """
+    packed = PackedIps(ips)
+    if randomize:
+        packed.randomize(prefix_v4, prefix_v6, key)
+    else:
+        packed.truncate(prefix_v4, prefix_v6)
+    ret = packed.to_strings()
+    return ret if isinstance(ips, pd.Series) else ret.tolist()
+
+
+def _ipv4_mask(prefix: int) -> int:
+    """
+    Network mask of an IPv4 prefix as integer
+    """
+    prefix = min(max(prefix, 0), 32)
+    return (0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF
+
+
+def _ipv6_masks(prefix: int) -> tuple:
+    """
+    Network mask of an IPv6 prefix as (hi, lo) integers
+    """
+    prefix = min(max(prefix, 0), 128)
+    mask = ((1 << 128) - 1) ^ ((1 << (128 - prefix)) - 1)
+    return mask >> 64, mask & _ALL_BITS
+
+
+def _key_seeds(key: object) -> list:
+    """
+    Derives four 64 bit seeds from the key
+    """
+    key = key.encode("utf8") if isinstance(key, str) else bytes(key)
+    digest = hashlib.blake2b(key, digest_size=32).digest()
+    return [np.uint64(int.from_bytes(digest[i:i + 8], "little")) for i in range(0, 32, 8)]
+
+
+def _mix(values: np.ndarray, seed: np.uint64) -> np.ndarray:
+    """
+    splitmix64 finalizer over a whole array, the multiplications wrap around at 64 bits
+    """
+    with np.errstate(over="ignore"):
+        z = values + seed
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
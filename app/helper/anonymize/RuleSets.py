@@ -0,0 +1,37 @@
+from app.helper.anonymize.Anonymize import Anonymize
+from app.helper.anonymize.CallbackHelper import ch_postal_code, ch_ipv4, ch_iban, ch_email
+
+"""
+Named, pre-built anonymization rule sets, e.g. for the anonymize router.
+The rule sets are compiled (see AnonymizationPlan), every record is visited only once.
+"""
+
+SECRETS = ["pwd", "password", "secret"]
+
+RULE_SETS = {
+    # remove secrets like passwords
+    "secrets": Anonymize(
+        strip=SECRETS,
+        compiled=True
+    ),
+    # remove secrets and anonymize typical personal data
+    "personal_data": Anonymize(
+        strip=SECRETS + ["name", "first_name", "last_name", "phone"],
+        change=[
+            [["plz", "postalcode", "postal_code", "zip"], ch_postal_code, [5, True, 2], str],
+            [["ip", "ip_address", "ipv4"], ch_ipv4, [True, [3], False]],
+            [["email", "mail", "e_mail"], ch_email],
+            [["iban"], ch_iban],
+        ],
+        compiled=True
+    ),
+}
+
+
+def get_rule_set(name: str) -> Anonymize:
+    """
+    Returns the pre-built rule set with the given name or None if it does not exist
+    :param name: name of the rule set
+    :return: Anonymize
+    """
+    return RULE_SETS.get(name)
@@ -0,0 +1 @@
+name = "cache"
\ No newline at end of file
@@ -0,0 +1,242 @@
+import hashlib
+import os
+import shutil
+import threading
+from uuid import uuid4
+
+"""
+Content-addressed result cache on disk, e.g. in the "cache_folder" of the Config.
+
+The key of an entry is a hash of everything the result depends on (input bytes, anonymization rules, library
+versions), see DiskCache.key. Entries are written to a temporary file and renamed, so readers never see a partial
+entry and several workers (or pods sharing the volume) can use the same folder. Reading an entry updates its mtime,
+the entries with the oldest mtime are evicted first when the folder exceeds "max_bytes" (LRU across all processes).
+"""
+
+# part of every key, change it if the format of the entries changes
+FORMAT_VERSION = "1"
+# suffix of the temporary files of put/put_file
+_TMP_SUFFIX = ".tmp"
+
+
+class DiskCache:
+    """
+    Attributes:
+        folder (str): folder of the entries
+        max_bytes (int): byte budget of the folder
+        hits (int): entries read from the cache
+        misses (int): keys which were not in the cache
+        writes (int): entries written to the cache
+        evictions (int): entries removed because of the byte budget
+    """
+
+    def __init__(self, folder: str = None, max_bytes: int = 1024 ** 3):
+        """
+        Args:
+            folder (str, optional): folder of the entries.
+                Defaults to the "cache_folder" of the Config.
+            max_bytes (int, optional): byte budget of the folder.
+                Defaults to 1 GiB
+        """
+        if folder is None:
+            from app.configuration.getConfig import Config
+            folder = Config().cache_folder
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        # size of the folder, estimated by this process; None if it has to be scanned
+        self.__bytes = None
+        self.__lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    def __getstate__(self) -> dict:
+        """
+        Only the configuration is sent to other processes, every process has its own counters.
+        """
+        return {"folder": self.folder, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: dict):
+        self.__init__(**state)
+
+    @staticmethod
+    def key(*parts) -> str:
+        """
+        Hash of the given parts (bytes or str) and the FORMAT_VERSION
+
+        Returns:
+            str: hex digest
+        """
+        digest = hashlib.blake2b(FORMAT_VERSION.encode(), digest_size=20)
+        for part in parts:
+            part = part.encode("utf8") if isinstance(part, str) else bytes(part)
+            # the length separates the parts, ("ab", "c") and ("a", "bc") get different keys
+            digest.update(len(part).to_bytes(8, "little"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_file(path: str, block_size: int = 1024 * 1024) -> bytes:
+        """
+        Hash of the content of a file, read in blocks
+
+        Returns:
+            bytes: digest, e.g. a part of DiskCache.key
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(block_size), b""):
+                digest.update(block)
+        return digest.digest()
+
+    def path(self, key: str) -> str:
+        """
+        Path of the entry, the entries are spread over 256 sub folders
+        """
+        return os.path.join(self.folder, key[:2], key)
+
+    def get(self, key: str) -> bytes:
+        """
+        Args:
+            key (str): see DiskCache.key
+
+        Returns:
+            bytes: the entry or None
+        """
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                value = file.read()
+        except FileNotFoundError:
+            self.__count("misses")
+            return None
+        self.__touch(path)
+        self.__count("hits")
+        return value
+
+    def put(self, key: str, value: bytes):
+        """
+        Writes the entry atomically and evicts the least recently used entries if the byte budget is exceeded
+        """
+        def write(tmp_path: str):
+            with open(tmp_path, "wb") as file:
+                file.write(value)
+        self.__put(key, write)
+
+    def get_file(self, key: str, target_path: str) -> bool:
+        """
+        Copies the entry to "target_path", the target is replaced atomically
+
+        Returns:
+            bool: True if the entry exists
+        """
+        path = self.path(key)
+        tmp_path = target_path + "." + uuid4().hex + _TMP_SUFFIX
+        try:
+            shutil.copyfile(path, tmp_path)
+        except FileNotFoundError:
+            self.__count("misses")
+            return False
+        os.replace(tmp_path, target_path)
+        self.__touch(path)
+        self.__count("hits")
+        return True
+
+    def put_file(self, key: str, source_path: str):
+        """
+        Copies the file "source_path" into the cache, see put
+        """
+        self.__put(key, lambda tmp_path: shutil.copyfile(source_path, tmp_path))
+
+    def stats(self) -> dict:
+        """
+        Returns the counters of the cache
+
+        Returns:
+            dict
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "bytes": self.__bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def evict(self) -> int:
+        """
+        Scans the folder and removes the least recently used entries until the folder fits into the byte budget.
+        Temporary files of other processes are kept.
+
+        Returns:
+            int: size of the folder in bytes
+        """
+        entries = list()
+        for sub_folder in os.scandir(self.folder):
+            if not sub_folder.is_dir():
+                continue
+            for entry in os.scandir(sub_folder.path):
+                if entry.name.endswith(_TMP_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        size = sum(entry[1] for entry in entries)
+        evictions = 0
+        if size > self.max_bytes:
+            for _, entry_size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                size -= entry_size
+                evictions += 1
+                if size <= self.max_bytes:
+                    break
+        with self.__lock:
+            self.__bytes = size
+            self.evictions += evictions
+        return size
+
+    def __put(self, key: str, write):
+        """
+        Writes the entry with write(tmp_path) into a temporary file and renames it
+        """
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + "." + uuid4().hex + _TMP_SUFFIX
+        try:
+            write(tmp_path)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self.__lock:
+            self.writes += 1
+            if self.__bytes is not None:
+                self.__bytes += size
+            scan = self.__bytes is None or self.__bytes > self.max_bytes
+        # other processes write into the same folder, the estimate is corrected by the scan
+        if scan:
+            self.evict()
+
+    def __touch(self, path: str):
+        """
+        Marks the entry as recently used
+        """
+        try:
+            os.utime(path)
+        except OSError:
+            # evicted in the meantime or a read only volume
+            pass
+
+    def __count(self, counter: str):
+        with self.__lock:
+            setattr(self, counter, getattr(self, counter) + 1)
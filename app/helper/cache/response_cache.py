@@ -0,0 +1,186 @@
+import hashlib
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+"""
+Response cache for GET routes: the encoded body is stored with a strong ETag, so repeated requests cost a dictionary
+lookup and a request with a matching If-None-Match header is answered with 304 Not Modified.
+
+Use it between the route decorator and the function:
+    @router.get("/config/")
+    @cached_response(ttl=60)
+    def get_config():
+        ...
+The cache is bound by "ttl" and "max_entries" (LRU) and invalidated when the revision of the Config changes.
+The return value is encoded like a JSONResponse; a "response_model" of the route is not applied to cached responses.
+"""
+
+
+def _config_revision() -> int:
+    """
+    Revision of the configuration, it changes whenever the configuration changes
+    """
+    from app.configuration.getConfig import Config
+    return Config().revision
+
+
+class ResponseCache:
+    """
+    TTL and LRU bound store of encoded responses
+
+    Attributes:
+        ttl (float or callable): time to live of an entry in seconds or a function which returns it
+        max_entries (int): maximum number of entries, the least recently used entry is evicted first
+        revision (callable): returns the current revision, entries of an older revision are invalid
+        hits (int): responses served from the cache (including 304)
+        misses (int): responses which had to be created
+        not_modified (int): 304 responses
+    """
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 128, revision=_config_revision):
+        """
+        Args:
+            ttl (float or callable, optional): time to live of an entry in seconds or a function which returns it,
+                e.g. the "response_cache_ttl" of the Config which can change at runtime.
+                Defaults to 60
+            max_entries (int, optional): maximum number of entries.
+                Defaults to 128
+            revision (callable, optional): returns the current revision.
+                Defaults to the revision of the Config
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.revision = revision
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key: tuple) -> tuple:
+        """
+        Returns the valid entry of the key: (body, etag, media_type, status_code, headers) or None
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic() or entry[1] != self.revision():
+                del self.__entries[key]
+                return None
+            self.__entries.move_to_end(key)
+            return entry[2]
+
+    def put(self, key: tuple, response: Response) -> tuple:
+        """
+        Stores the encoded response and returns the entry
+        """
+        etag = '"' + hashlib.blake2b(response.body, digest_size=16).hexdigest() + '"'
+        headers = {name: value for name, value in response.headers.items()
+                   if name not in ("content-length", "content-type", "etag")}
+        entry = (response.body, etag, response.media_type, response.status_code, headers)
+        with self.__lock:
+            ttl = self.ttl() if callable(self.ttl) else self.ttl
+            self.__entries[key] = (time.monotonic() + ttl, self.revision(), entry)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.__entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+def cached_response(ttl: float = 60.0, max_entries: int = 128, vary_query: bool = True, revision=_config_revision):
+    """
+    Decorator for GET route functions which caches the encoded response, see ResponseCache.
+
+    Args:
+        ttl (float or callable, optional): time to live of a response in seconds or a function which returns it.
+            Defaults to 60
+        max_entries (int, optional): maximum number of cached responses (e.g. per query string).
+            Defaults to 128
+        vary_query (bool, optional): If true, the query string is part of the cache key.
+            Defaults to True
+        revision (callable, optional): returns the current revision, a new revision invalidates the cache.
+            Defaults to the revision of the Config
+
+    Returns:
+        decorator
+    """
+    def decorator(func):
+        cache = ResponseCache(ttl, max_entries, revision)
+        signature = inspect.signature(func)
+        request_param = next((name for name, param in signature.parameters.items()
+                              if param.annotation is Request), None)
+        is_coroutine = inspect.iscoroutinefunction(func)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs[request_param] if request_param else kwargs.pop("_cache_request")
+            key = (request.url.path, request.url.query if vary_query else "")
+            entry = cache.get(key)
+            if entry is None:
+                cache.misses += 1
+                result = await func(*args, **kwargs) if is_coroutine else await run_in_threadpool(func, *args, **kwargs)
+                if isinstance(result, StreamingResponse):
+                    return result
+                if not isinstance(result, Response):
+                    result = JSONResponse(jsonable_encoder(result))
+                if result.status_code != 200:
+                    return result
+                entry = cache.put(key, result)
+            else:
+                cache.hits += 1
+
+            body, etag, media_type, status_code, headers = entry
+            headers = dict(headers, etag=etag)
+            if _etag_matches(request.headers.get("if-none-match"), etag):
+                cache.not_modified += 1
+                return Response(status_code=304, headers=headers)
+            return Response(body, status_code, headers, media_type)
+
+        if request_param is None:
+            # let FastAPI inject the request
+            parameters = list(signature.parameters.values()) + [
+                inspect.Parameter("_cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+            ]
+            wrapper.__signature__ = signature.replace(parameters=parameters)
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison of the If-None-Match header with the ETag (RFC 7232)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -0,0 +1 @@
+name = "health"
\ No newline at end of file
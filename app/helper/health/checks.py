@@ -0,0 +1,110 @@
+import asyncio
+import os
+import shutil
+from app.helper.health.health import UP, DOWN
+from app.helper.log.logger import Logger
+
+"""
+Health checks of the template, see HealthRegistry.register
+"""
+
+
+def disk_space_check(folders: list, min_free_bytes: int = 104857600):
+    """
+    Are the folders writable and is there enough free disk space?
+    :param folders: (list) folders to check, e.g. the tmp folders of the Config
+    :param min_free_bytes: (int) minimum free space per folder
+    :return: check function
+    """
+    def check() -> dict:
+        details = dict()
+        status = UP
+        for folder in folders:
+            if not os.path.isdir(folder):
+                details[folder] = {"status": DOWN, "error": "folder does not exist"}
+                status = DOWN
+                continue
+            free = shutil.disk_usage(folder).free
+            writable = os.access(folder, os.W_OK)
+            folder_status = UP if writable and free >= min_free_bytes else DOWN
+            details[folder] = {"status": folder_status, "free_bytes": free, "writable": writable}
+            if folder_status == DOWN:
+                status = DOWN
+        return {"status": status, "description": "free space in the tmp folders", "folders": details}
+    return check
+
+
+def logger_check(logger: Logger):
+    """
+    Is the sink of the logger working? Pings the MongoDB for the MongoDB sink.
+    :param logger: (Logger) logger of the application
+    :return: check function
+    """
+    def check() -> dict:
+        result = {"status": UP, "description": "log sink " + logger.sink.name}
+        result.update(logger.stats())
+        if logger.sink == Logger.SINK.MONGODB:
+            logger.mongo_client.admin.command("ping")
+        return result
+    return check
+
+
+class _LoopHeartbeat:
+    """
+    Callback which the event loop runs every "interval" seconds, the delay of every run is the lag of the loop
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval: float):
+        self.loop = loop
+        self.interval = interval
+        self.max_lag = 0.0
+        self.__expected = None
+        self.__schedule()
+
+    def take_max_lag(self) -> float:
+        """
+        Returns the maximum lag since the last call, incl. the delay of a beat which is overdue right now
+        """
+        now = self.loop.time()
+        lag = max(self.max_lag, now - self.__expected)
+        self.max_lag = 0.0
+        # the overdue beat only counts its further delay for the next check
+        self.__expected = max(self.__expected, now)
+        return lag
+
+    def stop(self):
+        self.__handle.cancel()
+
+    def __schedule(self):
+        self.__expected = self.loop.time() + self.interval
+        self.__handle = self.loop.call_later(self.interval, self.__beat)
+
+    def __beat(self):
+        self.max_lag = max(self.max_lag, self.loop.time() - self.__expected)
+        self.__schedule()
+
+
+def event_loop_check(max_lag_seconds: float = 1.0, interval: float = 0.1):
+    """
+    Is the event loop of the worker responsive? A heartbeat is scheduled every "interval" seconds with call_later on
+    the loop of the first check, the check reports the maximum delay of the heartbeat since the previous check. A
+    blocking call (e.g. CPU bound work in an async route) delays the heartbeat, even if the check itself only runs
+    after the loop is free again.
+    :param max_lag_seconds: (float) maximum delay of the heartbeat
+    :param interval: (float) seconds between the heartbeats
+    :return: check function
+    """
+    heartbeat = None
+
+    async def check() -> dict:
+        nonlocal heartbeat
+        loop = asyncio.get_running_loop()
+        if heartbeat is None or heartbeat.loop is not loop:
+            # first check or a new loop (e.g. the TestClient), the heartbeat of a closed loop never runs again
+            if heartbeat is not None and not heartbeat.loop.is_closed():
+                heartbeat.loop.call_soon_threadsafe(heartbeat.stop)
+            heartbeat = _LoopHeartbeat(loop, interval)
+        lag = max(heartbeat.take_max_lag(), 0.0)
+        return {"status": UP if lag <= max_lag_seconds else DOWN, "description": "event loop",
+                "max_lag_ms": round(lag * 1000, 3)}
+    return check
@@ -0,0 +1,138 @@
+import asyncio
+import inspect
+import time
+from datetime import datetime
+from fastapi.concurrency import run_in_threadpool
+
+"""
+Health check registry for the actuator endpoints.
+
+A check is a function (sync or async) without arguments which returns True/False or a dict with the key "status"
+("UP"/"DOWN") and optional details, exceptions and timeouts count as "DOWN". All checks run concurrently, sync checks
+in the threadpool, every check with its own timeout.
+The report is cached for "interval" seconds. An expired report is returned once more while a background refresh runs,
+so a probe never waits for a dependency (only the very first probe waits for the first run).
+
+Checks are registered for liveness (is the process working at all? only checks of the process itself) and/or readiness
+(can the service handle requests? dependencies like databases or disk space).
+"""
+
+UP = "UP"
+DOWN = "DOWN"
+
+
+class HealthCheck:
+    """
+    Attributes:
+        name (str): name of the check in the details
+        func (callable): the check, see module description
+        timeout (float): maximum runtime in seconds
+        liveness (bool): part of the liveness report
+        readiness (bool): part of the readiness report
+        critical (bool): if False, a failing check is reported but does not change the overall status
+        description (str): description in the details
+    """
+
+    def __init__(self, name: str, func, timeout: float = 2.0, liveness: bool = False, readiness: bool = True,
+                 critical: bool = True, description: str = ""):
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+        self.liveness = liveness
+        self.readiness = readiness
+        self.critical = critical
+        self.description = description
+
+    async def run(self) -> dict:
+        """
+        Runs the check with its timeout
+        :return: (dict) status, description, duration_ms, checked_at and the details of the check
+        """
+        start = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(self.func):
+                result = await asyncio.wait_for(self.func(), self.timeout)
+            else:
+                result = await asyncio.wait_for(run_in_threadpool(self.func), self.timeout)
+            details = result if isinstance(result, dict) else {"status": UP if result else DOWN}
+        except asyncio.TimeoutError:
+            details = {"status": DOWN, "error": "timeout after " + str(self.timeout) + " seconds"}
+        except Exception as e:
+            details = {"status": DOWN, "error": str(e)}
+
+        return dict(details, **{
+            "status": details.get("status", DOWN),
+            "description": details.get("description", self.description),
+            "critical": self.critical,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            "checked_at": datetime.now().isoformat(),
+        })
+
+
+class HealthRegistry:
+    """
+    Registry of the health checks with a cached, in the background refreshed report
+    """
+
+    def __init__(self, interval: float = 10.0):
+        """
+        :param interval: (float) seconds a report is valid, afterwards it is refreshed in the background
+        """
+        self.interval = interval
+        self.checks = dict()
+        self.__results = None
+        self.__checked = 0.0
+        self.__refresh = None
+
+    def register(self, name: str, func, timeout: float = 2.0, liveness: bool = False, readiness: bool = True,
+                 critical: bool = True, description: str = "") -> HealthCheck:
+        """
+        Registers a check, see HealthCheck
+        :return: (HealthCheck)
+        """
+        check = self.checks[name] = HealthCheck(name, func, timeout, liveness, readiness, critical, description)
+        self.__results = None
+        return check
+
+    async def run(self) -> dict:
+        """
+        Runs all checks concurrently and caches the results
+        :return: (dict) name: result
+        """
+        checks = list(self.checks.values())
+        results = await asyncio.gather(*(check.run() for check in checks))
+        self.__results = {check.name: result for check, result in zip(checks, results)}
+        self.__checked = time.monotonic()
+        return self.__results
+
+    async def results(self) -> dict:
+        """
+        Returns the cached results, an expired report is refreshed in the background
+        :return: (dict) name: result
+        """
+        if self.__refresh is not None and self.__refresh.get_loop() is not asyncio.get_running_loop():
+            # the refresh belongs to an event loop which is not running anymore (e.g. tests)
+            self.__refresh = None
+        if self.__results is None:
+            if self.__refresh is None or self.__refresh.done():
+                self.__refresh = asyncio.ensure_future(self.run())
+            return await asyncio.shield(self.__refresh)
+        if time.monotonic() - self.__checked > self.interval and (self.__refresh is None or self.__refresh.done()):
+            self.__refresh = asyncio.ensure_future(self.run())
+        return self.__results
+
+    async def report(self, kind: str = None) -> dict:
+        """
+        Health report in the format of the actuator endpoint
+        :param kind: (str) "liveness", "readiness" or None for all checks
+        :return: (dict) status, description, details
+        """
+        results = await self.results()
+        details = {name: result for name, result in results.items()
+                   if kind is None or getattr(self.checks[name], kind, False)}
+        status = DOWN if any(result["status"] != UP and result["critical"] for result in details.values()) else UP
+        return {
+            "status": status,
+            "description": "Health" if kind is None else "Health (" + kind + ")",
+            "details": details,
+        }
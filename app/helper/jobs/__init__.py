@@ -0,0 +1 @@
+name = "jobs"
\ No newline at end of file
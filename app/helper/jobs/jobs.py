@@ -0,0 +1,490 @@
+import asyncio
+import atexit
+import math
+import multiprocessing
+import os
+import threading
+import time
+import warnings
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from inspect import iscoroutinefunction
+from uuid import uuid4
+from app.helper.jobs.store import JobStore
+from app.helper.metrics.instruments import BACKGROUND_TASKS, BACKGROUND_TASKS_IN_PROGRESS, JOBS_QUEUED, JOBS_REJECTED
+
+"""
+Bounded background job engine, e.g. for long anonymization or export work.
+
+Jobs are put into a bounded queue and run by "concurrency" worker threads, so they never run on the event loop of the
+requests. Sync jobs run in the worker thread (THREAD) or, for CPU-bound work, in a process pool (PROCESS, the function
+has to be importable and its arguments picklable). Coroutine functions run on the event loop of the worker thread.
+If the queue is full, submit() raises QueueFullError with an estimated retry_after (routes answer with 429).
+Finished jobs are kept for "result_ttl" seconds (at most "max_jobs"), see get().
+A job runs in the worker which accepted it. With a JobStore the status and the result are also written to a folder
+which all workers share, so get() and cancel() of every gunicorn worker know the job; without a store the jobs are
+kept in the memory of the worker only.
+"""
+
+# status of a job
+PENDING = "pending"
+RUNNING = "running"
+SUCCESS = "success"
+ERROR = "error"
+CANCELLED = "cancelled"
+FINISHED = (SUCCESS, ERROR, CANCELLED)
+
+# executors
+THREAD = "thread"
+PROCESS = "process"
+# start method of the processes of the PROCESS executor
+MP_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+# seconds between the checks for cancel requests of other workers while a coroutine function runs
+CANCEL_POLL_INTERVAL = 0.1
+# seconds between the removals of the expired jobs of the JobStore
+STORE_PRUNE_INTERVAL = 60.0
+
+
+class QueueFullError(Exception):
+    """
+    The queue of the job engine is full
+    """
+
+    def __init__(self, max_queue_size: int, retry_after: int):
+        super().__init__("The job queue is full (" + str(max_queue_size) + " jobs), retry after " + str(retry_after) +
+                         " seconds")
+        self.retry_after = retry_after
+
+
+class Job:
+    """
+    Attributes:
+        uuid (str): id of the job
+        name (str): name of the job in the metrics, default: name of the function
+        executor (str): THREAD or PROCESS
+        status (str): PENDING, RUNNING, SUCCESS, ERROR or CANCELLED
+        submitted (datetime): time of submit()
+        started (datetime): start of the execution
+        finished (datetime): end of the execution
+        result: return value of the function
+        error (str): exception of the function
+    """
+
+    def __init__(self, func, args: tuple, kwargs: dict, name: str, executor: str, uuid: str = None):
+        self.uuid = uuid or str(uuid4())
+        self.name = name
+        self.executor = executor
+        self.status = PENDING
+        self.submitted = datetime.now()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        # event loop and task of a running coroutine function, needed to cancel it
+        self.loop = None
+        self.task = None
+        self.is_coroutine = iscoroutinefunction(func)
+        self.done = threading.Event()
+        # revision of the last saved and of the last written state, see JobEngine.__flush
+        self.revision = 0
+        self.stored_revision = 0
+        self.store_lock = threading.Lock()
+
+    @staticmethod
+    def from_state(state: dict) -> "Job":
+        """
+        Job of another worker, see JobStore.get
+        :param state: (dict) state of the job
+        :return: (Job) without function and arguments
+        """
+        job = Job(None, (), {}, state["name"], state["executor"], state["uuid"])
+        job.is_coroutine = state["is_coroutine"]
+        job.status = state["status"]
+        job.submitted = datetime.fromisoformat(state["submitted"])
+        job.started = datetime.fromisoformat(state["started"]) if state["started"] else None
+        job.finished = datetime.fromisoformat(state["finished"]) if state["finished"] else None
+        job.result = state.get("result")
+        job.error = state["error"]
+        if job.status not in FINISHED and not state["owner_alive"]:
+            job.status = ERROR
+            job.error = "The worker of the job has exited"
+        if job.status in FINISHED:
+            job.done.set()
+        return job
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Waits until the job is finished
+        :param timeout: (float) maximum time in seconds, None waits forever
+        :return: [bool] True if the job is finished
+        """
+        return self.done.wait(timeout)
+
+    def to_dict(self, result: bool = False) -> dict:
+        """
+        Status of the job
+        :param result: (bool) include the result
+        :return: (dict)
+        """
+        status_dict = {
+            "uuid": self.uuid,
+            "name": self.name,
+            "status": self.status,
+            "submitted": self.submitted.isoformat(),
+            "started": self.started.isoformat() if self.started else None,
+            "finished": self.finished.isoformat() if self.finished else None,
+            "duration_seconds": (self.finished - self.started).total_seconds()
+            if self.started and self.finished else None,
+            "error": self.error,
+        }
+        if result:
+            status_dict["result"] = self.result
+        return status_dict
+
+
+class JobEngine:
+    """
+    Use it like:
+        job = engine.submit(anonymize_file, ("in.ndjson",), executor=PROCESS)
+        engine.get(job.uuid).to_dict()
+    """
+
+    def __init__(self, concurrency: int = 2, max_queue_size: int = 100, executor: str = THREAD,
+                 result_ttl: float = 3600.0, max_jobs: int = 10000, store: JobStore = None):
+        """
+        :param concurrency: (int) number of jobs which run at the same time
+        :param max_queue_size: (int) maximum number of pending jobs
+        :param executor: (str) default executor of sync jobs, THREAD or PROCESS
+        :param result_ttl: (float) seconds a finished job is kept
+        :param max_jobs: (int) maximum number of finished jobs which are kept in memory
+        :param store: (JobStore) folder which all workers share, None = the jobs are only known to this worker
+        """
+        if executor not in (THREAD, PROCESS):
+            raise ValueError("Unknown executor '" + str(executor) + "'")
+        self.concurrency = max(1, concurrency)
+        self.max_queue_size = max_queue_size
+        self.executor = executor
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        self.store = store
+        self.counts = {"submitted": 0, "rejected": 0, SUCCESS: 0, ERROR: 0, CANCELLED: 0}
+        self.__condition = threading.Condition()
+        self.__pending = deque()
+        self.__jobs = OrderedDict()
+        # (monotonic time, uuid) of the finished jobs in the order they finished
+        self.__finished = deque()
+        self.__running = 0
+        self.__average_duration = None
+        self.__threads = list()
+        self.__process_pool = None
+        # the worker threads are started on the first submit and in every process (they don't survive a fork)
+        self.__pid = None
+        self.__closed = False
+        self.__store_pruned = time.monotonic()
+        # states which are written to the store after the lock is released, see __save and __flush
+        self.__unsaved = list()
+        atexit.register(self.shutdown)
+
+    def submit(self, func, args: tuple = (), kwargs: dict = None, name: str = None, executor: str = None,
+               uuid: str = None) -> Job:
+        """
+        Queues a job
+        :param func: function or coroutine function
+        :param args: (tuple) positional arguments of the function
+        :param kwargs: (dict) keyword arguments of the function
+        :param name: (str) name of the job, default: name of the function
+        :param executor: (str) THREAD or PROCESS, default: executor of the engine. Coroutine functions always run in a
+            worker thread.
+        :param uuid: (str) id of the job, default: a new uuid
+        :return: (Job)
+        :raises QueueFullError: if "max_queue_size" jobs are pending
+        """
+        executor = executor or self.executor
+        if executor not in (THREAD, PROCESS):
+            raise ValueError("Unknown executor '" + str(executor) + "'")
+        if iscoroutinefunction(func):
+            executor = THREAD
+        name = name or getattr(func, "__name__", "job")
+        with self.__condition:
+            if self.__closed:
+                raise RuntimeError("The job engine is shut down")
+            if len(self.__pending) >= self.max_queue_size:
+                self.counts["rejected"] += 1
+                JOBS_REJECTED.labels(name).inc()
+                raise QueueFullError(self.max_queue_size, self.__retry_after())
+            self.__start_workers()
+            prune_store = self.__prune()
+            job = Job(func, tuple(args), dict(kwargs or {}), name, executor, uuid)
+            self.__jobs[job.uuid] = job
+            self.__pending.append(job)
+            self.__save(job)
+            self.counts["submitted"] += 1
+            JOBS_QUEUED.inc()
+            self.__condition.notify()
+        self.__flush(prune_store)
+        return job
+
+    def get(self, uuid: str) -> Job:
+        """
+        :param uuid: (str) id of the job
+        :return: (Job) or None if the job is unknown or expired. The jobs of other workers are read from the store.
+        """
+        with self.__condition:
+            prune_store = self.__prune()
+            job = self.__jobs.get(uuid)
+        self.__flush(prune_store)
+        if job is None and self.store is not None:
+            state = self.store.get(uuid)
+            if state is not None:
+                job = Job.from_state(state)
+        return job
+
+    def cancel(self, uuid: str) -> bool:
+        """
+        Cancels a pending job or a running coroutine function. Running sync jobs can't be cancelled. The jobs of
+        other workers are cancelled by their worker, see JobStore.request_cancel.
+        :param uuid: (str) id of the job
+        :return: [bool] True if the job is (being) cancelled, None if the job is unknown
+        """
+        with self.__condition:
+            job = self.__jobs.get(uuid)
+        if job is None:
+            return self.__cancel_other(uuid)
+        with self.__condition:
+            if job.status == PENDING:
+                self.__pending.remove(job)
+                JOBS_QUEUED.dec()
+                self.__finish(job, CANCELLED, time.monotonic())
+                cancelled = True
+            elif job.status == RUNNING and job.task is not None:
+                job.loop.call_soon_threadsafe(job.task.cancel)
+                cancelled = True
+            else:
+                cancelled = job.status == CANCELLED
+        self.__flush()
+        return cancelled
+
+    def __cancel_other(self, uuid: str) -> bool:
+        """
+        Asks the worker of a job of another worker to cancel it, see cancel
+        """
+        job = self.get(uuid)
+        if job is None or self.store is None:
+            return None
+        if job.status == PENDING or (job.status == RUNNING and job.is_coroutine):
+            self.store.request_cancel(uuid)
+            return True
+        return job.status == CANCELLED
+
+    def stats(self) -> dict:
+        """
+        Counters of the engine of this worker
+        :return: (dict)
+        """
+        with self.__condition:
+            return dict(self.counts, pending=len(self.__pending), running=self.__running,
+                        concurrency=self.concurrency, max_queue_size=self.max_queue_size)
+
+    def shutdown(self, timeout: float = 5.0):
+        """
+        Cancels the pending jobs and waits up to "timeout" seconds for the running jobs. Jobs which are submitted
+        afterwards raise a RuntimeError.
+        :param timeout: (float) maximum time in seconds to wait for the running jobs
+        """
+        with self.__condition:
+            if self.__closed:
+                return
+            self.__closed = True
+            now = time.monotonic()
+            while self.__pending:
+                JOBS_QUEUED.dec()
+                self.__finish(self.__pending.popleft(), CANCELLED, now)
+            self.__condition.notify_all()
+            threads = self.__threads if self.__pid == os.getpid() else []
+        self.__flush()
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        if self.__process_pool is not None:
+            self.__process_pool.shutdown(wait=False, cancel_futures=True)
+        atexit.unregister(self.shutdown)
+
+    def __start_workers(self):
+        """
+        Starts the worker threads once per process, must be called with the lock held
+        """
+        if self.__pid == os.getpid():
+            return
+        self.__pid = os.getpid()
+        self.__process_pool = None
+        self.__threads = [threading.Thread(target=self.__work, name="JobEngine-" + str(i), daemon=True)
+                          for i in range(self.concurrency)]
+        for thread in self.__threads:
+            thread.start()
+
+    def __work(self):
+        """
+        Worker thread: runs the pending jobs one after another
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
+                with self.__condition:
+                    while not self.__pending and not self.__closed:
+                        self.__condition.wait()
+                    if not self.__pending:
+                        return
+                    job = self.__pending.popleft()
+                    JOBS_QUEUED.dec()
+                    if self.store is not None and self.store.cancel_requested(job.uuid):
+                        self.__finish(job, CANCELLED, time.monotonic())
+                        job = None
+                    else:
+                        job.status = RUNNING
+                        job.started = datetime.now()
+                        self.__running += 1
+                        self.__save(job)
+                self.__flush()
+                if job is not None:
+                    self.__execute(job, loop)
+        finally:
+            loop.close()
+
+    def __execute(self, job: Job, loop: asyncio.AbstractEventLoop):
+        """
+        Runs a job and stores its result
+        """
+        start = time.monotonic()
+        in_progress = BACKGROUND_TASKS_IN_PROGRESS.labels(job.name)
+        in_progress.inc()
+        try:
+            if job.is_coroutine:
+                with self.__condition:
+                    job.loop, job.task = loop, loop.create_task(job.func(*job.args, **job.kwargs))
+                job.result = loop.run_until_complete(self.__run_task(job))
+            elif job.executor == PROCESS:
+                job.result = self.__get_process_pool().submit(job.func, *job.args, **job.kwargs).result()
+            else:
+                job.result = job.func(*job.args, **job.kwargs)
+            status = SUCCESS
+        except asyncio.CancelledError:
+            status = CANCELLED
+        except Exception as e:
+            job.error = type(e).__name__ + ": " + str(e)
+            status = ERROR
+        finally:
+            in_progress.dec()
+        with self.__condition:
+            job.loop = job.task = None
+            self.__running -= 1
+            duration = time.monotonic() - start
+            self.__average_duration = duration if self.__average_duration is None \
+                else 0.8 * self.__average_duration + 0.2 * duration
+            self.__finish(job, status, time.monotonic())
+        self.__flush()
+
+    async def __run_task(self, job: Job):
+        """
+        Waits for the task of a coroutine function and cancels it if another worker asks for it
+        """
+        task = job.task
+        while not task.done():
+            if self.store is not None and self.store.cancel_requested(job.uuid):
+                task.cancel()
+            await asyncio.wait([task], timeout=CANCEL_POLL_INTERVAL if self.store is not None else None)
+        return task.result()
+
+    def __finish(self, job: Job, status: str, now: float):
+        """
+        Marks a job as finished, must be called with the lock held. The job is done when its state is written, see
+        __flush.
+        """
+        job.status = status
+        job.finished = datetime.now()
+        # the function and its arguments are not needed anymore
+        job.func = job.args = job.kwargs = None
+        self.counts[status] += 1
+        self.__finished.append((now, job.uuid))
+        self.__save(job)
+        BACKGROUND_TASKS.labels(job.name, status).inc()
+
+    def __save(self, job: Job):
+        """
+        Takes a copy of the state of the job which __flush writes to the store, must be called with the lock held
+        """
+        job.revision += 1
+        state = None
+        if self.store is not None:
+            state = dict(job.to_dict(result=job.status == SUCCESS), executor=job.executor,
+                         is_coroutine=job.is_coroutine)
+        self.__unsaved.append((job, job.revision, state, job.status in FINISHED))
+
+    def __flush(self, prune_store: bool = False):
+        """
+        Writes the saved states to the store, must be called without the lock so the other requests don't wait for
+        the disk. The states of a job may be flushed by several threads, a state which is older than the last
+        written one is dropped. Finished jobs are done after their state is written.
+        :param prune_store: (bool) also removes the expired jobs of the store, see __prune
+        """
+        with self.__condition:
+            unsaved, self.__unsaved = self.__unsaved, list()
+        for job, revision, state, finished in unsaved:
+            if state is not None:
+                with job.store_lock:
+                    if revision > job.stored_revision:
+                        job.stored_revision = revision
+                        self.__put(state)
+            if finished:
+                job.done.set()
+        if prune_store:
+            # also the jobs of exited workers
+            self.store.prune()
+
+    def __put(self, state: dict):
+        """
+        Writes a state to the store, the job keeps running if the store can't be written
+        """
+        ttl = self.result_ttl if state["status"] in FINISHED else None
+        try:
+            try:
+                self.store.put(state, ttl)
+            except (TypeError, ValueError) as e:
+                # the result can't be encoded, the job is reported as failed to the other workers
+                self.store.put(dict(state, status=ERROR, result=None,
+                                    error="The result can't be stored: " + type(e).__name__ + ": " + str(e)), ttl)
+        except OSError as e:
+            warnings.warn("The state of the job '" + state["uuid"] + "' can't be stored: " + str(e))
+
+    def __prune(self) -> bool:
+        """
+        Removes the expired finished jobs, must be called with the lock held
+        :return: (bool) True if the expired jobs of the store have to be removed, see __flush
+        """
+        now = time.monotonic()
+        expired = now - self.result_ttl
+        while self.__finished and (self.__finished[0][0] < expired or len(self.__finished) > self.max_jobs):
+            self.__jobs.pop(self.__finished.popleft()[1], None)
+        if self.store is not None and now - self.__store_pruned > STORE_PRUNE_INTERVAL:
+            self.__store_pruned = now
+            return True
+        return False
+
+    def __retry_after(self) -> int:
+        """
+        Estimated seconds until a job can be queued, must be called with the lock held
+        """
+        average_duration = self.__average_duration if self.__average_duration is not None else 1.0
+        return max(1, math.ceil(average_duration * (len(self.__pending) + 1) / self.concurrency))
+
+    def __get_process_pool(self) -> ProcessPoolExecutor:
+        with self.__condition:
+            if self.__process_pool is None:
+                # a fork of a worker with running threads (event loop, job engine, log sinks) can deadlock, the
+                # processes are started by a fork server (spawn where it is not available) which has no threads
+                self.__process_pool = ProcessPoolExecutor(max_workers=self.concurrency,
+                                                          mp_context=multiprocessing.get_context(MP_START_METHOD))
+            return self.__process_pool
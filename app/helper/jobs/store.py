@@ -0,0 +1,154 @@
+import json
+import os
+import re
+import socket
+import time
+from uuid import uuid4
+from fastapi.encoders import jsonable_encoder
+
+"""
+Status and results of the jobs in a folder which all workers share, e.g. the "jobs_folder" of the Config.
+
+A job runs in the worker which accepted it, but with several gunicorn workers the next request for its status or
+result may land on another worker. The worker of a job writes its state to "<uuid>.job" whenever the status changes
+(submitted, running, finished incl. the result), so every worker can answer. A cancel request of another worker is
+written as "<uuid>.cancel" and is picked up by the worker of the job.
+The states are stored as JSON (the results are encoded with jsonable_encoder), so nothing which is read from the shared
+folder can execute code. The files are written to a temporary file and renamed, so readers never see a partial state.
+"""
+
+# suffix of the temporary files
+_TMP_SUFFIX = ".tmp"
+# uuids are used as file names
+_VALID_UUID = re.compile(r"[0-9A-Za-z_-]{1,64}")
+
+
+class JobStore:
+    """
+    Attributes:
+        folder (str): folder of the job files
+        owner (str): "<host>:<pid>" of the current process, the worker of the jobs it writes
+    """
+
+    def __init__(self, folder: str):
+        """
+        :param folder: (str) folder of the job files, created if it does not exist
+        """
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def __getstate__(self) -> dict:
+        return {"folder": self.folder}
+
+    def __setstate__(self, state: dict):
+        self.__init__(**state)
+
+    @property
+    def owner(self) -> str:
+        return socket.gethostname() + ":" + str(os.getpid())
+
+    def path(self, uuid: str, suffix: str = ".job") -> str:
+        """
+        Path of the state (".job") or the cancel request (".cancel") of a job
+        :raises ValueError: if the uuid is not a valid file name
+        """
+        if not _VALID_UUID.fullmatch(uuid):
+            raise ValueError("Invalid job id '" + uuid + "'")
+        return os.path.join(self.folder, uuid + suffix)
+
+    def put(self, state: dict, ttl: float = None):
+        """
+        Writes the state of a job of this process
+        :param state: (dict) see Job.to_dict(result=True), the result has to be encodable by jsonable_encoder
+        :param ttl: (float) seconds the state is kept, None = until it is removed
+        :raises ValueError: if the state can't be encoded as JSON
+        """
+        record = dict(state, owner=self.owner, expires=time.time() + ttl if ttl is not None else None)
+        content = json.dumps(jsonable_encoder(record), ensure_ascii=False)
+        path = self.path(state["uuid"])
+        tmp_path = path + "." + uuid4().hex + _TMP_SUFFIX
+        try:
+            with open(tmp_path, "w", encoding="utf8") as file:
+                file.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, uuid: str) -> dict:
+        """
+        Returns the state of a job or None if it is unknown or expired. "owner_alive" is False if the worker of the job
+        has exited on this host before the job was finished.
+        :param uuid: (str) id of the job
+        :return: (dict)
+        """
+        try:
+            with open(self.path(uuid), "r", encoding="utf8") as file:
+                record = json.load(file)
+        except (ValueError, FileNotFoundError):
+            return None
+        if record["expires"] is not None and record["expires"] < time.time():
+            self.remove(uuid)
+            return None
+        record["owner_alive"] = self.__is_alive(record["owner"])
+        return record
+
+    def remove(self, uuid: str):
+        """
+        Removes the state and the cancel request of a job
+        """
+        for suffix in (".job", ".cancel"):
+            try:
+                os.remove(self.path(uuid, suffix))
+            except FileNotFoundError:
+                pass
+
+    def request_cancel(self, uuid: str):
+        """
+        Asks the worker of the job to cancel it, see cancel_requested
+        """
+        with open(self.path(uuid, ".cancel"), "wb"):
+            pass
+
+    def cancel_requested(self, uuid: str) -> bool:
+        """
+        :return: [bool] True if another worker has asked to cancel the job
+        """
+        return os.path.exists(self.path(uuid, ".cancel"))
+
+    def prune(self) -> int:
+        """
+        Removes the expired states
+        :return: (int) number of removed jobs
+        """
+        removed = 0
+        for entry in os.scandir(self.folder):
+            if not entry.name.endswith(".job"):
+                continue
+            uuid = entry.name[:-len(".job")]
+            try:
+                with open(entry.path, "r", encoding="utf8") as file:
+                    expires = json.load(file)["expires"]
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if expires is not None and expires < time.time():
+                self.remove(uuid)
+                removed += 1
+        return removed
+
+    @staticmethod
+    def __is_alive(owner: str) -> bool:
+        """
+        Is the process alive? Processes of other hosts are assumed to be alive.
+        """
+        host, _, pid = owner.rpartition(":")
+        if host != socket.gethostname():
+            return True
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, ValueError):
+            pass
+        return True
@@ -0,0 +1,37 @@
+from contextvars import ContextVar
+
+"""
+Request scoped log context: the RequestLoggingMiddleware binds the trace id etc. of the current request and the Logger
+uses them for every log of this request, without passing them through every router.
+"""
+
+# trace_id, uuid, path and user of the current request
+request_context: ContextVar[dict] = ContextVar("request_context", default={})
+
+
+def bind_request(trace_id: str = "", uuid: str = "", path: str = "", user: str = ""):
+    """
+    Binds the log context of a request, reset it with the returned token
+    :param trace_id: trace id of the request (propagated from the caller or generated)
+    :param uuid: unique identifier of the request
+    :param path: path of the request
+    :param user: user who called the api
+    :return: (contextvars.Token)
+    """
+    return request_context.set({"trace_id": trace_id, "uuid": uuid, "path": path, "user": user})
+
+
+def reset_request(token):
+    """
+    Restores the log context before bind_request
+    :param token: (contextvars.Token) return value of bind_request
+    """
+    request_context.reset(token)
+
+
+def get_request() -> dict:
+    """
+    Returns the log context of the current request, an empty dict outside of a request
+    :return: (dict)
+    """
+    return request_context.get()
@@ -0,0 +1,203 @@
+import atexit
+import gzip
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    # no advisory file locks (e.g. Windows), the single O_APPEND write per flush is still atomic for local files
+    fcntl = None
+
+
+class FileSink:
+    """
+    Buffered, rotating NDJSON file sink for the Logger.
+
+    Lines are collected in a userspace buffer and written with a single O_APPEND write per flush, either when the
+    buffer reaches "buffer_size" bytes or at the latest "flush_interval" seconds after the last flush.
+
+    The file is rotated before a flush if it would exceed "max_bytes" or if its last write was in an earlier
+    "rotate_interval" period (e.g. 86400 for daily files). Rotated files are renamed to "<path>.<timestamp>" and
+    compressed to "<path>.<timestamp>.gz" in the background.
+
+    Several processes (e.g. gunicorn workers) can write to the same path: every flush holds an exclusive flock on the
+    file and reopens it if another process has rotated it in the meantime (different inode).
+    """
+
+    def __init__(self, path: str, buffer_size: int = 65536, flush_interval: float = 1.0, max_bytes: int = 104857600,
+                 rotate_interval: int = None, compress: bool = True):
+        """
+        :param path: (str) path of the log file
+        :param buffer_size: (int) flush the buffer if it reaches this size in bytes
+        :param flush_interval: (float) maximum time in seconds a line waits in the buffer
+        :param max_bytes: (int) rotate the file before it exceeds this size in bytes, None = no size based rotation
+        :param rotate_interval: (int) rotate the file every n seconds (aligned to the epoch), None = no time based rotation
+        :param compress: (bool) compress rotated files with gzip
+        """
+        self.path = os.path.abspath(path)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.compress = compress
+        self.written = 0
+        self.rotations = 0
+        self.__buffer = bytearray()
+        self.__lock = threading.Lock()
+        self.__fd = None
+        self.__compressions = list()
+        self.__closed = threading.Event()
+        self.__pid = os.getpid()
+        self.__thread = threading.Thread(target=self.__run, name="FileSink", daemon=True)
+        self.__thread.start()
+        atexit.register(self.close)
+
+    def write(self, line: object) -> bool:
+        """
+        Appends a line to the buffer
+        :param line: (str, bytes) serialized log record, a newline is added to strings, bytes are written as they are
+        :return: [bool] False if the sink is closed or the flush failed
+        """
+        if self.__closed.is_set():
+            return False
+        data = line if isinstance(line, bytes) else line.encode("utf8") + b"\n"
+        with self.__lock:
+            self.__buffer += data
+            if len(self.__buffer) < self.buffer_size:
+                return True
+            return self.__flush()
+
+    def flush(self) -> bool:
+        """
+        Writes the buffer to the file
+        :return: [bool] False if the buffer could not be written
+        """
+        with self.__lock:
+            return self.__flush()
+
+    def close(self):
+        """
+        Flushes the buffer, waits for running compressions and closes the file.
+        In a forked process (e.g. the atexit handler inherited from the gunicorn master) the sink belongs to the parent,
+        its buffer is not written twice.
+        """
+        if self.__closed.is_set() or self.__pid != os.getpid():
+            return
+        self.__closed.set()
+        self.__thread.join(self.flush_interval + 1)
+        with self.__lock:
+            self.__flush()
+            if self.__fd is not None:
+                os.close(self.__fd)
+                self.__fd = None
+        for thread in self.__compressions:
+            thread.join()
+        atexit.unregister(self.close)
+
+    def __run(self):
+        """
+        Background flush of the buffer every "flush_interval" seconds
+        """
+        while not self.__closed.wait(self.flush_interval):
+            self.flush()
+
+    def __flush(self) -> bool:
+        """
+        Writes and clears the buffer, the lock of the instance has to be held
+        """
+        if not self.__buffer:
+            return True
+        data = bytes(self.__buffer)
+        try:
+            self.__open()
+            if fcntl is not None:
+                fcntl.flock(self.__fd, fcntl.LOCK_EX)
+            try:
+                self.__reopen_if_rotated()
+                self.__rotate_if_needed(len(data))
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(self.__fd, view):]
+            finally:
+                if fcntl is not None and self.__fd is not None:
+                    fcntl.flock(self.__fd, fcntl.LOCK_UN)
+        except OSError:
+            # keep the buffer for the next try, but never let it grow without limit
+            if len(self.__buffer) > 16 * self.buffer_size:
+                self.__buffer.clear()
+            return False
+        self.__buffer.clear()
+        self.written += len(data)
+        return True
+
+    def __open(self):
+        if self.__fd is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.__fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def __reopen_if_rotated(self):
+        """
+        Reopens the path if another process has rotated the file, the file lock is moved to the new file
+        """
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            current = None
+        opened = os.fstat(self.__fd)
+        if current is None or (current.st_ino, current.st_dev) != (opened.st_ino, opened.st_dev):
+            if fcntl is not None:
+                fcntl.flock(self.__fd, fcntl.LOCK_UN)
+            os.close(self.__fd)
+            self.__fd = None
+            self.__open()
+            if fcntl is not None:
+                fcntl.flock(self.__fd, fcntl.LOCK_EX)
+
+    def __rotate_if_needed(self, size: int):
+        """
+        Rotates the file if it would exceed max_bytes or if its last write is in an earlier rotate_interval period
+        """
+        stat = os.fstat(self.__fd)
+        if stat.st_size == 0:
+            return
+        too_big = self.max_bytes is not None and stat.st_size + size > self.max_bytes
+        expired = self.rotate_interval is not None and \
+            int(stat.st_mtime // self.rotate_interval) < int(time.time() // self.rotate_interval)
+        if not (too_big or expired):
+            return
+
+        rotated = self.path + "." + datetime.fromtimestamp(stat.st_mtime).strftime("%Y%m%d-%H%M%S-%f")
+        while os.path.exists(rotated) or os.path.exists(rotated + ".gz"):
+            rotated += "_"
+        os.rename(self.path, rotated)
+        self.rotations += 1
+        # the lock is released by closing the descriptor of the rotated file
+        os.close(self.__fd)
+        self.__fd = None
+        self.__open()
+        if fcntl is not None:
+            fcntl.flock(self.__fd, fcntl.LOCK_EX)
+        if self.compress:
+            thread = threading.Thread(target=_compress, args=(rotated,), name="FileSinkCompress", daemon=True)
+            thread.start()
+            self.__compressions = [compression for compression in self.__compressions if compression.is_alive()]
+            self.__compressions.append(thread)
+
+
+def _compress(path: str):
+    """
+    Compresses a rotated file to "<path>.gz" and removes the original
+    """
+    try:
+        with open(path, "rb") as source, gzip.open(path + ".gz.tmp", "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.replace(path + ".gz.tmp", path + ".gz")
+        os.remove(path)
+    except OSError:
+        pass
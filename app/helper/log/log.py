@@ -1,21 +1,22 @@
 import json
 from datetime import datetime
-from dataclasses import asdict
-from pydantic.dataclasses import dataclass
+
+# string encoding of the json module with ensure_ascii=False (C implementation if available)
+_encode_string = json.encoder.encode_basestring
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str)
 
 
-@dataclass
 class Log:
-    timestamp: str
-    api_id: int
-    level: int
-    status_code: int
-    message: str = None
-    traceback: str = None
-    path: str = None
-    user: str = None
-    uuid: str = None
-    trace_id: str = None
+    """
+    Log record, serialized only once per log call: the json-string/bytes are created on first use and reused for
+    stdout and every sink.
+    """
+    __slots__ = ("timestamp", "api_id", "level", "status_code", "message", "traceback", "path", "user", "uuid",
+                 "trace_id", "_json", "_bytes")
+
+    # order of the fields in the json representation
+    FIELDS = ("timestamp", "api_id", "level", "status_code", "message", "traceback", "path", "user", "uuid",
+              "trace_id")
 
     def __init__(self, timestamp: datetime, api_id: int, level: int, status_code: int, message: str,
                  traceback: str, path: str, user: str, uuid: str, trace_id: str, treat_all_args_as_string: bool = False):
@@ -42,17 +43,50 @@ class Log:
         self.user = user
         self.uuid = uuid
         self.trace_id = trace_id
+        self._json = None
+        self._bytes = None
 
     def to_json_string(self) -> str:
         """
-        Return the dataclass as a json string
-        :return: (str) json-string representation of the log dataclass
+        Return the record as a compact json string, it is created only once
+        :return: (str) json-string representation of the log record
+        """
+        if self._json is None:
+            self._json = "{" + ",".join([
+                _KEYS[i] + _encode_value(getattr(self, field)) for i, field in enumerate(self.FIELDS)
+            ]) + "}"
+        return self._json
+
+    def to_json_bytes(self) -> bytes:
+        """
+        Return the record as utf8-encoded json line (with a trailing newline) for file/stream sinks, it is created only once
+        :return: (bytes)
         """
-        return json.dumps(asdict(self))
+        if self._bytes is None:
+            self._bytes = (self.to_json_string() + "\n").encode("utf8")
+        return self._bytes
 
     def to_dict(self) -> dict:
         """
-        Return the dataclass as a dict
+        Return the record as a dict
         :return:
         """
-        return asdict(self)
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+# precompiled '"field":' prefixes
+_KEYS = tuple(_encode_string(field) + ":" for field in Log.FIELDS)
+
+
+def _encode_value(value: object) -> str:
+    """
+    Specialized json encoder for the field types of a log record
+    """
+    if value is None:
+        return "null"
+    value_type = type(value)
+    if value_type is str:
+        return _encode_string(value)
+    if value_type is int:
+        return int.__repr__(value)
+    return _encoder.encode(value)
@@ -1,15 +1,18 @@
 from __future__ import print_function
 
-import json
 import sys
+import threading
 import traceback
 import warnings
 from datetime import datetime
 from enum import Enum
 
-from pymongo import MongoClient
-
+from app.helper.log.context import get_request
+from app.helper.log.file_sink import FileSink
 from app.helper.log.log import Log
+from app.helper.log.mongodb_sink import MongoDBSink
+from app.helper.log.rate_limit import RateLimiter
+from app.helper.pattern.process_local import ProcessLocal
 
 
 class Logger:
@@ -34,7 +37,13 @@ class Logger:
                  file_path: str = "./log.txt",
                  mongodb_url: str = "mongodb://{UID}:{PWD}@{HOST}/?authSource=database",
                  mongodb_db: str = None, mongodb_collection: str = None, mongodb_host: str = None,
-                 treat_all_args_as_string: bool = False
+                 treat_all_args_as_string: bool = False,
+                 mongodb_queue_size: int = 10000, mongodb_batch_size: int = 500, mongodb_flush_interval: float = 1.0,
+                 mongodb_full_policy: MongoDBSink.POLICY = MongoDBSink.POLICY.DROP,
+                 mongodb_server_selection_timeout_ms: int = 5000,
+                 file_buffer_size: int = 65536, file_flush_interval: float = 1.0, file_max_bytes: int = 104857600,
+                 file_rotate_interval: int = None, file_compress: bool = True,
+                 rate_limit: float = None, rate_limit_burst: int = 10, rate_limit_summary_interval: float = 10.0
                  ):
         """
         APIKEY auth.-provider for python webservices
@@ -51,20 +60,80 @@ class Logger:
         :param mongodb_host: MongoDB Host URL
         :param treat_all_args_as_string: if True, converts all given arguments as app_id, error_code etc. to string
             (Useful for kibana logging over OKD where a central parser is in place which only uses strings!)
+        :param mongodb_queue_size: Maximum number of logs waiting to be written to the MongoDB, see MongoDBSink
+        :param mongodb_batch_size: Maximum number of logs per bulk insert
+        :param mongodb_flush_interval: Maximum time in seconds a log waits for its bulk insert
+        :param mongodb_full_policy: Drop the log or block the caller if the queue is full?
+        :param mongodb_server_selection_timeout_ms: How long pymongo waits for a reachable server
+        :param file_buffer_size: Flush the logs to the file if the buffer reaches this size in bytes, see FileSink
+        :param file_flush_interval: Maximum time in seconds a log waits in the buffer
+        :param file_max_bytes: Rotate the file before it exceeds this size in bytes, None = never
+        :param file_rotate_interval: Rotate the file every n seconds (e.g. 86400 = daily), None = never
+        :param file_compress: Compress the rotated files with gzip?
+        :param rate_limit: Maximum number of logs per second with the same (level, status_code, path), see RateLimiter.
+            None = no rate limit
+        :param rate_limit_burst: Maximum number of logs with the same (level, status_code, path) at once
+        :param rate_limit_summary_interval: Suppressed logs are summarized at the latest every n seconds
         """
         self.sink = sink
         self.api_id: int = api_id
         self.mode = mode
         self.treat_all_args_as_string = treat_all_args_as_string
+        self.rate_limiter = RateLimiter(rate_limit, rate_limit_burst, rate_limit_summary_interval) \
+            if rate_limit is not None else None
+        # writes the summaries of the rate limit if no other log follows a storm, started on the first suppressed log
+        self.__summaries_stopped = threading.Event()
+        self.__summary_thread = ProcessLocal(self.__start_summary_thread, close=self.__stop_summary_thread)
+        # the sinks (background threads, sockets, buffers) are created on first use in every process, so a Logger
+        # which is created before a fork (e.g. by the gunicorn master with PRELOAD_APP=true) can be used by the workers
         if sink == self.SINK.FILE:
-            self.file_handle = open(file_path, "a+")
+            self.__file_sink = ProcessLocal(lambda: FileSink(file_path, file_buffer_size, file_flush_interval,
+                                                             file_max_bytes, file_rotate_interval, file_compress),
+                                            close=lambda file_sink: file_sink.close())
         if sink == self.SINK.MONGODB:
             if uid and pwd and mongodb_host:
                 self.__mongodb_url = mongodb_url.replace("{UID}", uid).replace("{PWD}", pwd).replace("{URL}", mongodb_host)
             else:
                 self.__mongodb_url = mongodb_url
-            self.mongo_client = MongoClient(self.__mongodb_url)
-            self.mongodb_collection = self.mongo_client[mongodb_db][mongodb_collection]
+            self.__mongodb_db = mongodb_db
+            self.__mongodb_collection = mongodb_collection
+
+            def mongo_client():
+                # pymongo is only imported if the MONGODB sink is used
+                from pymongo import MongoClient
+                return MongoClient(self.__mongodb_url, serverSelectionTimeoutMS=mongodb_server_selection_timeout_ms)
+            self.__mongo_client = ProcessLocal(mongo_client, close=lambda client: client.close())
+            self.__mongodb_sink = ProcessLocal(lambda: MongoDBSink(self.mongodb_collection, mongodb_queue_size,
+                                                                   mongodb_batch_size, mongodb_flush_interval,
+                                                                   mongodb_full_policy))
+
+    @property
+    def file_sink(self) -> FileSink:
+        """
+        FileSink of the current process (SINK.FILE)
+        """
+        return self.__file_sink.get()
+
+    @property
+    def mongo_client(self):
+        """
+        pymongo.MongoClient of the current process (SINK.MONGODB)
+        """
+        return self.__mongo_client.get()
+
+    @property
+    def mongodb_collection(self):
+        """
+        Collection of the logs (SINK.MONGODB)
+        """
+        return self.mongo_client[self.__mongodb_db][self.__mongodb_collection]
+
+    @property
+    def mongodb_sink(self) -> MongoDBSink:
+        """
+        MongoDBSink of the current process (SINK.MONGODB)
+        """
+        return self.__mongodb_sink.get()
 
     def print_err(*args, **kwargs):
         """
@@ -75,24 +144,63 @@ class Logger:
         """
         print(*args, file=sys.stderr, **kwargs)
 
-    def log(self, level: LEVEL, status_code: int, message: str = "", path: str = "", user: str = "", uuid: str = "",
+    def is_enabled(self, level: LEVEL) -> bool:
+        """
+        Is the level logged in the current mode? ERROR and INFO are always logged, WARNING except in MODE.ERROR and
+        DEBUG only in MODE.DEBUG.
+        :param level: Log-Level
+        :return: (bool)
+        """
+        if level == self.LEVEL.WARNING:
+            return self.mode.value > 0
+        if level == self.LEVEL.DEBUG:
+            return self.mode == self.MODE.DEBUG
+        return True
+
+    def log(self, level: LEVEL, status_code: int, message: object = "", path: str = "", user: str = "", uuid: str = "",
             trace_id: str = "") -> (bool, Log):
         """
         :param level: Log-Level 0 = INFO, 1 = WARNING, 99 = ERROR
         :param status_code: HTTP-Status Code
-        :param message: Log message
+        :param message: Log message or a function without arguments which returns it (lazy formatting: only called if
+            the log is not filtered by the mode or the rate limit)
         :param path: Path/URL to the method that created the log
         :param user: user wo called the api
         :param uuid: unique identifier of the current run
         :param trace_id: trace id of the current run/object which can/should be sent to the precending task.
-        :return: [bool] insert/print status of the log
+        Empty path, user, uuid and trace_id are taken from the current request, see RequestLoggingMiddleware.
+        :return: [bool] insert/print status of the log, for the MongoDB sink: was the log queued?
+            False if the log was suppressed by the rate limit, the Log is None if the log was filtered or suppressed.
         """
+        # level check before any work
+        if not self.is_enabled(level):
+            return True, None
+
+        context = get_request()
+        if context:
+            path = path or context["path"]
+            user = user or context["user"]
+            uuid = uuid or context["uuid"]
+            trace_id = trace_id or context["trace_id"]
+
+        if self.rate_limiter is not None:
+            self.__log_suppressed()
+            if not self.rate_limiter.allow((level, status_code, path)):
+                self.__summary_thread.get()
+                return False, None
 
-        ts = datetime.now()
+        if callable(message):
+            message = message()
         tb = traceback.format_exc() if level == self.LEVEL.ERROR else ""
+        return self.__log(level, status_code, message, tb, path, user, uuid, trace_id)
 
+    def __log(self, level: LEVEL, status_code: int, message: str, tb: str, path: str, user: str, uuid: str,
+              trace_id: str) -> (bool, Log):
+        """
+        Creates the Log and writes it to stdout and the sink
+        """
         _log = Log(
-            ts,
+            datetime.now(),
             self.api_id,
             level.value,
             status_code,
@@ -105,18 +213,11 @@ class Logger:
             self.treat_all_args_as_string
         )
         # STDOUT - is always used according to mode
-        if level == self.LEVEL.ERROR and self.mode.value >= 0:
+        if level == self.LEVEL.ERROR:
             self.print_err(_log.to_json_string())
-
-        if level == self.LEVEL.WARNING and self.mode.value > 0:
+        elif level == self.LEVEL.WARNING:
             warnings.warn(_log.to_json_string())
-
-        # normal print, always except for debug
-        if level == self.LEVEL.INFO:
-            print(_log.to_json_string())
-
-        # only print debugs if the mode is set to DEBUG and LEVEL is Debug
-        if level == self.LEVEL.DEBUG and self.mode == self.MODE.DEBUG:
+        else:
             print(_log.to_json_string())
 
         success = True
@@ -128,29 +229,80 @@ class Logger:
             success = self.__log_mongodb(_log)
         return success, _log
 
+    def __log_suppressed(self, force: bool = False):
+        """
+        Writes the "N similar messages suppressed" summaries of the rate limit
+        """
+        for (level, status_code, path), count in self.rate_limiter.summaries(force):
+            self.__log(level, status_code, str(count) + " similar messages suppressed", "", path, "", "", "")
+
+    def __start_summary_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.__write_summaries, name="LoggerSummaries", daemon=True)
+        thread.start()
+        return thread
+
+    def __stop_summary_thread(self, thread: threading.Thread):
+        self.__summaries_stopped.set()
+        thread.join(1)
+
+    def __write_summaries(self):
+        """
+        Background thread: writes the summaries every "rate_limit_summary_interval" seconds
+        """
+        while not self.__summaries_stopped.wait(self.rate_limiter.summary_interval):
+            self.__log_suppressed(force=True)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Writes all pending logs of the sink
+        :param timeout: maximum time in seconds to wait
+        :return: [bool] True if all pending logs were written within the timeout
+        """
+        if self.rate_limiter is not None:
+            self.__log_suppressed(force=True)
+        if self.sink == self.SINK.FILE:
+            return self.file_sink.flush() if self.__file_sink.created else True
+        elif self.sink == self.SINK.MONGODB:
+            return self.mongodb_sink.flush(timeout) if self.__mongodb_sink.created else True
+        return True
+
+    def close(self, timeout: float = 5.0) -> bool:
+        """
+        Flushes and closes the sink, use it on shutdown of the application
+        :param timeout: maximum time in seconds to wait for pending logs
+        :return: [bool] True if all pending logs were written within the timeout
+        """
+        if self.rate_limiter is not None:
+            self.__summary_thread.close()
+            self.__log_suppressed(force=True)
+        if self.sink == self.SINK.FILE:
+            self.__file_sink.close()
+        elif self.sink == self.SINK.MONGODB and self.__mongodb_sink.created:
+            return self.mongodb_sink.close(timeout)
+        return True
+
+    def stats(self) -> dict:
+        """
+        Counters of the MongoDB sink (queued, written, dropped, failed, pending), empty for the other sinks
+        :return: (dict)
+        """
+        if self.sink == self.SINK.MONGODB and self.__mongodb_sink.created:
+            return self.mongodb_sink.stats()
+        return dict()
 
     def __log_file(self, log: Log) -> bool:
         """
-        Write log to a txt file
+        Write log as compact NDJSON line to the buffered file sink
         """
         success = False
         try:
-            self.file_handle.write(json.dumps(log.to_json_string(), indent=4, ensure_ascii=False) + "\n")
-            success = True
+            success = self.file_sink.write(log.to_json_bytes())
         except Exception as e:
             pass
         return success
 
     def __log_mongodb(self, log: Log) -> bool:
         """
-        Write log to a txt file
+        Queue the log for the background writer of the MongoDB sink
         """
-        success = False
-        try:
-            log_dict = log.to_dict()
-            result = self.mongodb_collection.insert_one(log_dict)
-            id = result.inserted_id
-            success = True
-        except Exception as e:
-            pass
-        return success
+        return self.mongodb_sink.put(log.to_dict())
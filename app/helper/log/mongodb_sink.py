@@ -0,0 +1,174 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from enum import Enum
+
+# wakes up the background writer on close
+_STOP = object()
+
+
+class MongoDBSink:
+    """
+    Non-blocking MongoDB sink for the Logger.
+
+    Records are put into a bounded in-memory queue and written by a background thread with insert_many, either when
+    "batch_size" records are collected or "flush_interval" seconds after the first record of the batch.
+    put() never waits for the network, so logging from async routes does not block the event loop.
+    If the queue is full, the record is dropped (POLICY.DROP) or put() waits up to "block_timeout" seconds (POLICY.BLOCK).
+    Pending records are flushed on close(), which is registered with atexit.
+    """
+
+    class POLICY(Enum):
+        DROP = 0
+        BLOCK = 1
+
+    def __init__(self, collection, max_queue_size: int = 10000, batch_size: int = 500, flush_interval: float = 1.0,
+                 policy: POLICY = POLICY.DROP, block_timeout: float = None):
+        """
+        :param collection: (pymongo.collection.Collection) collection to write the records to
+        :param max_queue_size: (int) maximum number of records waiting to be written
+        :param batch_size: (int) maximum number of records per insert_many
+        :param flush_interval: (float) maximum time in seconds a record waits for its batch
+        :param policy: (POLICY) What should happen if the queue is full?
+        :param block_timeout: (float) maximum time in seconds put() waits if the policy is BLOCK, None waits forever
+        """
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.__queue = queue.Queue(maxsize=max_queue_size)
+        self.__lock = threading.Lock()
+        self.__flush = threading.Event()
+        self.__closed = threading.Event()
+        self.__pid = os.getpid()
+        self.__thread = threading.Thread(target=self.__run, name="MongoDBSink", daemon=True)
+        self.__thread.start()
+        atexit.register(self.close)
+
+    def put(self, record: dict) -> bool:
+        """
+        Queues a record for the background writer
+        :param record: (dict) log record
+        :return: [bool] False if the record was dropped
+        """
+        if self.__closed.is_set():
+            self.__count("dropped")
+            return False
+        try:
+            if self.policy == self.POLICY.BLOCK:
+                self.__queue.put(record, timeout=self.block_timeout)
+            else:
+                self.__queue.put_nowait(record)
+        except queue.Full:
+            self.__count("dropped")
+            return False
+        self.__count("queued")
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Writes all queued records immediately and waits until they are written
+        :param timeout: (float) maximum time in seconds to wait
+        :return: [bool] True if all records were written (or failed) within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        self.__flush.set()
+        while self.__queue.unfinished_tasks > 0:
+            if time.monotonic() >= deadline or not self.__thread.is_alive():
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout: float = 5.0) -> bool:
+        """
+        Flushes the queue and stops the background writer. Records which are put afterwards are dropped.
+        In a forked process the sink belongs to the parent, its queue is not written twice.
+        :param timeout: (float) maximum time in seconds to wait for the flush
+        :return: [bool] True if all records were written (or failed) within the timeout
+        """
+        if self.__closed.is_set() or self.__pid != os.getpid():
+            return True
+        flushed = self.flush(timeout)
+        self.__closed.set()
+        self.__flush.set()
+        try:
+            self.__queue.put_nowait(_STOP)
+        except queue.Full:
+            # the writer is busy and stops as soon as the queue is empty
+            pass
+        self.__thread.join(timeout)
+        atexit.unregister(self.close)
+        return flushed
+
+    def stats(self) -> dict:
+        """
+        Counters of the sink
+        :return: (dict)
+        """
+        return {
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "pending": self.__queue.unfinished_tasks,
+        }
+
+    def __count(self, counter: str, value: int = 1):
+        with self.__lock:
+            setattr(self, counter, getattr(self, counter) + value)
+
+    def __run(self):
+        """
+        Background writer: collects a batch and writes it with insert_many
+        """
+        while not (self.__closed.is_set() and self.__queue.empty()):
+            try:
+                record = self.__queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self.__flush.clear()
+                continue
+            if record is _STOP:
+                self.__queue.task_done()
+                continue
+            batch = [record]
+
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not self.__flush.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.__queue.get(timeout=min(remaining, 0.05)))
+                except queue.Empty:
+                    continue
+            # a flush writes everything which is already queued
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.__queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [record for record in batch if record is not _STOP]
+            if records:
+                self.__write(records)
+            for _ in batch:
+                self.__queue.task_done()
+            if self.__queue.empty():
+                self.__flush.clear()
+
+    def __write(self, batch: list):
+        """
+        Writes a batch, errors are counted but never raised (logging must not break the application)
+        """
+        try:
+            self.collection.insert_many(batch, ordered=False)
+            self.__count("written", len(batch))
+        except Exception as e:
+            self.__count("failed", len(batch))
@@ -0,0 +1,71 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter for log records, one bucket per key (e.g. (level, status_code, path)).
+
+    Every key may log "burst" records at once and "rate" records per second on average. Records above the limit are
+    suppressed and counted; summaries() hands the counts out ("N similar messages suppressed") once "summary_interval"
+    seconds have passed since the last summary. The Logger calls it on every log and from a background thread every
+    "summary_interval" seconds, so a summary is also written if no other log follows.
+    The number of buckets is bounded by "max_keys", the least recently created bucket is removed first.
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 10, summary_interval: float = 10.0, max_keys: int = 10000):
+        """
+        :param rate: (float) records per second and key
+        :param burst: (int) maximum number of records of a key at once
+        :param summary_interval: (float) maximum time in seconds until suppressed records are summarized
+        :param max_keys: (int) maximum number of buckets
+        """
+        self.rate = rate
+        self.burst = burst
+        self.summary_interval = summary_interval
+        self.max_keys = max_keys
+        self.suppressed_total = 0
+        # key: [tokens, time of the last refill]
+        self.__buckets = dict()
+        # key: number of suppressed records since the last summary
+        self.__suppressed = dict()
+        self.__next_summary = time.monotonic() + summary_interval
+        self.__lock = threading.Lock()
+
+    def allow(self, key: tuple) -> bool:
+        """
+        Takes a token from the bucket of the key
+        :param key: (tuple) key of the record, must be hashable
+        :return: [bool] False if the record has to be suppressed
+        """
+        now = time.monotonic()
+        with self.__lock:
+            bucket = self.__buckets.get(key)
+            if bucket is None:
+                if len(self.__buckets) >= self.max_keys:
+                    del self.__buckets[next(iter(self.__buckets))]
+                bucket = self.__buckets[key] = [float(self.burst), now]
+            else:
+                bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return True
+            self.__suppressed[key] = self.__suppressed.get(key, 0) + 1
+            self.suppressed_total += 1
+            return False
+
+    def summaries(self, force: bool = False) -> list:
+        """
+        Returns and resets the suppressed counts if the summary interval has elapsed
+        :param force: (bool) return the counts regardless of the summary interval
+        :return: list[(key, count)]
+        """
+        now = time.monotonic()
+        if not force and (now < self.__next_summary or not self.__suppressed):
+            return []
+        with self.__lock:
+            summaries = list(self.__suppressed.items())
+            self.__suppressed.clear()
+            self.__next_summary = now + self.summary_interval
+        return summaries
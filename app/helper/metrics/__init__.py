@@ -0,0 +1 @@
+name = "metrics"
\ No newline at end of file
@@ -0,0 +1,30 @@
+from app.helper.metrics.metrics import Counter, Gauge, Histogram
+
+"""
+Metrics of the application, see MetricsMiddleware and the /metrics route.
+"""
+
+REQUESTS = Counter("http_requests", "Number of http requests", ("method", "route", "status_code"))
+REQUEST_ERRORS = Counter("http_request_errors", "Number of http requests with a status code >= 500 or an exception",
+                         ("method", "route"))
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "Server side duration of the http requests",
+                             ("method", "route"))
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "Number of http requests in progress", ("method",))
+LOGGER_PENDING = Gauge("logger_queue_pending", "Number of logs waiting for the sink of the logger")
+LOGGER_DROPPED = Gauge("logger_records_dropped", "Number of logs the sink of the logger dropped (live workers)")
+BACKGROUND_TASKS = Counter("background_tasks", "Number of finished background tasks", ("task", "status"))
+BACKGROUND_TASKS_IN_PROGRESS = Gauge("background_tasks_in_progress", "Number of background tasks in progress",
+                                     ("task",))
+JOBS_QUEUED = Gauge("jobs_queued", "Number of jobs waiting in the queue of the job engine")
+JOBS_REJECTED = Counter("jobs_rejected", "Number of jobs rejected because the queue of the job engine was full",
+                        ("task",))
+
+
+def update_logger_metrics(logger):
+    """
+    Exports the counters of the logger sink of the current worker
+    :param logger: (Logger) logger of the application
+    """
+    stats = logger.stats()
+    LOGGER_PENDING.set(stats.get("pending", 0))
+    LOGGER_DROPPED.set(stats.get("dropped", 0))
@@ -0,0 +1,455 @@
+import fcntl
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from bisect import bisect_left
+
+"""
+Multi-process metrics in the Prometheus text format (counters, gauges and histograms).
+
+Every process (e.g. every gunicorn worker) writes its values into its own memory-mapped files in METRICS_DIR:
+    - counter_<pid>.db: counters and histograms, merged into counter_aggregate.db when the worker exits (the totals
+      must not decrease, but the directory must not grow with every recycled worker)
+    - gauge_<pid>.db: gauges, removed when the worker exits
+See mark_process_dead, it is called in the child_exit hook of gunicorn_conf.py.
+Any process can aggregate the files of all processes with REGISTRY.generate_latest(), the values are summed per sample.
+The aggregation holds a shared lock on "metrics.lock" and a merge an exclusive one, so a scrape never counts the values
+of an exited worker twice or not at all.
+
+The directory is taken from the environment variable METRICS_DIR. gunicorn_conf.py sets it for all workers, without it
+a temporary directory per process is used (single process, e.g. uvicorn or the tests).
+"""
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_INITIAL_SIZE = 1 << 16
+_AGGREGATE = "counter_aggregate.db"
+_LOCK = "metrics.lock"
+_HEADER = struct.Struct("<i")
+_VALUE = struct.Struct("<d")
+
+
+class MmapValues:
+    """
+    Memory-mapped file of float values by key, written by a single process.
+    Layout: used bytes (int32, padded to 8 bytes), then entries of key length (int32), key (padded to 8 bytes) and
+    value (float64, 8 byte aligned, so readers never see a torn value).
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: (str) path of the file, it is created or extended
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__file = open(path, "a+b")
+        size = os.fstat(self.__file.fileno()).st_size
+        if size < _INITIAL_SIZE:
+            self.__file.truncate(_INITIAL_SIZE)
+            size = _INITIAL_SIZE
+        self.__capacity = size
+        self.__mmap = mmap.mmap(self.__file.fileno(), size)
+        self.__positions = dict()
+        self.__used = _HEADER.unpack_from(self.__mmap, 0)[0]
+        if self.__used == 0:
+            self.__used = 8
+            _HEADER.pack_into(self.__mmap, 0, self.__used)
+        for key, _, position in _read_entries(self.__mmap, self.__used):
+            self.__positions[key] = position
+
+    def add(self, key: str, amount: float):
+        with self.__lock:
+            position = self.__position(key)
+            _VALUE.pack_into(self.__mmap, position, _VALUE.unpack_from(self.__mmap, position)[0] + amount)
+
+    def set(self, key: str, value: float):
+        with self.__lock:
+            _VALUE.pack_into(self.__mmap, self.__position(key), value)
+
+    def close(self):
+        with self.__lock:
+            self.__mmap.close()
+            self.__file.close()
+
+    def __position(self, key: str) -> int:
+        """
+        Returns the position of the value of the key, new keys are appended with the value 0
+        """
+        try:
+            return self.__positions[key]
+        except KeyError:
+            pass
+        encoded = key.encode("utf8")
+        padded = encoded + b" " * (7 - (len(encoded) + 3) % 8)
+        entry = _HEADER.pack(len(encoded)) + padded + _VALUE.pack(0.0)
+        while self.__used + len(entry) > self.__capacity:
+            self.__capacity *= 2
+            self.__mmap.close()
+            self.__file.truncate(self.__capacity)
+            self.__mmap = mmap.mmap(self.__file.fileno(), self.__capacity)
+        self.__mmap[self.__used:self.__used + len(entry)] = entry
+        position = self.__positions[key] = self.__used + len(entry) - 8
+        self.__used += len(entry)
+        # publish the entry after it is written completely
+        _HEADER.pack_into(self.__mmap, 0, self.__used)
+        return position
+
+
+def _read_entries(data, used: int):
+    """
+    Yields (key, value, position of the value) of the entries of a file
+    """
+    position = 8
+    while position < used:
+        length = _HEADER.unpack_from(data, position)[0]
+        key = bytes(data[position + 4:position + 4 + length]).decode("utf8")
+        position += 4 + length + (7 - (length + 3) % 8)
+        yield key, _VALUE.unpack_from(data, position)[0], position
+        position += 8
+
+
+def read_values(path: str) -> dict:
+    """
+    Reads all values of a metrics file
+    :param path: (str) path of the file
+    :return: (dict) key: value
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < 8:
+        return dict()
+    return {key: value for key, value, _ in _read_entries(data, _HEADER.unpack_from(data, 0)[0])}
+
+
+class MetricsRegistry:
+    """
+    Definitions of the metrics and the value files of the current process
+    """
+
+    def __init__(self, directory: str = None):
+        """
+        :param directory: (str) directory of the value files, defaults to the environment variable METRICS_DIR
+        """
+        self.__directory = directory
+        self.__metrics = dict()
+        self.__files = dict()
+        self.__pid = None
+        self.__lock = threading.Lock()
+
+    @property
+    def directory(self) -> str:
+        if self.__directory is None:
+            self.__directory = os.environ.get("METRICS_DIR") or tempfile.mkdtemp(prefix="metrics-")
+            os.makedirs(self.__directory, exist_ok=True)
+        return self.__directory
+
+    def register(self, metric: "_Metric"):
+        if metric.name in self.__metrics:
+            raise ValueError("The metric '" + metric.name + "' is already registered.")
+        self.__metrics[metric.name] = metric
+
+    def values(self, kind: str) -> MmapValues:
+        """
+        Returns the value file of the current process ("counter" or "gauge"), a forked process gets new files
+        """
+        pid = os.getpid()
+        if pid != self.__pid:
+            with self.__lock:
+                if pid != self.__pid:
+                    # the files of the parent belong to the parent, they are not closed here
+                    self.__files = dict()
+                    self.__pid = pid
+        try:
+            return self.__files[kind]
+        except KeyError:
+            with self.__lock:
+                if kind not in self.__files:
+                    path = os.path.join(self.directory, kind + "_" + str(pid) + ".db")
+                    self.__files[kind] = MmapValues(path)
+                return self.__files[kind]
+
+    def collect(self) -> dict:
+        """
+        Sums the values of all processes
+        :return: (dict) key: value
+        """
+        totals = dict()
+        with _locked(self.directory, fcntl.LOCK_SH):
+            for path in glob.glob(os.path.join(self.directory, "*.db")):
+                try:
+                    values = read_values(path)
+                except OSError:
+                    # removed in the meantime (exited worker)
+                    continue
+                for key, value in values.items():
+                    totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def generate_latest(self) -> str:
+        """
+        Returns all metrics of all processes in the Prometheus text format
+        :return: (str)
+        """
+        samples = dict()
+        for key, value in self.collect().items():
+            name, sample, labels = json.loads(key)
+            samples.setdefault(name, list()).append((sample, labels, value))
+
+        lines = list()
+        for name, metric in sorted(self.__metrics.items()):
+            lines.append("# HELP " + name + " " + metric.documentation.replace("\\", "\\\\").replace("\n", "\\n"))
+            lines.append("# TYPE " + name + " " + metric.TYPE)
+            lines.extend(metric.expose(samples.get(name, [])))
+        return "\n".join(lines) + "\n"
+
+
+class _locked:
+    """
+    flock on the lock file of a metrics directory, shared for readers and exclusive for merges
+    """
+
+    def __init__(self, directory: str, operation: int):
+        self.__path = os.path.join(directory, _LOCK)
+        self.__operation = operation
+
+    def __enter__(self):
+        self.__file = open(self.__path, "a+b")
+        fcntl.flock(self.__file.fileno(), self.__operation)
+        return self
+
+    def __exit__(self, *exc_info):
+        # closing the file releases the lock
+        self.__file.close()
+
+
+def mark_process_dead(pid: int, directory: str = None):
+    """
+    Merges the counters of an exited process into counter_aggregate.db and removes its files, use it in the
+    child_exit hook of gunicorn (only one process may merge at a time, e.g. the master)
+    :param pid: (int) process id of the exited worker
+    :param directory: (str) directory of the value files, defaults to the environment variable METRICS_DIR
+    """
+    directory = directory or os.environ.get("METRICS_DIR")
+    if not directory:
+        return
+    try:
+        os.remove(os.path.join(directory, "gauge_" + str(pid) + ".db"))
+    except FileNotFoundError:
+        pass
+    path = os.path.join(directory, "counter_" + str(pid) + ".db")
+    try:
+        values = read_values(path)
+    except FileNotFoundError:
+        return
+    with _locked(directory, fcntl.LOCK_EX):
+        aggregate = MmapValues(os.path.join(directory, _AGGREGATE))
+        try:
+            for key, value in values.items():
+                aggregate.add(key, value)
+        finally:
+            aggregate.close()
+        os.remove(path)
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Metric:
+    """
+    Base of the metric types: a metric with labels has one child per combination of label values
+    """
+    TYPE = ""
+    KIND = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), registry: MetricsRegistry = REGISTRY):
+        """
+        :param name: (str) name of the metric
+        :param documentation: (str) help text
+        :param labelnames: (tuple) names of the labels
+        :param registry: (MetricsRegistry) registry of the metric
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        self.__children = dict()
+        registry.register(self)
+
+    def labels(self, *values, **kwargs):
+        """
+        Returns the child of the given label values (by position or name)
+        """
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        values = tuple(str(value) for value in values)
+        try:
+            return self.__children[values]
+        except KeyError:
+            if len(values) != len(self.labelnames):
+                raise ValueError("The metric '" + self.name + "' has the labels " + str(self.labelnames))
+            child = self.__children[values] = self._child(list(zip(self.labelnames, values)))
+            return child
+
+    def _child(self, labels: list):
+        raise NotImplementedError
+
+    def _key(self, sample: str, labels: list) -> str:
+        return json.dumps([self.name, sample, labels])
+
+    def _values(self) -> MmapValues:
+        return self.registry.values(self.KIND)
+
+    def expose(self, samples: list) -> list:
+        """
+        Text format of the aggregated samples
+        """
+        return [_sample_line(sample, labels, value) for sample, labels, value in sorted(samples)]
+
+
+class _CounterChild:
+    def __init__(self, metric: "Counter", labels: list):
+        self.__metric = metric
+        self.__key = metric._key(metric.name + "_total", labels)
+
+    def inc(self, amount: float = 1.0):
+        if amount < 0:
+            raise ValueError("Counters can only be increased.")
+        self.__metric._values().add(self.__key, amount)
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter, exposed as <name>_total
+    """
+    TYPE = "counter"
+
+    def _child(self, labels: list):
+        return _CounterChild(self, labels)
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self, metric: "Gauge", labels: list):
+        self.__metric = metric
+        self.__key = metric._key(metric.name, labels)
+
+    def inc(self, amount: float = 1.0):
+        self.__metric._values().add(self.__key, amount)
+
+    def dec(self, amount: float = 1.0):
+        self.__metric._values().add(self.__key, -amount)
+
+    def set(self, value: float):
+        self.__metric._values().set(self.__key, value)
+
+
+class Gauge(_Metric):
+    """
+    Gauge, the values of the live processes are summed
+    """
+    TYPE = "gauge"
+    KIND = "gauge"
+
+    def _child(self, labels: list):
+        return _GaugeChild(self, labels)
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    def __init__(self, metric: "Histogram", labels: list):
+        self.__metric = metric
+        self.__buckets = metric.buckets
+        self.__bucket_keys = [metric._key(metric.name + "_bucket", labels + [["le", _format_value(bound)]])
+                              for bound in metric.buckets]
+        self.__sum_key = metric._key(metric.name + "_sum", labels)
+        self.__count_key = metric._key(metric.name + "_count", labels)
+
+    def observe(self, value: float):
+        values = self.__metric._values()
+        values.add(self.__bucket_keys[bisect_left(self.__buckets, value)], 1.0)
+        values.add(self.__sum_key, value)
+        values.add(self.__count_key, 1.0)
+
+
+class Histogram(_Metric):
+    """
+    Histogram with fixed buckets, the buckets are stored per bucket and exposed cumulative
+    """
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), registry: MetricsRegistry = REGISTRY,
+                 buckets: tuple = DEFAULT_BUCKETS):
+        """
+        :param buckets: (tuple) upper bounds of the buckets, +Inf is added
+        """
+        self.buckets = tuple(sorted(float(bound) for bound in buckets if bound != math.inf)) + (math.inf,)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _child(self, labels: list):
+        return _HistogramChild(self, labels)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def expose(self, samples: list) -> list:
+        # group the buckets per label set and make them cumulative
+        series = dict()
+        for sample, labels, value in samples:
+            le = None
+            if sample.endswith("_bucket"):
+                le = dict((name, label) for name, label in labels)["le"]
+                labels = [label for label in labels if label[0] != "le"]
+            entry = series.setdefault(json.dumps(labels), {"labels": labels, "buckets": dict(), "sum": 0.0,
+                                                          "count": 0.0})
+            if le is not None:
+                entry["buckets"][le] = value
+            elif sample.endswith("_sum"):
+                entry["sum"] = value
+            else:
+                entry["count"] = value
+
+        lines = list()
+        for _, entry in sorted(series.items()):
+            cumulative = 0.0
+            for bound in self.buckets:
+                cumulative += entry["buckets"].get(_format_value(bound), 0.0)
+                lines.append(_sample_line(self.name + "_bucket", entry["labels"] + [["le", _format_value(bound)]],
+                                          cumulative))
+            lines.append(_sample_line(self.name + "_sum", entry["labels"], entry["sum"]))
+            lines.append(_sample_line(self.name + "_count", entry["labels"], entry["count"]))
+        return lines
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _sample_line(sample: str, labels: list, value: float) -> str:
+    if labels:
+        sample += "{" + ",".join(
+            name + '="' + label.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"'
+            for name, label in labels
+        ) + "}"
+    return sample + " " + _format_value(value)
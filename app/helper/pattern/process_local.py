@@ -0,0 +1,92 @@
+import gc
+import os
+import threading
+import weakref
+
+"""
+Per-process resources which are created lazily and recreated after a fork.
+
+Threads do not survive a fork and sockets (e.g. of a pymongo MongoClient) or file buffers must not be shared between
+processes. With PRELOAD_APP=true the gunicorn master imports the app once and forks the workers, so everything which is
+created at import (e.g. the Config and its Logger) is shared. A ProcessLocal creates its value on first use in every
+process, the value of the parent is dropped in the forked process without closing it (it belongs to the parent).
+freeze() is called by the master before the workers are forked, see when_ready in gunicorn_conf.py.
+"""
+
+# all process local resources, they are reset in a forked process
+_resources = weakref.WeakSet()
+
+
+class ProcessLocal:
+    """
+    Lazily created resource of the current process, use it like:
+        client = ProcessLocal(lambda: MongoClient(url), close=lambda client: client.close())
+        client.get().db.collection.insert_one(...)
+    """
+
+    def __init__(self, factory, close=None):
+        """
+        :param factory: (callable) creates the resource, called without arguments once per process
+        :param close: (callable) closes the resource, called with the resource by close(), optional
+        """
+        self.factory = factory
+        self.close_resource = close
+        self.__value = None
+        self.__pid = None
+        self.__lock = threading.Lock()
+        _resources.add(self)
+
+    def get(self):
+        """
+        Returns the resource of the current process, it is created on the first call
+        """
+        if self.__pid != os.getpid():
+            with self.__lock:
+                if self.__pid != os.getpid():
+                    self.__value = self.factory()
+                    self.__pid = os.getpid()
+        return self.__value
+
+    @property
+    def created(self) -> bool:
+        """
+        Was the resource created in the current process?
+        :return: (bool)
+        """
+        return self.__pid == os.getpid()
+
+    def close(self):
+        """
+        Closes the resource of the current process if it was created, the next get() creates a new one
+        """
+        with self.__lock:
+            if self.__pid == os.getpid() and self.close_resource is not None:
+                self.close_resource(self.__value)
+            self.__value = None
+            self.__pid = None
+
+    def _after_fork(self):
+        """
+        Drops the resource of the parent, the lock may have been held by a thread of the parent
+        """
+        self.__lock = threading.Lock()
+        self.__value = None
+        self.__pid = None
+
+
+def freeze():
+    """
+    Collects the garbage and moves all objects into the permanent generation of the gc. The gc of the forked processes
+    does not touch them anymore, so their memory pages stay shared copy-on-write.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def _after_fork_in_child():
+    for resource in list(_resources):
+        resource._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -1,7 +1,23 @@
+import os
+import threading
+import weakref
+
+"""
+Thread-safe singletons, e.g. the Config.
+
+The instance of a singleton is state which is shared with forked processes (e.g. the parsed configuration which the
+gunicorn master creates with PRELOAD_APP=true), it is kept after a fork. Resources which must not be shared with a
+forked process (threads, sockets, file buffers) are wrapped in a ProcessLocal, see process_local.py.
+"""
+
+# all singleton classes, their locks are recreated in a forked process
+_classes = weakref.WeakSet()
+
+
 class Singleton(type):
     """
     Singleton pattern, use it like: class Class(metaclass=Singleton):
-    Only one instance of the singleton class can exist
+    Only one instance of the singleton class can exist, also if several threads create it at the same time.
     https://stackoverflow.com/questions/29697870/how-to-always-use-the-same-instance-of-a-class-in-python
     """
     def __init__(self, *args, **kwargs):
@@ -11,6 +27,9 @@ class Singleton(type):
         :param kwargs:
         """
         self.__instance = None
+        # reentrant: the __init__ of the instance may create other singletons
+        self.__lock = threading.RLock()
+        _classes.add(self)
         super().__init__(*args, **kwargs)
 
     def __call__(self, *args, **kwargs):
@@ -20,8 +39,26 @@ class Singleton(type):
         :param kwargs:
         :return:
         """
-        if self.__instance is None:
-            self.__instance = super().__call__(*args, **kwargs)
-            return self.__instance
-        else:
-            return self.__instance
+        # no lock once the instance exists
+        instance = self.__instance
+        if instance is None:
+            with self.__lock:
+                if self.__instance is None:
+                    self.__instance = super().__call__(*args, **kwargs)
+                instance = self.__instance
+        return instance
+
+    def _after_fork(self):
+        """
+        The lock may have been held by a thread of the parent which does not exist in the forked process
+        """
+        self.__lock = threading.RLock()
+
+
+def _after_fork_in_child():
+    for cls in list(_classes):
+        cls._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1 @@
+name = "profiling"
\ No newline at end of file
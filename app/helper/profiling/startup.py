@@ -0,0 +1,154 @@
+import builtins
+import os
+import sys
+import threading
+import time
+
+"""
+Startup profiler of a worker: import-time breakdown and time to the first request.
+
+enable() wraps builtins.__import__ and measures every module which is imported for the first time (cumulative time
+incl. its own imports and self time). It is enabled with the environment variable STARTUP_PROFILE=true, see
+enable_from_env() at the top of main.py and the post_fork hook in gunicorn_conf.py. Only the standard library is
+imported here, so it can run before everything else.
+The time to the first request is measured from the start of the process (/proc/self/stat), see
+StartupProfilerMiddleware. report() returns both, e.g. for "/actuator/startup".
+"""
+
+_original_import = builtins.__import__
+# module: [cumulative seconds, self seconds, nesting depth]
+_imports = dict()
+_local = threading.local()
+_state = {"enabled": False, "first_request": None, "pid": None, "process_start": None}
+
+
+def enable_from_env():
+    """
+    Enables the import profiler if the environment variable STARTUP_PROFILE is "true"
+    """
+    if os.getenv("STARTUP_PROFILE", "false").lower().strip() == "true":
+        enable()
+
+
+def enable():
+    """
+    Starts to measure the imports of this process
+    """
+    if not _state["enabled"]:
+        _state["enabled"] = True
+        builtins.__import__ = _timed_import
+
+
+def disable():
+    """
+    Stops to measure the imports, the measured imports are kept
+    """
+    if _state["enabled"]:
+        _state["enabled"] = False
+        builtins.__import__ = _original_import
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """
+    builtins.__import__ which measures the modules (and the submodules of "from package import module") which are not
+    imported yet
+    """
+    if level:
+        return _original_import(name, globals, locals, fromlist, level)
+    if name not in sys.modules:
+        _measure(name)
+    module = sys.modules.get(name)
+    if fromlist and module is not None and hasattr(module, "__path__"):
+        for item in fromlist:
+            if item != "*" and not hasattr(module, item) and name + "." + item not in sys.modules:
+                try:
+                    _measure(name + "." + item)
+                except ImportError:
+                    # not a submodule, the import below handles it
+                    pass
+    return _original_import(name, globals, locals, fromlist, level)
+
+
+def _measure(name: str):
+    """
+    Imports the module and stores its cumulative and self time
+    """
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = list()
+    # [start, time of the nested imports]
+    frame = [time.perf_counter(), 0.0]
+    stack.append(frame)
+    try:
+        _original_import(name)
+    finally:
+        stack.pop()
+        cumulative = time.perf_counter() - frame[0]
+        if stack:
+            stack[-1][1] += cumulative
+        _imports.setdefault(name, [cumulative, cumulative - frame[1], len(stack)])
+
+
+def process_start() -> float:
+    """
+    Start of the current process as epoch seconds (the fork in case of a gunicorn worker)
+    :return: (float)
+    """
+    if _state["pid"] != os.getpid():
+        _state["pid"] = os.getpid()
+        try:
+            with open("/proc/self/stat", "r") as file:
+                # the fields after the name of the executable, "starttime" is the 22th field
+                start_ticks = int(file.read().rpartition(")")[2].split()[19])
+            with open("/proc/stat", "r") as file:
+                boot_time = next(int(line.split()[1]) for line in file if line.startswith("btime"))
+            _state["process_start"] = boot_time + start_ticks / os.sysconf("SC_CLK_TCK")
+        except (OSError, ValueError, IndexError, StopIteration):
+            # not linux: the first call is the best guess
+            _state["process_start"] = time.time()
+    return _state["process_start"]
+
+
+def first_request_done() -> bool:
+    """
+    Marks the end of the first request of this process, called by StartupProfilerMiddleware
+    :return: [bool] True if it was the first request
+    """
+    if _state["first_request"] is not None and _state["first_request"][0] == os.getpid():
+        return False
+    _state["first_request"] = (os.getpid(), time.time())
+    return True
+
+
+def report(top: int = 15) -> dict:
+    """
+    Startup report of the process
+    :param top: (int) number of modules in the import breakdown
+    :return: (dict) time to the first request and the slowest imports in milliseconds
+    """
+    first_request = _state["first_request"]
+    if first_request is not None and first_request[0] == os.getpid():
+        time_to_first_request = round(first_request[1] - process_start(), 3)
+    else:
+        time_to_first_request = None
+    # the outermost imports sum up to the whole import time
+    outermost = [(name, values) for name, values in _imports.items() if values[2] == 0]
+    return {
+        "pid": os.getpid(),
+        "profiler_enabled": _state["enabled"],
+        "uptime_seconds": round(time.time() - process_start(), 3),
+        "time_to_first_request_seconds": time_to_first_request,
+        "import_seconds": round(sum(values[0] for _, values in outermost), 3),
+        "imported_modules": len(_imports),
+        # the imports of the outermost modules (e.g. of app.main)
+        "top_cumulative_ms": _top([item for item in _imports.items() if item[1][2] == 1] or outermost, 0, top),
+        "top_self_ms": _top(_imports.items(), 1, top),
+    }
+
+
+def _top(imports, index: int, top: int) -> dict:
+    """
+    The "top" modules with the highest cumulative (index 0) or self (index 1) time
+    """
+    slowest = sorted(imports, key=lambda item: item[1][index], reverse=True)[:top]
+    return {name: round(values[index] * 1000, 1) for name, values in slowest}
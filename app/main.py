@@ -1,8 +1,16 @@
 
+# measure the imports of the worker if STARTUP_PROFILE=true, has to run before the other imports
+from app.helper.profiling import startup
+startup.enable_from_env()
+
+import asyncio
 from fastapi import FastAPI
 from app.configuration.getConfig import Config
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.request_logging import RequestLoggingMiddleware
+from app.middleware.startup import StartupProfilerMiddleware
 # routers
-from app.routers import config, benchmark
+from app.routers import config, benchmark, anonymize, metrics, jobs
 
 # get the config file
 configuration = Config()
@@ -17,9 +25,41 @@ app = FastAPI(
 )
 
 
+# trace id and access log of every request, the health checks of K8S are not logged
+app.add_middleware(RequestLoggingMiddleware, logger=configuration.logger,
+                   exclude_paths=["/actuator/health", "/actuator/health/", "/actuator/health/liveness",
+                                  "/actuator/health/readiness", "/metrics"])
+# request rates, latencies and requests in progress of all workers, see "/metrics"
+app.add_middleware(MetricsMiddleware, logger=configuration.logger, exclude_paths=["/metrics"])
+# time to the first request and import breakdown of the worker, see "/actuator/startup"
+app.add_middleware(StartupProfilerMiddleware, logger=configuration.logger)
+
 # include the routers
 app.include_router(config.router)
 app.include_router(benchmark.router)
+app.include_router(anonymize.router)
+app.include_router(metrics.router)
+app.include_router(jobs.router)
+
+
+@app.on_event("startup")
+async def startup_event():
+    """
+    Reload the configuration of this worker if the config.ini or the version.txt changes and import the rule sets in
+    the background (not on the event loop of the first request)
+    """
+    configuration.watcher.start()
+    asyncio.get_running_loop().run_in_executor(None, anonymize.warm_up)
+
+
+@app.on_event("shutdown")
+def shutdown():
+    """
+    Cancel the pending jobs and write the pending logs before the worker exits
+    """
+    configuration.watcher.stop()
+    configuration.job_engine.shutdown()
+    configuration.logger.close()
 
 
 # needed to start the application locally for development/debugging purpose. Will never be called on K8s.
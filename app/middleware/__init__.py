@@ -0,0 +1 @@
+name = "middleware"
\ No newline at end of file
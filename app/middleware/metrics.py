@@ -0,0 +1,81 @@
+import time
+from app.helper.log.logger import Logger
+from app.helper.metrics.instruments import REQUESTS, REQUEST_ERRORS, REQUEST_DURATION, REQUESTS_IN_PROGRESS, \
+    update_logger_metrics
+
+"""
+ASGI middleware which records the request metrics of every request, see app.helper.metrics.
+The requests are labeled with the route template (e.g. "/jobs/{uuid}") instead of the path to keep the number of
+series bounded, requests without a matching route are labeled "<unmatched>".
+"""
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Use it like: app.add_middleware(MetricsMiddleware, logger=configuration.logger)
+    """
+
+    def __init__(self, app, logger: Logger = None, exclude_paths: list = None):
+        """
+        :param app: ASGI application
+        :param logger: (Logger, optional) logger whose queue depth is exported after every request
+        :param exclude_paths: (list) paths without metrics (e.g. /metrics itself)
+        """
+        self.app = app
+        self.logger = logger
+        self.exclude_paths = frozenset(exclude_paths or [])
+        self.__routes = dict()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        method = scope["method"]
+        status = {"code": 500}
+        # the route is known only after the routing, so the requests in progress are counted per method
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status["code"] = 500
+            raise
+        finally:
+            in_progress.dec()
+            route = self.route(scope)
+            REQUESTS.labels(method, route, status["code"]).inc()
+            REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - start)
+            if status["code"] >= 500:
+                REQUEST_ERRORS.labels(method, route).inc()
+            if self.logger is not None:
+                update_logger_metrics(self.logger)
+
+    def route(self, scope: dict) -> str:
+        """
+        Returns the route template of the endpoint the router has chosen for the request
+        """
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        try:
+            return self.__routes[endpoint]
+        except KeyError:
+            pass
+        route = UNMATCHED_ROUTE
+        router = scope.get("router")
+        for candidate in getattr(router, "routes", []):
+            if getattr(candidate, "endpoint", None) is endpoint:
+                route = candidate.path
+                break
+        self.__routes[endpoint] = route
+        return route
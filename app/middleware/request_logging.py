@@ -0,0 +1,131 @@
+import re
+import time
+from urllib.parse import parse_qsl
+from uuid import uuid4
+from app.helper.log.context import bind_request, reset_request
+from app.helper.log.logger import Logger
+
+"""
+ASGI middleware which binds the log context of every request and writes one access log per request.
+
+The trace id is taken from the first of the headers X-Trace-Id, traceparent (W3C trace context) and X-Request-Id or
+generated, and returned in the response header X-Trace-Id. Every Logger.log call during the request gets the trace id,
+a request uuid and the path automatically, see app.helper.log.context.
+The query string can contain the personal data which the service anonymizes, so it is not logged by default. With
+log_query it is logged with redacted values (only the names of the parameters), see redact_query.
+"""
+
+# W3C trace context: version-trace_id-parent_id-flags
+_TRACEPARENT_RE = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}$")
+# maximum length of a trace id taken from a header
+MAX_TRACE_ID_LENGTH = 128
+# replaces the values of the query parameters in the access log
+REDACTED = "***"
+
+
+class RequestLoggingMiddleware:
+    """
+    Use it like: app.add_middleware(RequestLoggingMiddleware, logger=configuration.logger)
+    """
+
+    def __init__(self, app, logger: Logger, exclude_paths: list = None, trace_header: str = "X-Trace-Id",
+                 log_query: bool = False, redact_query: bool = True):
+        """
+        :param app: ASGI application
+        :param logger: (Logger) logger of the access logs
+        :param exclude_paths: (list) paths without access log (e.g. health checks), the context is bound anyway
+        :param trace_header: (str) response header with the trace id
+        :param log_query: (bool) logs the query string, by default only the path is logged
+        :param redact_query: (bool) replaces the values of the logged query string, False logs it as it is
+        """
+        self.app = app
+        self.logger = logger
+        self.exclude_paths = frozenset(exclude_paths or [])
+        self.trace_header = trace_header.lower().encode("latin-1")
+        self.log_query = log_query
+        self.redact_query = redact_query
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter_ns()
+        trace_id = get_trace_id(scope["headers"])
+        request_uuid = uuid4().hex
+        path = scope["path"]
+        token = bind_request(trace_id, request_uuid, path)
+        response = {"status_code": 500, "bytes": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status_code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + \
+                    [(self.trace_header, trace_id.encode("latin-1"))]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            self.__log_access(Logger.LEVEL.ERROR, scope, response, start)
+            raise
+        else:
+            if path not in self.exclude_paths:
+                self.__log_access(Logger.LEVEL.INFO, scope, response, start)
+        finally:
+            reset_request(token)
+
+    def __log_access(self, level: Logger.LEVEL, scope: dict, response: dict, start: int):
+        """
+        Writes the access log, the message is only created if the level is logged
+        """
+        duration_ms = (time.perf_counter_ns() - start) / 1e6
+
+        def message() -> dict:
+            client = scope.get("client")
+            access = {
+                "type": "access",
+                "method": scope["method"],
+                "path": scope["path"],
+                "status_code": response["status_code"],
+                "response_bytes": response["bytes"],
+                "duration_ms": round(duration_ms, 3),
+                "client": client[0] if client else None,
+            }
+            if self.log_query:
+                query = scope["query_string"].decode("latin-1")
+                access["query"] = redact_query(query) if self.redact_query else query
+            return access
+
+        self.logger.log(level, response["status_code"], message)
+
+
+def redact_query(query: str) -> str:
+    """
+    Replaces the values of a query string, e.g. "name=Jane&plz=12345" -> "name=***&plz=***"
+    :param query: (str) query string
+    :return: (str)
+    """
+    return "&".join(name + "=" + REDACTED for name, _ in parse_qsl(query, keep_blank_values=True))
+
+
+def get_trace_id(headers: list) -> str:
+    """
+    Returns the trace id of the request headers or a new one
+    :param headers: (list) ASGI headers [(name, value)] with lower case names
+    :return: (str)
+    """
+    values = dict()
+    for name, value in headers:
+        if name in (b"x-trace-id", b"traceparent", b"x-request-id"):
+            values.setdefault(name, value.decode("latin-1").strip())
+
+    trace_id = values.get(b"x-trace-id")
+    if not trace_id:
+        match = _TRACEPARENT_RE.match(values.get(b"traceparent", ""))
+        trace_id = match.group(1) if match else values.get(b"x-request-id")
+    if trace_id and len(trace_id) <= MAX_TRACE_ID_LENGTH and trace_id.isprintable():
+        return trace_id
+    return uuid4().hex
@@ -0,0 +1,37 @@
+from app.helper.log.logger import Logger
+from app.helper.profiling import startup
+
+"""
+ASGI middleware which measures the time from the start of the worker process to its first finished request and logs
+the startup report once, see app.helper.profiling.startup. Afterwards it only passes the requests through.
+"""
+
+
+class StartupProfilerMiddleware:
+    """
+    Use it like: app.add_middleware(StartupProfilerMiddleware, logger=configuration.logger)
+    """
+
+    def __init__(self, app, logger: Logger = None):
+        """
+        :param app: ASGI application
+        :param logger: (Logger, optional) logger of the startup report
+        """
+        self.app = app
+        self.logger = logger
+        self.__pending = True
+
+    async def __call__(self, scope, receive, send):
+        if not self.__pending or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.__pending = False
+            if startup.first_request_done():
+                # the imports of the requests are not part of the startup
+                startup.disable()
+                if self.logger is not None:
+                    self.logger.log(Logger.LEVEL.INFO, 200, lambda: dict(startup.report(), type="startup"),
+                                    "app.middleware.startup.StartupProfilerMiddleware")
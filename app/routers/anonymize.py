@@ -0,0 +1,190 @@
+import json
+from typing import TYPE_CHECKING, AsyncIterator, List
+from fastapi import APIRouter, Body, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from starlette.types import Receive, Scope, Send
+from app.configuration.getConfig import Config
+from app.helper.jobs.jobs import PROCESS, QueueFullError
+
+if TYPE_CHECKING:
+    from app.helper.anonymize.Anonymize import Anonymize
+
+# get the config file
+configuration = Config()
+
+# SET THE API-ID: DO NOT CHANGE THIS!
+API_ID = configuration.API_ID
+API_VERSION = configuration.API_VERSION
+
+# fastAPI Instance
+router = APIRouter()
+
+# Logger
+logger = configuration.logger
+
+# Maximum length of a single NDJSON line in bytes, bounds the memory per request.
+MAX_LINE_BYTES = 1024 * 1024
+
+
+def get_rule_set(name: str) -> "Anonymize":
+    """
+    Returns the rule set or None, the rule sets (and pandas, dateparser etc.) are imported on first use. Call it with
+    run_in_threadpool from async routes, the first import takes several hundred milliseconds.
+    """
+    from app.helper.anonymize.RuleSets import get_rule_set as get_named_rule_set
+    return get_named_rule_set(name)
+
+
+def get_rule_set_names() -> list:
+    """
+    Returns the names of the rule sets, see get_rule_set
+    """
+    from app.helper.anonymize.RuleSets import RULE_SETS
+    return list(RULE_SETS.keys())
+
+
+def warm_up():
+    """
+    Imports the rule sets, called in the background after the start of a worker (see main.py), so the first request
+    does not wait for the import
+    """
+    import app.helper.anonymize.RuleSets  # noqa: F401
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for a body iterator which reads the request body itself.
+    The default StreamingResponse listens for the client disconnect on the receive channel at the same time and would
+    swallow the chunks of the request body. Here the disconnect is noticed by request.stream() instead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@router.get("/anonymize/rule_sets", tags=["anonymize"])
+async def rule_sets() -> list:
+    """
+    Returns the names of the available rule sets
+    """
+    return await run_in_threadpool(get_rule_set_names)
+
+
+@router.post("/anonymize/stream/{rule_set}", tags=["anonymize"])
+async def anonymize_stream(rule_set: str, request: Request) -> StreamingResponse:
+    """
+    Anonymizes a NDJSON request body (one json object per line) with the given rule set.
+    The body is read incrementally and every anonymized record is sent back as soon as its line is complete,
+    so the response starts before the upload is finished.
+    Lines which can't be processed are answered with {"error": ..., "line": ...}.
+    :param rule_set: name of the rule set, see /anonymize/rule_sets
+    :param request:
+    :return: NDJSON stream
+    """
+    anonymize = await run_in_threadpool(get_rule_set, rule_set)
+    if anonymize is None:
+        raise HTTPException(status_code=404, detail="Unknown rule set '" + rule_set + "'")
+    return RequestStreamingResponse(anonymize_ndjson(request.stream(), anonymize), media_type="application/x-ndjson")
+
+
+async def anonymize_ndjson(body: AsyncIterator[bytes], anonymize: "Anonymize") -> AsyncIterator[bytes]:
+    """
+    Splits the incoming chunks into lines and yields the anonymized records of every chunk.
+    The lines of a chunk are anonymized in the thread pool, so the CPU bound rules do not block the event loop.
+    :param body: chunks of the request body
+    :param anonymize: rule set
+    :return: NDJSON lines
+    """
+    # the incomplete last line, only the new bytes of a chunk are searched for line breaks
+    partial = bytearray()
+    line_number = 0
+    try:
+        async for chunk in body:
+            end = chunk.rfind(b"\n")
+            if end < 0:
+                partial += chunk
+                if len(partial) > MAX_LINE_BYTES:
+                    yield error_line(line_number + 1, "Line exceeds " + str(MAX_LINE_BYTES) + " bytes")
+                    return
+                continue
+            lines = chunk[:end].split(b"\n")
+            lines[0] = bytes(partial) + lines[0]
+            partial = bytearray(chunk[end + 1:])
+            if len(partial) > MAX_LINE_BYTES:
+                yield error_line(line_number + len(lines) + 1, "Line exceeds " + str(MAX_LINE_BYTES) + " bytes")
+                return
+            output = await run_in_threadpool(anonymize_lines, lines, line_number, anonymize)
+            line_number += len(lines)
+            if output:
+                yield output
+    except ClientDisconnect:
+        return
+    if partial.strip():
+        yield await run_in_threadpool(anonymize_line, bytes(partial), line_number + 1, anonymize)
+
+
+def anonymize_lines(lines: List[bytes], line_number: int, anonymize: "Anonymize") -> bytes:
+    """
+    Anonymizes the complete lines of a chunk
+    :param lines: NDJSON lines without line breaks
+    :param line_number: number of the line before the first line
+    :return: anonymized NDJSON lines
+    """
+    return b"".join(anonymize_line(line, line_number + i, anonymize) for i, line in enumerate(lines, start=1))
+
+
+@router.post("/anonymize/job/{rule_set}", tags=["anonymize"], status_code=202)
+async def anonymize_job(rule_set: str, records: List[dict] = Body(...)) -> dict:
+    """
+    Anonymizes a list of json objects with the given rule set in the process pool of the job engine.
+    The anonymized records are available under "/jobs/{uuid}/result", status code 429 if the job queue is full.
+    :param rule_set: name of the rule set, see /anonymize/rule_sets
+    :param records: json objects
+    :return: status of the job
+    """
+    if await run_in_threadpool(get_rule_set, rule_set) is None:
+        raise HTTPException(status_code=404, detail="Unknown rule set '" + rule_set + "'")
+    try:
+        job = configuration.job_engine.submit(anonymize_records, (rule_set, records), executor=PROCESS)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    return job.to_dict()
+
+
+def anonymize_records(rule_set: str, records: list) -> list:
+    """
+    Job of anonymize_job, runs in a worker process
+    :param rule_set: name of the rule set
+    :param records: json objects
+    :return: anonymized json objects
+    """
+    anonymize = get_rule_set(rule_set)
+    return [anonymize.perform_anonymization(record) for record in records]
+
+
+def anonymize_line(line: bytes, line_number: int, anonymize: "Anonymize") -> bytes:
+    """
+    Anonymizes a single NDJSON line
+    :return: anonymized NDJSON line, an empty line stays empty
+    """
+    if not line.strip():
+        return b""
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return error_line(line_number, "Invalid json: " + str(e))
+    if type(record) != dict:
+        return error_line(line_number, "Only json objects are supported")
+    anon = anonymize.perform_anonymization(record)
+    return json.dumps(anon, ensure_ascii=False, default=str).encode("utf8") + b"\n"
+
+
+def error_line(line_number: int, message: str) -> bytes:
+    """
+    NDJSON line which reports a line that could not be processed
+    """
+    return json.dumps({"error": message, "line": line_number}).encode("utf8") + b"\n"
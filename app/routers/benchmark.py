@@ -2,9 +2,10 @@ import datetime
 from asyncio import sleep
 from uuid import uuid4
 
-from fastapi import Depends, APIRouter, Body
-from fastapi import BackgroundTasks
+from fastapi import Depends, APIRouter, Body, HTTPException
 from app.configuration.getConfig import Config
+from app.helper.cache.response_cache import cached_response
+from app.helper.jobs.jobs import QueueFullError
 from app.model.BenchmarkModel import Benchmark
 
 # get the config file
@@ -30,6 +31,7 @@ async def plaintext_hi():
 
 
 @router.get("/benchmark/json", tags=["benchmark"])
+@cached_response(ttl=lambda: configuration.response_cache_ttl)
 async def json_response():
     """
     Returns the configuration of the webservice
@@ -57,16 +59,19 @@ async def wait_for_seconds(seconds: int, uuid_: str ):
 
 
 @router.post("/benchmark/backgroundtask/immediate_response", tags=["benchmark"])
-async def backgroundtask_immediate_response(seconds_to_wait_on_server_side: int = 5,
-                                            backgroundtasks: BackgroundTasks = BackgroundTasks()):
+async def backgroundtask_immediate_response(seconds_to_wait_on_server_side: int = 5):
     """
-
+    Queues a job in the job engine and responds immediately, the status is available under "/jobs/{uuid}".
+    Status code 429 if the job queue is full.
     :param seconds_to_wait_on_server_side:
     :return:
     """
     uuid_: str = str(uuid4())
     received = datetime.datetime.now()
-    backgroundtasks.add_task(wait_for_seconds, seconds_to_wait_on_server_side, uuid_)
+    try:
+        configuration.job_engine.submit(wait_for_seconds, (seconds_to_wait_on_server_side, uuid_), uuid=uuid_)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     response = datetime.datetime.now()
     timedelta = response - received
     return {
@@ -74,5 +79,5 @@ async def backgroundtask_immediate_response(seconds_to_wait_on_server_side: int
         "received": received.isoformat(),
         "response": response.isoformat(),
         "seconds_to_wait_on_server_side": seconds_to_wait_on_server_side,
-        "timedelta": timedelta.microseconds
+        "timedelta": timedelta // datetime.timedelta(microseconds=1)
         }
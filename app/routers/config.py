@@ -1,7 +1,13 @@
 #@TODO: Webservice entry point: https://fastapi.tiangolo.com/tutorial/bigger-applications/
 import json
 from fastapi import Depends, APIRouter
+from fastapi.responses import JSONResponse
 from app.configuration.getConfig import Config
+from app.configuration.snapshot import ConfigSnapshot
+from app.helper.cache.response_cache import cached_response
+from app.helper.health.checks import disk_space_check, event_loop_check, logger_check
+from app.helper.health.health import HealthRegistry, UP
+from app.helper.profiling import startup
 
 # get the config file
 configuration = Config()
@@ -16,7 +22,39 @@ router = APIRouter()
 logger = configuration.logger
 
 
+def create_health_registry(snapshot: ConfigSnapshot) -> HealthRegistry:
+    """
+    Health checks of the service, the results are cached for INTERVAL seconds (section [HEALTH] of the config.ini)
+    and refreshed in the background. The dependencies (disk space, log sink) are part of the readiness, a failing
+    check makes the service not ready unless it is listed in NON_CRITICAL.
+    :param snapshot: (ConfigSnapshot) the configuration
+    :return: (HealthRegistry)
+    """
+    registry = HealthRegistry()
+    registry.register("event_loop", event_loop_check(), timeout=1, liveness=True, readiness=True)
+    registry.register("disk_space", disk_space_check([
+        folder for folder in (snapshot.in_folder, snapshot.out_folder, snapshot.cache_folder) if folder
+    ]), timeout=2)
+    registry.register("logger", logger_check(logger), timeout=2)
+    apply_health_settings(registry, snapshot)
+    return registry
+
+
+def apply_health_settings(registry: HealthRegistry, snapshot: ConfigSnapshot):
+    """
+    Applies the settings of the section [HEALTH], also after a reload of the config.ini
+    """
+    registry.interval = snapshot.health["INTERVAL"]
+    for name, check in registry.checks.items():
+        check.critical = name not in snapshot.health["NON_CRITICAL"]
+
+
+health_registry = create_health_registry(configuration.snapshot)
+configuration.subscribe(lambda snapshot: apply_health_settings(health_registry, snapshot))
+
+
 @router.get("/config/", tags=["config"])
+@cached_response(ttl=lambda: configuration.response_cache_ttl)
 def get_config():
     """
     Returns the configuration of the webservice
@@ -25,23 +63,44 @@ def get_config():
 
 
 @router.get("/actuator/health", tags=["config"])
-async def health() -> dict:
+async def health() -> JSONResponse:
+    """
+    Actuator health check with all checks, see health_registry
+    :return:
+    """
+    return await health_report()
+
+
+@router.get("/actuator/health/liveness", tags=["config"])
+async def liveness() -> JSONResponse:
     """
-    Actuator health check
+    Kubernetes liveness probe: only checks of the process itself
     :return:
     """
+    return await health_report("liveness")
 
-    global_status = "UP"
 
-    status_dict = {
-        "status": global_status,
-        "description": "Health",
-        "details": {
-            "Just another check": {
-                "status": "UP",
-                "description": "description"
-            },
-        }
-    }
+@router.get("/actuator/health/readiness", tags=["config"])
+async def readiness() -> JSONResponse:
+    """
+    Kubernetes readiness probe: can the service handle requests?
+    :return:
+    """
+    return await health_report("readiness")
+
 
-    return status_dict
+@router.get("/actuator/startup", tags=["config"])
+async def startup_report() -> dict:
+    """
+    Startup report of this worker: time to the first request and the slowest imports (with STARTUP_PROFILE=true)
+    :return:
+    """
+    return startup.report()
+
+
+async def health_report(kind: str = None) -> JSONResponse:
+    """
+    Cached report of the health checks, status code 503 if a critical check is DOWN
+    """
+    status_dict = await health_registry.report(kind)
+    return JSONResponse(status_dict, status_code=200 if status_dict["status"] == UP else 503)
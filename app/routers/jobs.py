@@ -0,0 +1,77 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from app.configuration.getConfig import Config
+from app.helper.jobs.jobs import FINISHED, SUCCESS, Job
+
+# get the config file
+configuration = Config()
+
+# SET THE API-ID: DO NOT CHANGE THIS!
+API_ID = configuration.API_ID
+API_VERSION = configuration.API_VERSION
+
+# fastAPI Instance
+router = APIRouter()
+
+# Logger
+logger = configuration.logger
+
+# job engine of the worker, see app/helper/jobs/jobs.py
+job_engine = configuration.job_engine
+
+
+@router.get("/jobs", tags=["jobs"])
+async def jobs() -> dict:
+    """
+    Returns the counters of the job engine of this worker
+    """
+    return job_engine.stats()
+
+
+@router.get("/jobs/{uuid}", tags=["jobs"])
+async def job_status(uuid: str) -> dict:
+    """
+    Returns the status of a job
+    :param uuid: id of the job
+    :return:
+    """
+    return get_job(uuid).to_dict()
+
+
+@router.get("/jobs/{uuid}/result", tags=["jobs"])
+async def job_result(uuid: str):
+    """
+    Returns the status and the result of a finished job, status code 202 if the job is not finished yet and 409 if
+    the job failed or was cancelled
+    :param uuid: id of the job
+    :return:
+    """
+    job = get_job(uuid)
+    if job.status not in FINISHED:
+        return JSONResponse(job.to_dict(), status_code=202)
+    if job.status != SUCCESS:
+        return JSONResponse(job.to_dict(), status_code=409)
+    return job.to_dict(result=True)
+
+
+@router.delete("/jobs/{uuid}", tags=["jobs"])
+async def cancel_job(uuid: str) -> dict:
+    """
+    Cancels a pending job (or a running async job), status code 409 if the job can't be cancelled
+    :param uuid: id of the job
+    :return:
+    """
+    job = get_job(uuid)
+    if not job_engine.cancel(uuid):
+        raise HTTPException(status_code=409, detail="The job is " + job.status + " and can't be cancelled")
+    return job.to_dict()
+
+
+def get_job(uuid: str) -> Job:
+    """
+    Returns the job or raises a 404
+    """
+    job = job_engine.get(uuid)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job '" + uuid + "'")
+    return job
@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from app.configuration.getConfig import Config
+from app.helper.metrics.metrics import REGISTRY, CONTENT_TYPE
+
+# get the config file
+configuration = Config()
+
+# SET THE API-ID: DO NOT CHANGE THIS!
+API_ID = configuration.API_ID
+API_VERSION = configuration.API_VERSION
+
+# fastAPI Instance
+router = APIRouter()
+
+# Logger
+logger = configuration.logger
+
+
+@router.get("/metrics", tags=["metrics"], include_in_schema=False)
+def metrics() -> Response:
+    """
+    Metrics of all workers in the Prometheus text format
+    """
+    return Response(REGISTRY.generate_latest(), media_type=CONTENT_TYPE)
@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import time
+import warnings
+from app.helper.anonymize.Anonymize import Anonymize
+from app.helper.anonymize.CallbackHelper import ch_postal_code, ch_ipv4, ch_datetime
+
+"""
+Benchmark of the sequential vs. the parallel (process pool) mode of the Anon-Class.
+Run it from the project root:
+    python -m benchmarks.anonymize_parallel --records 200000 --workers 8 --chunk-size 10000
+"""
+
+
+def get_records(n: int) -> list:
+    """
+    Creates n documents with personal data
+    :param n: number of documents
+    :return: list[dict]
+    """
+    return [
+        {
+            "id": i,
+            "name": "Name " + str(i),
+            "password": "secret",
+            "address": {"plz": str(10000 + i % 89999), "city": "Munich"},
+            "ip": "10.0." + str(i % 256) + "." + str(i % 199),
+            "birthday": "2001-0" + str(1 + i % 9) + "-1" + str(i % 9),
+        }
+        for i in range(n)
+    ]
+
+
+def get_anonymize(workers: int = None, chunk_size: int = 10000) -> Anonymize:
+    """
+    Anon-Class with the same rules for every run
+    """
+    return Anonymize(
+        strip=["password", "name"],
+        change=[
+            [["plz"], ch_postal_code, [5, True, 2]],
+            [["ip"], ch_ipv4, [True, [3], False]],
+            [["birthday"], ch_datetime, [False, None, None, 1]],
+        ],
+        workers=workers,
+        chunk_size=chunk_size
+    )
+
+
+def measure(anonymize: Anonymize, records: list) -> float:
+    """
+    Returns the runtime of one anonymization run in seconds
+    """
+    start = time.perf_counter()
+    anonymize.perform_anonymization(records)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs. parallel anonymization")
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    sequential = measure(get_anonymize(), get_records(args.records))
+    parallel = measure(get_anonymize(args.workers, args.chunk_size), get_records(args.records))
+
+    print(json.dumps({
+        "records": args.records,
+        "workers": args.workers,
+        "chunk_size": args.chunk_size,
+        "sequential_seconds": round(sequential, 3),
+        "parallel_seconds": round(parallel, 3),
+        "speedup": round(sequential / parallel, 2)
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import httpx
+
+"""
+HTTP load benchmark of the benchmark router.
+Boots the app with uvicorn and with gunicorn (UvicornWorker) for every given worker count on localhost, drives every
+route at a fixed concurrency and reports the throughput and the p50/p95/p99 latency per server and route.
+The results can be stored as JSON baseline, later runs are compared to it and regressions are flagged (exit code 1).
+Run it from the project root:
+    python -m benchmarks.http_load --workers 1 2 4 --concurrency 32 --duration 10 --save-baseline
+    python -m benchmarks.http_load --workers 1 2 4 --concurrency 32 --duration 10
+"""
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "http_load.json")
+
+# name: (method, path, json body)
+ROUTES = {
+    "plaintext_hi": ("GET", "/benchmark/hi", None),
+    "json_response": ("GET", "/benchmark/json", None),
+    "post_and_return_modified": ("POST", "/benchmark/json/post_and_return_modified", {
+        "name": "string", "number": 0, "another_class": {"nested_name": "string", "nested_number": 0}
+    }),
+    "backgroundtask_immediate_response": ("POST", "/benchmark/backgroundtask/immediate_response"
+                                                  "?seconds_to_wait_on_server_side=0", None),
+}
+
+
+def start_server(server: str, workers: int, port: int) -> subprocess.Popen:
+    """
+    Starts the app with uvicorn (single process) or gunicorn (n workers)
+    :param server: (str) "uvicorn" or "gunicorn"
+    :param workers: (int) number of gunicorn workers
+    :param port: (int) port on localhost
+    :return: (subprocess.Popen)
+    """
+    env = dict(os.environ, IS_LOCAL="False", PORT=str(port), HOST="127.0.0.1", WEB_CONCURRENCY=str(workers),
+               LOG_LEVEL="warning")
+    if server == "uvicorn":
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+                   "--log-level", "warning", "--no-access-log"]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "-c", "app/gunicorn_conf.py", "app.main:app"]
+    # the access logs of the app are not part of the benchmark
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+
+
+def stop_server(process: subprocess.Popen):
+    """
+    Stops the server and all of its workers
+    """
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+async def wait_until_ready(base_url: str, timeout: float = 60.0):
+    """
+    Polls the liveness probe until the server answers
+    """
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/actuator/health/liveness")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError("The server at " + base_url + " did not start within " + str(timeout) + " seconds")
+
+
+async def drive(base_url: str, route: tuple, concurrency: int, duration: float, warmup: float) -> dict:
+    """
+    Sends requests with "concurrency" connections for "duration" seconds (after a warmup)
+    :return: (dict) requests, errors, throughput and latency percentiles in milliseconds
+    """
+    method, path, body = route
+    latencies = list()
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def connection(until: float, record: bool):
+            nonlocal errors
+            while time.perf_counter() < until:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                if record:
+                    latencies.append(time.perf_counter() - start)
+                    errors += failed
+
+        warmup_until = time.perf_counter() + warmup
+        await asyncio.gather(*(connection(warmup_until, False) for _ in range(concurrency)))
+        start = time.perf_counter()
+        await asyncio.gather(*(connection(start + duration, True) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+def percentile(sorted_values: list, percent: float) -> float:
+    """
+    Nearest-rank percentile in milliseconds
+    """
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(percent / 100 * len(sorted_values) + 0.5)) - 1))
+    return round(sorted_values[index] * 1000, 3)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Flags the results which are worse than the baseline by more than "tolerance" (e.g. 0.1 = 10%)
+    :return: (list) regressions
+    """
+    regressions = list()
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result["requests_per_second"] < base["requests_per_second"] * (1 - tolerance):
+            regressions.append({"benchmark": key, "metric": "requests_per_second",
+                                "baseline": base["requests_per_second"], "result": result["requests_per_second"]})
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if base[metric] and result[metric] and result[metric] > base[metric] * (1 + tolerance):
+                regressions.append({"benchmark": key, "metric": metric, "baseline": base[metric],
+                                    "result": result[metric]})
+        if result["errors"] > base["errors"]:
+            regressions.append({"benchmark": key, "metric": "errors", "baseline": base["errors"],
+                                "result": result["errors"]})
+    return regressions
+
+
+async def run(args) -> dict:
+    """
+    Runs all servers and routes one after another
+    :return: (dict) "<server>/<route>": result
+    """
+    servers = [("uvicorn", 1)] if not args.skip_uvicorn else []
+    servers += [("gunicorn", workers) for workers in args.workers]
+    results = dict()
+    for server, workers in servers:
+        name = server if server == "uvicorn" else server + "-" + str(workers)
+        process = start_server(server, workers, args.port)
+        try:
+            base_url = "http://127.0.0.1:" + str(args.port)
+            await wait_until_ready(base_url)
+            for route_name in args.routes:
+                result = await drive(base_url, ROUTES[route_name], args.concurrency, args.duration, args.warmup)
+                results[name + "/" + route_name] = dict(result, server=server, workers=workers,
+                                                        concurrency=args.concurrency)
+                print(json.dumps({"benchmark": name + "/" + route_name, **result}), file=sys.stderr)
+        finally:
+            stop_server(process)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load benchmark of the benchmark router")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="gunicorn worker counts")
+    parser.add_argument("--skip-uvicorn", action="store_true")
+    parser.add_argument("--routes", nargs="+", default=list(ROUTES), choices=list(ROUTES))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per route")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds per route before the measurement")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed deviation from the baseline")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    output = {"results": results}
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        output["baseline"] = "saved to " + args.baseline
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            output["regressions"] = compare(results, json.load(file), args.tolerance)
+
+    print(json.dumps(output, indent=2))
+    if output.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import json
+import time
+from dataclasses import asdict
+from datetime import datetime
+from pydantic.dataclasses import dataclass
+from app.helper.log.log import Log
+
+"""
+Microbenchmark of the log record: records/sec of the slotted Log-Class with its serialize-once encoder compared to the
+former pydantic dataclass, which was serialized with dataclasses.asdict + json.dumps for stdout and for the sink.
+Run it from the project root:
+    python -m benchmarks.log_record --records 200000
+"""
+
+
+@dataclass
+class PydanticLog:
+    """
+    Former implementation of the Log-Class (pydantic dataclass)
+    """
+    timestamp: str
+    api_id: int
+    level: int
+    status_code: int
+    message: str = None
+    traceback: str = None
+    path: str = None
+    user: str = None
+    uuid: str = None
+    trace_id: str = None
+
+    def __init__(self, timestamp: datetime, api_id: int, level: int, status_code: int, message: str,
+                 traceback: str, path: str, user: str, uuid: str, trace_id: str, treat_all_args_as_string: bool = False):
+        self.timestamp = timestamp.isoformat()
+        self.api_id = str(api_id) if treat_all_args_as_string else api_id
+        self.level = str(level) if treat_all_args_as_string else level
+        self.status_code = str(status_code) if treat_all_args_as_string else status_code
+        self.message = message
+        self.traceback = traceback
+        self.path = path
+        self.user = user
+        self.uuid = uuid
+        self.trace_id = trace_id
+
+    def to_json_string(self) -> str:
+        return json.dumps(asdict(self))
+
+
+def run_pydantic(n: int) -> None:
+    """
+    Record for stdout and a file sink, as Logger.log did before
+    """
+    for i in range(n):
+        log = PydanticLog(datetime.now(), 999999, 1, 200, "message " + str(i), "", "/path", "user", "uuid", "trace")
+        log.to_json_string()
+        json.dumps(log.to_json_string(), indent=4, ensure_ascii=False)
+
+
+def run_slotted(n: int) -> None:
+    """
+    Record for stdout and a file sink, as Logger.log does now
+    """
+    for i in range(n):
+        log = Log(datetime.now(), 999999, 1, 200, "message " + str(i), "", "/path", "user", "uuid", "trace")
+        log.to_json_string()
+        log.to_json_bytes()
+
+
+def records_per_second(func, n: int) -> float:
+    """
+    Returns the throughput of one run
+    """
+    start = time.perf_counter()
+    func(n)
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Slotted vs. pydantic log record")
+    parser.add_argument("--records", type=int, default=100000)
+    args = parser.parse_args()
+
+    pydantic_rate = records_per_second(run_pydantic, args.records)
+    slotted_rate = records_per_second(run_slotted, args.records)
+
+    print(json.dumps({
+        "records": args.records,
+        "pydantic_records_per_second": round(pydantic_rate),
+        "slotted_records_per_second": round(slotted_rate),
+        "speedup": round(slotted_rate / pydantic_rate, 2)
+    }))
+
+
+if __name__ == "__main__":
+    main()
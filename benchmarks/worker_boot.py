@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+
+"""
+Regression benchmark of the worker boot: import time and RSS of "import app.main" in a fresh interpreter and the time
+from the start of a uvicorn server to its first answered request with the RSS of the server afterwards.
+It also reports which of the heavy libraries (pandas, dateparser, pymongo) are loaded by the import, they should only
+be loaded on first use.
+The medians of all runs can be stored as JSON baseline, later runs are compared to it and regressions are flagged
+(exit code 1).
+Run it from the project root:
+    python -m benchmarks.worker_boot --runs 5 --save-baseline
+    python -m benchmarks.worker_boot --runs 5
+"""
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "worker_boot.json")
+HEAVY_MODULES = ["pandas", "dateparser", "pymongo"]
+
+# runs in a fresh interpreter
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+seconds = time.perf_counter() - start
+with open("/proc/self/status") as file:
+    rss_kib = next(int(line.split()[1]) for line in file if line.startswith("VmRSS"))
+print(json.dumps({"seconds": seconds, "rss_kib": rss_kib,
+                  "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules]}))
+"""
+
+
+def environment(port: int = 8098) -> dict:
+    """
+    Environment of the measured processes
+    """
+    return dict(os.environ, IS_LOCAL="False", PORT=str(port), LOG_LEVEL="warning")
+
+
+def rss_kib(pid: int) -> int:
+    """
+    Resident set size of a process in KiB
+    """
+    with open("/proc/" + str(pid) + "/status") as file:
+        return next(int(line.split()[1]) for line in file if line.startswith("VmRSS"))
+
+
+def measure_import() -> dict:
+    """
+    Import time and RSS of app.main in a fresh interpreter
+    """
+    script = "HEAVY_MODULES = " + repr(HEAVY_MODULES) + "\n" + IMPORT_SCRIPT
+    output = subprocess.run([sys.executable, "-c", script], env=environment(), capture_output=True, text=True,
+                            check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_server(port: int, timeout: float = 60.0) -> dict:
+    """
+    Time from the start of uvicorn to the first answered request and the RSS of the server afterwards
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port",
+                                str(port), "--log-level", "warning", "--no-access-log"], env=environment(port),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(base_url="http://127.0.0.1:" + str(port)) as client:
+            while time.perf_counter() - start < timeout:
+                try:
+                    if client.get("/benchmark/hi").status_code == 200:
+                        return {"seconds": time.perf_counter() - start, "rss_kib": rss_kib(process.pid)}
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.01)
+        raise TimeoutError("uvicorn did not answer within " + str(timeout) + " seconds")
+    finally:
+        process.terminate()
+        process.wait(30)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Flags the metrics which are higher than the baseline by more than "tolerance" (e.g. 0.1 = 10%)
+    :return: (list) regressions
+    """
+    regressions = list()
+    for metric, value in results.items():
+        base = baseline.get(metric)
+        if metric == "runs" or not isinstance(value, (int, float)) or not isinstance(base, (int, float)):
+            continue
+        if value > base * (1 + tolerance):
+            regressions.append({"metric": metric, "baseline": base, "result": value})
+    for module in results["heavy_modules"]:
+        if module not in baseline.get("heavy_modules", []):
+            regressions.append({"metric": "heavy_modules", "baseline": baseline.get("heavy_modules"),
+                                "result": results["heavy_modules"]})
+            break
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Boot time and RSS of a worker")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed deviation from the baseline")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    servers = [measure_server(args.port) for _ in range(args.runs)]
+    results = {
+        "runs": args.runs,
+        "import_seconds": round(statistics.median(run["seconds"] for run in imports), 4),
+        "import_rss_mib": round(statistics.median(run["rss_kib"] for run in imports) / 1024, 1),
+        "first_request_seconds": round(statistics.median(run["seconds"] for run in servers), 4),
+        "server_rss_mib": round(statistics.median(run["rss_kib"] for run in servers) / 1024, 1),
+        "heavy_modules": imports[0]["heavy_modules"],
+    }
+    output = {"results": results}
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        output["baseline"] = "saved to " + args.baseline
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            output["regressions"] = compare(results, json.load(file), args.tolerance)
+
+    print(json.dumps(output, indent=2))
+    if output.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import os
+import shutil
+import time
+import pytest
+from app.configuration.getConfig import Config
+from app.configuration.snapshot import ConfigSnapshot
+from app.configuration.watcher import ConfigWatcher
+from app.helper.log.logger import Logger
+
+
+def replace_in_file(path, old: str, new: str):
+    with open(path) as file:
+        content = file.read()
+    assert old in content
+    with open(path, "w") as file:
+        file.write(content.replace(old, new))
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """
+    The Config reads a copy of the config.ini, the original configuration is restored afterwards
+    """
+    configuration = Config()
+    path = str(tmp_path / "config.ini")
+    shutil.copyfile(configuration.config_path, path)
+    original_path = configuration.config_path
+    monkeypatch.setattr(configuration, "config_path", path)
+    yield configuration
+    monkeypatch.setattr(configuration, "config_path", original_path)
+    assert configuration.reload()
+
+
+class TestConfigReload:
+    """
+    Tests for the reload of the configuration at runtime
+    """
+
+    def test_reload_swaps_snapshot_and_notifies(self, config):
+        snapshot = config.snapshot
+        notified = list()
+        config.subscribe(notified.append)
+        try:
+            replace_in_file(config.config_path, "MODE=INFO", "MODE=DEBUG")
+            replace_in_file(config.config_path, "RESULT_TTL=3600", "RESULT_TTL=60")
+            replace_in_file(config.config_path, "RELOAD_INTERVAL=5", "RELOAD_INTERVAL=1")
+            assert config.reload()
+        finally:
+            config.unsubscribe(notified.append)
+        assert config.revision == snapshot.revision + 1 and notified == [config.snapshot]
+        assert config.configuration_dict["LOG"]["mode"] == "DEBUG"
+        assert config.logger.mode == Logger.MODE.DEBUG and config.job_engine.result_ttl == 60
+        assert config.watcher.interval == 1
+        # the old snapshot is unchanged
+        assert snapshot.configuration_dict["LOG"]["mode"] == "INFO"
+        # removed subscribers are not notified anymore
+        assert config.reload() and len(notified) == 1
+
+    def test_invalid_config_keeps_snapshot(self, config):
+        snapshot = config.snapshot
+        replace_in_file(config.config_path, "MODE=INFO", "MODE=VERBOSE")
+        assert not config.reload()
+        replace_in_file(config.config_path, "MODE=VERBOSE", "MODE=INFO")
+        replace_in_file(config.config_path, "ID=999999", "ID=1")
+        assert not config.reload()
+        assert config.snapshot is snapshot
+
+    def test_snapshot_is_immutable(self):
+        with pytest.raises(AttributeError):
+            Config().snapshot.revision = 99
+
+
+class TestConfigWatcher:
+    """
+    Tests for the change detection of the watched files
+    """
+
+    def test_only_content_changes_are_reported(self, tmp_path):
+        path = str(tmp_path / "config.ini")
+        with open(path, "w") as file:
+            file.write("[API]\nID=1\n")
+        changes = list()
+        watcher = ConfigWatcher([path], lambda: changes.append(1), interval=0)
+        assert not watcher.check()
+        os.utime(path, ns=(0, 0))
+        assert not watcher.check() and not changes
+        with open(path, "a") as file:
+            file.write("DEBUG=True\n")
+        assert watcher.check() and changes == [1]
+        assert not watcher.check()
+
+    def test_interval_change_while_running(self, tmp_path):
+        path = str(tmp_path / "config.ini")
+        with open(path, "w") as file:
+            file.write("[API]\nID=1\n")
+        changes = list()
+        watcher = ConfigWatcher([path], lambda: changes.append(1), interval=0.02)
+        watcher.start()
+        try:
+            with open(path, "a") as file:
+                file.write("DEBUG=True\n")
+            deadline = time.monotonic() + 2
+            while not changes and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert changes == [1]
+            # 0 stops the checks instead of checking all the time
+            watcher.interval = 0
+            time.sleep(0.05)
+            with open(path, "a") as file:
+                file.write("MODE=DEBUG\n")
+            time.sleep(0.1)
+            assert changes == [1]
+        finally:
+            watcher.stop()
@@ -0,0 +1,46 @@
+import os
+from app.configuration.sizing import cpu_quota, gunicorn_settings, memory_limit, worker_connections, worker_count
+
+
+def write(path, content: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content + "\n")
+
+
+class TestSizing:
+    """
+    Tests for the cgroup aware worker sizing
+    """
+
+    def test_cgroup_v1_and_v2_limits(self, tmp_path):
+        v2, v1 = str(tmp_path / "v2"), str(tmp_path / "v1")
+        write(os.path.join(v2, "cpu.max"), "150000 100000")
+        write(os.path.join(v2, "memory.max"), "max")
+        write(os.path.join(v1, "cpu,cpuacct", "cpu.cfs_quota_us"), "-1")
+        write(os.path.join(v1, "cpu,cpuacct", "cpu.cfs_period_us"), "100000")
+        write(os.path.join(v1, "memory", "memory.limit_in_bytes"), str(512 * 1024 ** 2))
+        assert cpu_quota(v2) == (1.5, "cgroup v2") and memory_limit(v2) == (None, "cgroup v2")
+        assert cpu_quota(v1) == (None, "cgroup v1") and memory_limit(v1) == (512 * 1024 ** 2, "cgroup v1")
+        assert cpu_quota(str(tmp_path / "none")) == (None, "none")
+
+    def test_workers_and_connections(self):
+        assert worker_count(0.5) == 1
+        assert worker_count(4, workers_per_core=2) == 8
+        # 1 GiB: 80% for the workers, 256 MiB each
+        assert worker_count(8, memory=1024 ** 3) == 3
+        assert worker_count(8, max_workers=2) == 2
+        assert worker_connections(2) == 1000
+        assert worker_connections(3, memory=1024 ** 3) == 100
+
+    def test_gunicorn_settings(self, tmp_path):
+        root = str(tmp_path)
+        write(os.path.join(root, "cpu.max"), "200000 100000")
+        write(os.path.join(root, "memory.max"), str(4 * 1024 ** 3))
+        settings = gunicorn_settings({"MAX_REQUESTS": "500", "KEEPALIVE": "15"}, root)
+        assert settings["workers"] == min(2, len(os.sched_getaffinity(0)))
+        assert settings["max_requests_jitter"] == 50 and settings["keepalive"] == 15
+        assert settings["timeout"] == settings["graceful_timeout"] == 30 and not settings["preload_app"]
+        fixed = gunicorn_settings({"WEB_CONCURRENCY": "3", "PRELOAD_APP": "True"}, root)
+        assert fixed["workers"] == 3 and fixed["preload_app"]
+        assert fixed["sizing"]["workers_source"] == "WEB_CONCURRENCY"
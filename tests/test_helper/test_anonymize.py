@@ -0,0 +1,279 @@
+import copy
+import datetime
+import pandas as pd
+from app.helper.anonymize.Anonymize import Anonymize
+from app.helper.anonymize.CallbackHelper import ch_postal_code, ch_ipv4, ch_ipv4_batch, ch_ip, ch_ip_batch, \
+    ch_datetime, ch_datetime_batch, ch_iban, ch_iban_batch, ch_email, ch_email_batch
+from app.helper.anonymize.Iban import is_valid_iban
+
+
+def get_dataframe():
+    """
+    Small DataFrame with some personal data to anonymize
+    :return:
+    """
+    return pd.DataFrame({
+        "plz": ["12345", "1234", None],
+        "ip_address": ["192.168.2.1", "10.0.0.1", "no ip"],
+        "name": ["Jane", "John", "Max"],
+        "number": [1, 2, 3]
+    }, dtype=object)
+
+
+def upper(value: str) -> str:
+    """
+    change callback without a vectorized variant
+    """
+    return value.upper()
+
+
+class TestAnonymizeDataFrame:
+    """
+    Tests for the change-argument of the Anon-Class with DataFrames
+    """
+
+    def test_change_batch_callbacks(self):
+        data = get_dataframe()
+        anon = Anonymize(
+            strip=["number"],
+            change=[
+                [["plz"], ch_postal_code, [5, True, 2]],
+                [["IP"], ch_ipv4, [True, [2, 3], False, "0"]],
+            ],
+            wild_change=True
+        ).perform_anonymization(data)
+        assert list(anon["plz"]) == ["12300", "1234", None]
+        assert list(anon["ip_address"]) == ["192.168.0.0", "10.0.0.0", "no ip"]
+        assert "number" not in anon.columns
+        # the provided DataFrame is not modified by the change
+        assert list(data["plz"]) == ["12345", "1234", None]
+
+    def test_change_batch_equals_scalar(self):
+        data = get_dataframe()
+        anon = Anonymize(change=[[["plz"], ch_postal_code, [5, False, 1, "X"]]]).perform_anonymization(data)
+        expected = [ch_postal_code(value, 5, False, 1, "X") for value in data["plz"]]
+        assert list(anon["plz"]) == expected
+
+    def test_change_scalar_fallback(self):
+        data = get_dataframe()
+        anon = Anonymize(change=[[["name"], upper]]).perform_anonymization(data)
+        assert list(anon["name"]) == ["JANE", "JOHN", "MAX"]
+
+
+def get_documents():
+    """
+    List of nested documents with some personal data to anonymize
+    :return:
+    """
+    return [
+        {
+            "name": "Jane",
+            "password": "secret",
+            "address": {"plz": "12345", "city": "Munich", "Home_IP": "192.168.2.1"},
+            "devices": [{"ip": "10.0.0.1", "password": "1234"}, {"ip": "10.0.0.2"}]
+        },
+        {
+            "name": "John",
+            "address": {"plz": "54321"},
+            "devices": []
+        }
+    ]
+
+
+class TestAnonymizeCompiled:
+    """
+    Tests for the compiled single pass mode of the Anon-Class
+    """
+
+    def get_config(self, compiled: bool, hard_delete: bool) -> dict:
+        return dict(
+            strip=["password", "city"],
+            hard_delete=hard_delete,
+            overwrite_value="###",
+            change=[
+                [["plz"], ch_postal_code, [5, True, 2]],
+                [["ip"], ch_ipv4, [True, [3], False]],
+                [["name"], upper],
+            ],
+            wild_change=True,
+            compiled=compiled
+        )
+
+    def test_compiled_equals_nested_lookup(self):
+        for hard_delete in [True, False]:
+            expected = Anonymize(**self.get_config(False, hard_delete)).perform_anonymization(get_documents())
+            anon = Anonymize(**self.get_config(True, hard_delete)).perform_anonymization(get_documents())
+            assert anon == expected
+
+    def test_compiled_single_dict(self):
+        data = get_documents()[0]
+        anon = Anonymize(**self.get_config(True, True)).perform_anonymization(data)
+        assert anon["address"] == {"plz": "12300", "Home_IP": "192.168.2.0"}
+        assert anon["devices"] == [{"ip": "10.0.0.0"}, {"ip": "10.0.0.0"}]
+        assert anon["name"] == "JANE"
+        # the provided document is not modified
+        assert data["password"] == "secret"
+
+
+class TestAnonymizeParallel:
+    """
+    Tests for the parallel (process pool) mode of the Anon-Class
+    """
+
+    def test_parallel_equals_sequential(self):
+        documents = get_documents() * 5
+        config = dict(strip=["password"], change=[[["plz"], ch_postal_code, [5, True, 2]]])
+        expected = Anonymize(**config).perform_anonymization(get_documents() * 5)
+        anon = Anonymize(workers=2, chunk_size=3, **config).perform_anonymization(documents)
+        assert anon == expected
+
+    def test_parallel_dataframe_keeps_order(self):
+        data = pd.concat([get_dataframe()] * 4, ignore_index=True)
+        anon = Anonymize(strip=["number"], change=[[["plz"], ch_postal_code, [5, True, 2]]], workers=2,
+                         chunk_size=5).perform_anonymization(data)
+        assert list(anon.index) == list(data.index)
+        assert list(anon["plz"]) == ["12300", "1234", None] * 4
+
+    def test_pool_is_kept_until_the_rules_change(self):
+        documents = get_documents() * 5
+        anonymize = Anonymize(strip=["password"], workers=2, chunk_size=3)
+        try:
+            first = anonymize.perform_anonymization(copy.deepcopy(documents))
+            assert anonymize.perform_anonymization(copy.deepcopy(documents)) == first
+            # the workers of the pool got the old rules, a new pool is started
+            anonymize.strip = ["password", "plz"]
+            expected = Anonymize(strip=["password", "plz"]).perform_anonymization(copy.deepcopy(documents))
+            assert anonymize.perform_anonymization(copy.deepcopy(documents)) == expected != first
+        finally:
+            anonymize.close()
+
+
+class TestChDatetime:
+    """
+    Tests for the tiered date parsing of ch_datetime
+    """
+
+    def test_fast_path_and_fallback(self):
+        assert ch_datetime("2021-03-04T10:11:12", day_replace=1) == datetime.datetime(2021, 3, 1, 10, 11, 12)
+        assert ch_datetime(1609459200123) == datetime.datetime.fromtimestamp(1609459200).replace(microsecond=123000)
+        assert ch_datetime("04.03.2021", formats=["%d.%m.%Y"]) == datetime.datetime(2021, 3, 4)
+        assert ch_datetime("21 July 2013") == datetime.datetime(2013, 7, 21)
+        assert ch_datetime("no date") == "#ANONYMIZED_COULD_NOT_PARSE"
+
+    def test_batch_equals_scalar(self):
+        dates = ["2021-03-04", "21 July 2013", "2021-03-04", "no date", 1609459200]
+        expected = [ch_datetime(date, True, None, 1) for date in dates]
+        assert ch_datetime_batch(dates, True, None, 1) == expected
+        series = ch_datetime_batch(pd.Series(dates, index=[5, 4, 3, 2, 1]), True, None, 1)
+        assert list(series.index) == [5, 4, 3, 2, 1]
+        assert list(series) == expected
+
+
+class TestAnonymizeMemoize:
+    """
+    Tests for the memoization of the change callbacks
+    """
+
+    def test_memoize_deterministic_callbacks(self):
+        documents = [{"plz": "12345", "ip": "10.0.0." + str(i % 2)} for i in range(10)]
+        anonymize = Anonymize(change=[
+            [["plz"], ch_postal_code, [5, True, 2]],
+            [["ip"], ch_ipv4, [True, [3], True]],
+        ], memoize=True, memoize_max_entries=10, compiled=True)
+        anon = anonymize.perform_anonymization(documents)
+        assert all(doc["plz"] == "12300" for doc in anon)
+        stats = anonymize.callback_cache.stats()
+        assert (stats["misses"], stats["hits"]) == (1, 9)
+        # random ips are not deterministic and bypass the cache
+        assert stats["bypassed"] == 10
+
+    def test_stable_pseudonyms_and_eviction(self):
+        documents = [{"ip": "10.0.0." + str(i % 3)} for i in range(9)]
+        anonymize = Anonymize(change=[[["ip"], ch_ipv4, [True, [3], True]]], memoize=True, memoize_max_entries=2,
+                              stable_pseudonyms=True)
+        anonymize.perform_anonymization(documents)
+        stats = anonymize.callback_cache.stats()
+        assert stats["entries"] == 2
+        assert stats["evictions"] > 0
+
+        anonymize = Anonymize(change=[[["ip"], ch_ipv4, [True, [3], True]]], memoize=True, stable_pseudonyms=True)
+        anon = anonymize.perform_anonymization(documents)
+        # the same original ip always gets the same random ip
+        assert anon[0] == anon[3] == anon[6]
+
+
+class TestChIban:
+    """
+    Tests for the native IBAN engine of ch_iban
+    """
+
+    def test_account_masking_and_checksum(self):
+        assert ch_iban("DE89 3704 0044 0532 0130 00") == "DE82370400440123456789"
+        # french layout: bank, branch, 11 digit account, national check digits
+        anon = ch_iban("FR1420041010050500013M02606")
+        assert anon[4:14] == "2004101005" and anon[14:25] == "00123456789" and anon[25:] == "06"
+        # icelandic layout: bank, branch, 6 digit account, 10 digit kennitala (national id of the owner)
+        anon = ch_iban("IS140159260076545510730339")
+        assert anon[4:10] == "015926" and anon[10:] == "0000000123456789"
+        # czech and slovak layout: bank, 6 digit account prefix, 10 digit account
+        for iban in ["CZ6508000000192000145399", "SK3112000000198742637541"]:
+            anon = ch_iban(iban)
+            assert anon[4:8] == iban[4:8] and anon[8:] == "0000000123456789"
+        # hungarian layout: bank, branch, national check digit, 15 digit account, national check digit
+        anon = ch_iban("HU42117730161111101800000000")
+        assert anon[4:12] == "11773016" and anon[12:27] == "000000123456789" and anon[27:] == "0"
+        for iban in ["DE89370400440532013000", "FR1420041010050500013M02606", "NO9386011117947", "BE68539007547034",
+                     "IS140159260076545510730339", "CZ6508000000192000145399", "SK3112000000198742637541",
+                     "HU42117730161111101800000000"]:
+            assert is_valid_iban(ch_iban(iban))
+
+    def test_invalid_iban(self):
+        assert ch_iban("DE89370400440532013001") == "DE89370400440532013001"
+
+    def test_batch_equals_scalar(self):
+        ibans = ["DE89370400440532013000", "DE89370400440532013001", "NO9386011117947"]
+        assert ch_iban_batch(ibans) == [ch_iban(iban) for iban in ibans]
+
+
+class TestChIp:
+    """
+    Tests for the packed integer ip engine of ch_ip and ch_ipv4
+    """
+
+    def test_prefix_truncation(self):
+        ips = ["192.168.2.1", "2001:db8:85a3::8a2e:370:7334", "no ip", None]
+        assert ch_ip_batch(ips) == ["192.168.2.0", "2001:db8:85a3::", "no ip", None]
+        assert ch_ip("192.168.2.1", prefix_v4=16) == "192.168.0.0"
+
+    def test_keyed_randomization(self):
+        ips = ["10.0.0.1", "10.0.0.2", "2001:db8::1"]
+        anon = ch_ip_batch(ips, randomize=True, key="secret")
+        # same key, same pseudonym, the network is kept
+        assert anon == ch_ip_batch(ips, randomize=True, key="secret")
+        assert anon != ch_ip_batch(ips, randomize=True, key="other")
+        assert anon[0].startswith("10.0.0.") and anon[2].startswith("2001:db8:0:")
+
+    def test_ipv4_ipv6_input(self):
+        # ipv6 addresses keep their /48 prefix instead of failing
+        assert ch_ipv4("2001:db8:85a3::8a2e:370:7334", assign_rand_num=False) == "2001:db8:85a3::"
+        ips = pd.Series(["10.1.2.3", "2001:db8:85a3::1", None])
+        anon = ch_ipv4_batch(ips, True, [1, 3], False, "7")
+        assert anon.tolist()[:2] == ["10.7.2.7", "2001:db8:85a3::"]
+        assert anon.tolist()[:2] == [ch_ipv4(ip, True, [1, 3], False, "7") for ip in ips[:2]]
+
+
+class TestChEmail:
+    """
+    Tests for the offline syntax-only validation of ch_email
+    """
+
+    def test_offline_validation(self):
+        assert ch_email("info@LV1871.de") == "anonymized@lv1871.de"
+        assert ch_email("no mail") == "no mail"
+        assert ch_email("a@localhost", "x") == "a@localhost"
+
+    def test_batch_equals_scalar(self):
+        emails = ["info@lv1871.de", "max.muster@example.com", "no mail", None]
+        assert ch_email_batch(emails) == [ch_email(email) for email in emails[:3]] + [None]
+        anon = ch_email_batch(pd.Series(emails, index=[3, 2, 1, 0]))
+        assert anon.index.tolist() == [3, 2, 1, 0] and anon[2] == "anonymized@example.com"
@@ -0,0 +1,62 @@
+import os
+import time
+import pandas as pd
+from app.helper.anonymize.Anonymize import Anonymize
+from app.helper.cache.disk_cache import DiskCache
+
+# number of calls of the change callback
+calls = {"count": 0}
+
+
+def counting_upper(value: str) -> str:
+    calls["count"] += 1
+    return value.upper()
+
+
+class TestDiskCache:
+    """
+    Tests for the content-addressed disk cache
+    """
+
+    def test_put_get_and_lru_eviction(self, tmp_path):
+        cache = DiskCache(str(tmp_path), max_bytes=250)
+        keys = [DiskCache.key(b"input", str(i)) for i in range(3)]
+        # the length of the parts is part of the key
+        assert DiskCache.key("ab", "c") != DiskCache.key("a", "bc")
+        assert cache.get(keys[0]) is None
+        cache.put(keys[0], b"0" * 100)
+        cache.put(keys[1], b"1" * 100)
+        # the first entry was read last, so the second one is evicted
+        past = time.time() - 10
+        os.utime(cache.path(keys[1]), (past, past))
+        assert cache.get(keys[0]) == b"0" * 100
+        cache.put(keys[2], b"2" * 100)
+        assert cache.get(keys[1]) is None and cache.get(keys[2]) == b"2" * 100
+        assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2 and cache.stats()["evictions"] == 1
+        assert not [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith(".tmp")]
+
+    def test_anonymize_with_disk_cache(self, tmp_path):
+        def get_anonymize(strip: list) -> Anonymize:
+            return Anonymize(strip=strip, change=[[["city"], counting_upper]],
+                             disk_cache=DiskCache(str(tmp_path)))
+
+        records = [{"city": "berlin", "name": "Jane"}, {"city": "bonn", "name": "John"}]
+        calls["count"] = 0
+        first = get_anonymize(["name"]).perform_anonymization([dict(record) for record in records])
+        cached = get_anonymize(["name"]).perform_anonymization([dict(record) for record in records])
+        assert first == cached == [{"city": "BERLIN"}, {"city": "BONN"}] and calls["count"] == 2
+        # other rules get another key
+        assert get_anonymize([]).perform_anonymization([dict(record) for record in records])[0]["name"] == "Jane"
+        frame = get_anonymize(["name"]).perform_anonymization(pd.DataFrame(records))
+        assert list(frame.columns) == ["city"] and calls["count"] == 6
+
+    def test_different_lambdas_get_different_keys(self, tmp_path):
+        def get_anonymize(callback) -> Anonymize:
+            return Anonymize(change=[[["name"], callback, []]], disk_cache=DiskCache(str(tmp_path)))
+
+        assert get_anonymize(lambda value: "A").perform_anonymization({"name": "Jane"}) == {"name": "A"}
+        assert get_anonymize(lambda value: "B").perform_anonymization({"name": "Jane"}) == {"name": "B"}
+        # the same body with other captured values
+        callbacks = [(lambda prefix: lambda value: prefix + value)(prefix) for prefix in ("x", "y")]
+        assert get_anonymize(callbacks[0]).perform_anonymization({"name": "Jane"}) == {"name": "xJane"}
+        assert get_anonymize(callbacks[1]).perform_anonymization({"name": "Jane"}) == {"name": "yJane"}
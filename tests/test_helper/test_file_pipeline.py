@@ -0,0 +1,143 @@
+import json
+import pytest
+from app.helper.anonymize.Anonymize import Anonymize
+from app.helper.anonymize.CallbackHelper import ch_postal_code
+from app.helper.anonymize.FilePipeline import FilePipeline
+from app.helper.cache.disk_cache import DiskCache
+
+# number of callback calls until the next call fails, None = never fail
+fail_after = {"calls": None}
+
+
+def failing_postal_code(postal_code: str) -> str:
+    """
+    change callback which simulates a crash of the pipeline
+    """
+    if fail_after["calls"] is not None:
+        if fail_after["calls"] == 0:
+            raise RuntimeError("crash")
+        fail_after["calls"] -= 1
+    return ch_postal_code(postal_code, 5, True, 2)
+
+
+def get_anonymize() -> Anonymize:
+    return Anonymize(strip=["name"], change=[[["plz"], failing_postal_code]])
+
+
+def write_input(in_folder, records: int = 5):
+    with open(in_folder / "data.ndjson", "w") as file:
+        for i in range(records):
+            file.write(json.dumps({"id": i, "name": "Jane", "plz": "1234" + str(i)}) + "\n")
+    with open(in_folder / "data.csv", "w") as file:
+        file.write("id,name,plz\n")
+        for i in range(records):
+            file.write(str(i) + ",Jane,0123" + str(i) + "\n")
+
+
+class TestFilePipeline:
+    """
+    Tests for the streaming file anonymization
+    """
+
+    def test_run_ndjson_and_csv(self, tmp_path):
+        in_folder, out_folder = tmp_path / "in", tmp_path / "out"
+        in_folder.mkdir()
+        write_input(in_folder)
+        stats = FilePipeline(get_anonymize(), str(in_folder), str(out_folder), chunk_size=2).run()
+        assert [(s["file"], s["status"], s["records"]) for s in stats] == \
+               [("data.csv", "processed", 5), ("data.ndjson", "processed", 5)]
+
+        with open(out_folder / "data.ndjson") as file:
+            records = [json.loads(line) for line in file]
+        assert records[4] == {"id": 4, "plz": "12300"}
+        with open(out_folder / "data.csv") as file:
+            lines = file.read().splitlines()
+        # values are kept as strings, the leading zero is not lost
+        assert lines == ["id,plz"] + [str(i) + ",01200" for i in range(5)]
+
+        # the second run skips the already processed files
+        stats = FilePipeline(get_anonymize(), str(in_folder), str(out_folder), chunk_size=2).run()
+        assert [s["status"] for s in stats] == ["skipped", "skipped"]
+
+    def test_resume_after_crash(self, tmp_path):
+        in_folder, out_folder = tmp_path / "in", tmp_path / "out"
+        in_folder.mkdir()
+        out_folder.mkdir()
+        write_input(in_folder)
+        pipeline = FilePipeline(get_anonymize(), str(in_folder), str(out_folder), chunk_size=2)
+
+        # crash in the second chunk
+        fail_after["calls"] = 3
+        with pytest.raises(RuntimeError):
+            pipeline.process_file("data.ndjson")
+        assert (out_folder / "data.ndjson.checkpoint").exists()
+
+        fail_after["calls"] = None
+        stats = pipeline.process_file("data.ndjson")
+        assert stats["status"] == "resumed"
+        with open(out_folder / "data.ndjson") as file:
+            records = [json.loads(line) for line in file]
+        assert [record["id"] for record in records] == [0, 1, 2, 3, 4]
+        assert not (out_folder / "data.ndjson.checkpoint").exists()
+
+    def test_empty_files(self, tmp_path):
+        in_folder, out_folder = tmp_path / "in", tmp_path / "out"
+        in_folder.mkdir()
+        (in_folder / "data.ndjson").write_text("")
+        (in_folder / "data.csv").write_text("id,name,plz\n")
+        stats = FilePipeline(get_anonymize(), str(in_folder), str(out_folder), chunk_size=2).run()
+        assert [(s["file"], s["status"], s["records"]) for s in stats] == \
+               [("data.csv", "processed", 0), ("data.ndjson", "processed", 0)]
+        assert (out_folder / "data.ndjson").read_text() == ""
+        # the header is kept without rows
+        assert (out_folder / "data.csv").read_text().splitlines() == ["id,plz"]
+        assert sorted(path.name for path in out_folder.iterdir()) == ["data.csv", "data.ndjson"]
+
+    def test_ndjson_line_without_object(self, tmp_path):
+        in_folder = tmp_path / "in"
+        in_folder.mkdir()
+        (in_folder / "data.ndjson").write_text('{"id": 0}\n\n"x"\n')
+        # process_file creates the "out_folder" as well
+        pipeline = FilePipeline(get_anonymize(), str(in_folder), str(tmp_path / "out"), chunk_size=2)
+        with pytest.raises(ValueError, match="line 3 of the file .*data.ndjson"):
+            pipeline.process_file("data.ndjson")
+        (in_folder / "data.ndjson").write_text('{"id": 0}\n[1]\n')
+        with pytest.raises(ValueError, match="line 2"):
+            pipeline.process_file("data.ndjson")
+
+    def test_resume_csv_with_multiline_values(self, tmp_path):
+        in_folder = tmp_path / "in"
+        in_folder.mkdir()
+        with open(in_folder / "data.csv", "w") as file:
+            file.write("id,name,plz,note\n")
+            for i in range(5):
+                file.write(str(i) + ',Jane,0123' + str(i) + ',"first line\nsecond line ' + str(i) + '"\n')
+        FilePipeline(get_anonymize(), str(in_folder), str(tmp_path / "expected"), chunk_size=2).run()
+
+        pipeline = FilePipeline(get_anonymize(), str(in_folder), str(tmp_path / "out"), chunk_size=2)
+        # crash in the third chunk
+        fail_after["calls"] = 4
+        try:
+            with pytest.raises(RuntimeError):
+                pipeline.process_file("data.csv")
+        finally:
+            fail_after["calls"] = None
+        assert pipeline.process_file("data.csv") == {"file": "data.csv", "status": "resumed", "records": 5}
+        assert (tmp_path / "out" / "data.csv").read_bytes() == (tmp_path / "expected" / "data.csv").read_bytes()
+
+    def test_disk_cache_across_output_folders(self, tmp_path):
+        in_folder = tmp_path / "in"
+        in_folder.mkdir()
+        write_input(in_folder)
+        disk_cache = DiskCache(str(tmp_path / "cache"))
+        first = FilePipeline(get_anonymize(), str(in_folder), str(tmp_path / "out1"), 2, disk_cache).run()
+        # another worker with the same cache folder does not anonymize the files again
+        fail_after["calls"] = 0
+        try:
+            second = FilePipeline(get_anonymize(), str(in_folder), str(tmp_path / "out2"), 2,
+                                  DiskCache(str(tmp_path / "cache"))).run()
+        finally:
+            fail_after["calls"] = None
+        assert [s["status"] for s in first] == ["processed", "processed"]
+        assert [(s["status"], s["records"]) for s in second] == [("cached", 5), ("cached", 5)]
+        assert (tmp_path / "out1" / "data.csv").read_bytes() == (tmp_path / "out2" / "data.csv").read_bytes()
@@ -0,0 +1,92 @@
+import asyncio
+import time
+from app.helper.health.checks import event_loop_check
+from app.helper.health.health import HealthRegistry, UP, DOWN
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestHealthRegistry:
+    """
+    Tests for the concurrent, cached health checks
+    """
+
+    def test_concurrent_checks_with_timeout(self):
+        registry = HealthRegistry()
+
+        async def slow():
+            await asyncio.sleep(0.3)
+            return True
+
+        def blocking():
+            time.sleep(0.3)
+            return {"status": UP, "connections": 1}
+
+        async def hanging():
+            await asyncio.sleep(10)
+
+        registry.register("slow", slow, timeout=2)
+        registry.register("blocking", blocking, timeout=2, liveness=True)
+        registry.register("hanging", hanging, timeout=0.1, critical=False)
+        start = time.perf_counter()
+        report = run(registry.report())
+        # the checks run concurrently
+        assert time.perf_counter() - start < 0.55
+        assert report["status"] == UP
+        assert report["details"]["hanging"]["status"] == DOWN and "timeout" in report["details"]["hanging"]["error"]
+        assert report["details"]["blocking"]["connections"] == 1
+        assert report["details"]["slow"]["duration_ms"] >= 300
+        assert list(run(registry.report("liveness"))["details"]) == ["blocking"]
+
+    def test_cached_report_and_background_refresh(self):
+        registry = HealthRegistry(interval=0.05)
+        calls = {"count": 0}
+
+        async def counting():
+            calls["count"] += 1
+            await asyncio.sleep(0.2)
+            return calls["count"] == 1
+
+        registry.register("counting", counting)
+
+        async def probes():
+            first = await registry.report()
+            cached = await registry.report()
+            await asyncio.sleep(0.1)
+            # expired: the old report is returned while the refresh runs in the background
+            start = time.perf_counter()
+            stale = await registry.report()
+            assert time.perf_counter() - start < 0.1
+            await asyncio.sleep(0.3)
+            return first, cached, stale, await registry.report()
+
+        first, cached, stale, refreshed = run(probes())
+        assert first["status"] == cached["status"] == stale["status"] == UP
+        assert refreshed["status"] == DOWN and calls["count"] == 2
+
+
+class TestEventLoopCheck:
+    """
+    Tests for the heartbeat of the event loop check
+    """
+
+    def test_blocked_loop(self):
+        check = event_loop_check(max_lag_seconds=0.2, interval=0.05)
+
+        async def probes():
+            first = await check()
+            await asyncio.sleep(0.1)
+            # blocks the loop, the heartbeat is delayed
+            time.sleep(0.3)
+            await asyncio.sleep(0)
+            blocked = await check()
+            await asyncio.sleep(0.2)
+            return first, blocked, await check()
+
+        first, blocked, recovered = run(probes())
+        assert first["status"] == UP
+        assert blocked["status"] == DOWN and blocked["max_lag_ms"] >= 200
+        # the maximum is reset by every check
+        assert recovered["status"] == UP and recovered["max_lag_ms"] < 200
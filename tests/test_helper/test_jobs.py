@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+from app.helper.jobs.jobs import JobEngine, QueueFullError, CANCELLED, ERROR, PENDING, PROCESS, RUNNING, SUCCESS
+from app.helper.jobs.store import JobStore
+
+
+def square(x: int) -> int:
+    return x * x
+
+
+class TestJobEngine:
+    """
+    Tests for the bounded background job engine
+    """
+
+    def test_thread_process_and_async_jobs(self):
+        engine = JobEngine(concurrency=2)
+
+        async def add(a, b):
+            await asyncio.sleep(0.01)
+            return a + b
+
+        def fail():
+            raise ValueError("broken")
+
+        jobs = [engine.submit(square, (3,)), engine.submit(square, (4,), executor=PROCESS),
+                engine.submit(add, (1,), {"b": 2}), engine.submit(fail)]
+        assert all(job.wait(10) for job in jobs)
+        assert [job.result for job in jobs[:3]] == [9, 16, 3]
+        assert jobs[3].status == ERROR and jobs[3].error == "ValueError: broken"
+        status = engine.get(jobs[0].uuid).to_dict(result=True)
+        assert status["status"] == SUCCESS and status["result"] == 9 and status["duration_seconds"] >= 0
+        assert engine.stats()[SUCCESS] == 3
+        engine.shutdown()
+
+    def test_bounded_queue_and_cancel(self):
+        engine = JobEngine(concurrency=1, max_queue_size=2)
+        release = threading.Event()
+        running = engine.submit(release.wait, (10,))
+        # wait until the first job runs, afterwards two jobs fit into the queue
+        while engine.stats()["running"] == 0:
+            time.sleep(0.005)
+        pending = [engine.submit(square, (i,)) for i in range(2)]
+        with pytest.raises(QueueFullError) as e:
+            engine.submit(square, (3,))
+        assert e.value.retry_after >= 1 and engine.stats()["rejected"] == 1
+        assert pending[0].status == PENDING and engine.cancel(pending[0].uuid)
+        assert pending[0].status == CANCELLED
+        # a running sync job can't be cancelled
+        assert not engine.cancel(running.uuid)
+        release.set()
+        assert pending[1].wait(5) and pending[1].result == 1
+        assert engine.cancel("unknown") is None
+        engine.shutdown()
+
+    def test_cancel_running_async_job_and_result_ttl(self):
+        engine = JobEngine(concurrency=1, result_ttl=0.05)
+        job = engine.submit(asyncio.sleep, (10,))
+        while engine.stats()["running"] == 0:
+            time.sleep(0.005)
+        time.sleep(0.02)
+        assert engine.cancel(job.uuid)
+        assert job.wait(5) and job.status == CANCELLED
+        time.sleep(0.1)
+        # finished jobs expire after result_ttl
+        assert engine.get(job.uuid) is None
+        engine.shutdown()
+        with pytest.raises(RuntimeError):
+            engine.submit(square, (1,))
+
+
+class TestJobStore:
+    """
+    Tests for the jobs of several workers, every JobEngine is a worker which shares the folder of the store
+    """
+
+    def test_status_result_and_cancel_of_another_worker(self, tmp_path):
+        workers = [JobEngine(concurrency=1, store=JobStore(str(tmp_path))) for _ in range(2)]
+        release = threading.Event()
+        running = workers[0].submit(release.wait, (10,))
+        pending = workers[0].submit(square, (3,))
+        # the other worker knows the jobs and asks the worker of the pending job to cancel it
+        assert workers[1].get(pending.uuid).status == PENDING
+        assert workers[1].cancel(pending.uuid)
+        # a running sync job can't be cancelled
+        while workers[1].get(running.uuid).status != RUNNING:
+            time.sleep(0.005)
+        assert not workers[1].cancel(running.uuid)
+        release.set()
+        assert pending.wait(5) and pending.status == CANCELLED
+        assert workers[1].get(pending.uuid).status == CANCELLED
+        job = workers[0].submit(square, (4,))
+        assert job.wait(5)
+        assert workers[1].get(job.uuid).to_dict(result=True)["result"] == 16
+        assert workers[1].get("unknown") is None and workers[1].get("../escape") is None
+        for worker in workers:
+            worker.shutdown()
+
+    def test_cancel_running_async_job_of_another_worker(self, tmp_path):
+        workers = [JobEngine(concurrency=1, store=JobStore(str(tmp_path))) for _ in range(2)]
+        job = workers[0].submit(asyncio.sleep, (10,))
+        while workers[1].get(job.uuid).status != RUNNING:
+            time.sleep(0.005)
+        assert workers[1].cancel(job.uuid)
+        assert job.wait(5) and workers[1].get(job.uuid).status == CANCELLED
+        for worker in workers:
+            worker.shutdown()
+
+    def test_job_of_exited_worker(self, tmp_path):
+        store = JobStore(str(tmp_path))
+        store.put({"uuid": "job", "name": "square", "status": RUNNING, "submitted": "2024-01-01T00:00:00",
+                   "started": "2024-01-01T00:00:01", "finished": None, "duration_seconds": None, "error": None,
+                   "executor": "thread", "is_coroutine": False})
+        assert JobEngine(store=store).get("job").status == RUNNING
+        # the record of a pid which does not exist on this host
+        with open(store.path("job")) as file:
+            record = json.load(file)
+        with open(store.path("job"), "w") as file:
+            json.dump(dict(record, owner=record["owner"].rpartition(":")[0] + ":999999999"), file)
+        job = JobEngine(store=store).get("job")
+        assert job.status == ERROR and job.error == "The worker of the job has exited"
+
+    def test_only_json_is_stored(self, tmp_path):
+        store = JobStore(str(tmp_path))
+        with open(store.path("pickled"), "wb") as file:
+            file.write(b"\x80\x04\x95\x00")
+        assert store.get("pickled") is None and store.prune() == 0
+        engine = JobEngine(concurrency=1, store=store)
+        job = engine.submit(threading.Lock)
+        assert job.wait(5) and job.status == SUCCESS
+        # the result can't be encoded as JSON, the other workers see an error
+        state = JobEngine(store=store).get(job.uuid)
+        assert state.status == ERROR and state.error.startswith("The result can't be stored")
+        engine.shutdown()
+
+    def test_store_is_written_without_the_lock(self, tmp_path):
+        class SlowStore(JobStore):
+            def put(self, state: dict, ttl: float = None):
+                time.sleep(0.3)
+                super().put(state, ttl)
+
+        engine = JobEngine(concurrency=1, store=SlowStore(str(tmp_path)))
+        submitting = threading.Thread(target=engine.submit, args=(square, (2,)))
+        submitting.start()
+        time.sleep(0.05)
+        start = time.perf_counter()
+        engine.stats()
+        assert time.perf_counter() - start < 0.1
+        submitting.join()
+        engine.shutdown()
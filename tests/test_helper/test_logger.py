@@ -0,0 +1,140 @@
+import gzip
+import json
+import threading
+import time
+from datetime import datetime
+from app.helper.log.file_sink import FileSink
+from app.helper.log.log import Log
+from app.helper.log.logger import Logger
+from app.helper.log.mongodb_sink import MongoDBSink
+
+
+class FakeCollection:
+    """
+    Collection which records the bulk inserts, "delay" simulates a slow or unreachable MongoDB
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = list()
+        self.release = threading.Event()
+
+    def insert_many(self, documents: list, ordered: bool = True):
+        if self.delay:
+            self.release.wait(self.delay)
+        self.batches.append(list(documents))
+
+
+class TestMongoDBSink:
+    """
+    Tests for the queued MongoDB sink of the Logger
+    """
+
+    def test_batches_and_flush(self):
+        collection = FakeCollection()
+        sink = MongoDBSink(collection, batch_size=10, flush_interval=60)
+        for i in range(25):
+            assert sink.put({"message": i})
+        assert sink.flush(5)
+        assert [len(batch) for batch in collection.batches] == [10, 10, 5]
+        assert sink.stats()["written"] == 25 and sink.stats()["pending"] == 0
+        sink.close()
+        # records after close are dropped
+        assert not sink.put({"message": "late"})
+
+    def test_drop_policy_does_not_block(self):
+        collection = FakeCollection(delay=10)
+        sink = MongoDBSink(collection, max_queue_size=5, batch_size=1, flush_interval=0.01)
+        start = time.perf_counter()
+        results = [sink.put({"message": i}) for i in range(50)]
+        assert time.perf_counter() - start < 1
+        assert not all(results)
+        stats = sink.stats()
+        assert stats["dropped"] == results.count(False) and stats["queued"] == results.count(True)
+        collection.release.set()
+        assert sink.close(5)
+        assert sink.stats()["written"] == stats["queued"]
+
+
+class TestFileSink:
+    """
+    Tests for the buffered, rotating NDJSON file sink of the Logger
+    """
+
+    def test_compact_ndjson_lines(self, tmp_path):
+        path = tmp_path / "log.ndjson"
+        logger = Logger(1, Logger.SINK.FILE, file_path=str(path), file_flush_interval=60)
+        logger.log(Logger.LEVEL.INFO, 200, "first ä")
+        logger.log(Logger.LEVEL.INFO, 201, "second")
+        # buffered until the flush
+        assert not path.exists()
+        logger.close()
+        lines = path.read_text(encoding="utf8").splitlines()
+        assert [json.loads(line)["message"] for line in lines] == ["first ä", "second"]
+        assert ", " not in lines[1]
+
+    def test_rotation_and_compression(self, tmp_path):
+        path = tmp_path / "log.ndjson"
+        sinks = [FileSink(str(path), buffer_size=1, flush_interval=60, max_bytes=100) for _ in range(2)]
+        for i in range(20):
+            assert sinks[i % 2].write(json.dumps({"i": i, "message": "x" * 20}))
+        for sink in sinks:
+            sink.close()
+        rotated = sorted(tmp_path.glob("log.ndjson.*.gz"))
+        assert rotated and not list(tmp_path.glob("log.ndjson.*[0-9_]"))
+        records = list()
+        for file in rotated + [path]:
+            content = gzip.decompress(file.read_bytes()) if file.suffix == ".gz" else file.read_bytes()
+            records.extend(json.loads(line)["i"] for line in content.splitlines())
+            assert len(content) <= 100
+        # every record is written exactly once across the rotated files
+        assert sorted(records) == list(range(20))
+
+
+class TestLog:
+    """
+    Tests for the serialize-once log record
+    """
+
+    def test_json_equals_dict(self):
+        log = Log(datetime.now(), 999999, 1, 200, 'ä "quoted"\n', None, "/path", "user", "uuid", "trace")
+        assert json.loads(log.to_json_string()) == log.to_dict()
+        assert log.to_json_bytes() == (log.to_json_string() + "\n").encode("utf8")
+        # serialized only once
+        assert log.to_json_string() is log.to_json_string()
+
+
+class TestLoggerGating:
+    """
+    Tests for the level gating, lazy messages and the rate limit of the Logger
+    """
+
+    def test_filtered_levels_do_no_work(self):
+        logger = Logger(1, mode=Logger.MODE.INFO)
+
+        def message():
+            raise AssertionError("the message of a filtered log must not be formatted")
+
+        assert logger.log(Logger.LEVEL.DEBUG, 200, message) == (True, None)
+        success, log = logger.log(Logger.LEVEL.INFO, 200, lambda: "lazy")
+        assert success and log.message == "lazy"
+
+    def test_rate_limit_and_summary(self, capsys):
+        logger = Logger(1, rate_limit=0.001, rate_limit_burst=2, rate_limit_summary_interval=60)
+        results = [logger.log(Logger.LEVEL.INFO, 500, "storm", "/path")[0] for _ in range(10)]
+        assert results == [True, True] + [False] * 8
+        # other keys have their own bucket
+        assert logger.log(Logger.LEVEL.INFO, 500, "other", "/other")[0]
+        logger.flush()
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert lines[-1]["message"] == "8 similar messages suppressed" and lines[-1]["path"] == "/path"
+
+    def test_summary_without_further_logs(self, capsys):
+        logger = Logger(1, rate_limit=0.001, rate_limit_burst=1, rate_limit_summary_interval=0.05)
+        results = [logger.log(Logger.LEVEL.INFO, 500, "storm", "/path")[0] for _ in range(5)]
+        assert results == [True] + [False] * 4
+        # no log, flush or close after the storm
+        time.sleep(0.3)
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert lines[-1]["message"] == "4 similar messages suppressed"
+        logger.close()
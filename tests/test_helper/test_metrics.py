@@ -0,0 +1,77 @@
+import multiprocessing
+import os
+from app.helper.metrics.metrics import MetricsRegistry, Counter, Gauge, Histogram, mark_process_dead
+
+
+def get_metrics(directory: str) -> tuple:
+    registry = MetricsRegistry(str(directory))
+    return (
+        registry,
+        Counter("requests", "requests", ("route",), registry),
+        Gauge("in_progress", "in progress", (), registry),
+        Histogram("duration_seconds", "duration", (), registry, buckets=(0.1, 1.0)),
+    )
+
+
+def worker(directory: str, pid_queue):
+    """
+    simulates another gunicorn worker
+    """
+    registry, requests, in_progress, duration = get_metrics(directory)
+    requests.labels("/a").inc(2)
+    in_progress.inc(5)
+    duration.observe(0.5)
+    pid_queue.put(multiprocessing.current_process().pid)
+
+
+class TestMetrics:
+    """
+    Tests for the multi-process metrics
+    """
+
+    def test_aggregation_across_processes(self, tmp_path):
+        registry, requests, in_progress, duration = get_metrics(tmp_path)
+        requests.labels("/a").inc()
+        requests.labels(route="/b").inc()
+        in_progress.inc()
+        duration.observe(0.05)
+        duration.observe(3)
+
+        pid_queue = multiprocessing.get_context("fork").Queue()
+        process = multiprocessing.get_context("fork").Process(target=worker, args=(str(tmp_path), pid_queue))
+        process.start()
+        process.join()
+        text = registry.generate_latest()
+        assert 'requests_total{route="/a"} 3.0' in text and 'requests_total{route="/b"} 1.0' in text
+        assert "in_progress 6.0" in text
+        assert 'duration_seconds_bucket{le="0.1"} 1.0' in text and 'duration_seconds_bucket{le="1.0"} 2.0' in text
+        assert 'duration_seconds_bucket{le="+Inf"} 3.0' in text and "duration_seconds_count 3.0" in text
+        assert "# TYPE duration_seconds histogram" in text
+
+        # the gauges of an exited worker are removed, the counters are kept
+        mark_process_dead(pid_queue.get(), str(tmp_path))
+        text = registry.generate_latest()
+        assert "in_progress 1.0" in text and 'requests_total{route="/a"} 3.0' in text
+
+    def test_merge_of_exited_workers(self, tmp_path):
+        registry, requests, _, duration = get_metrics(tmp_path)
+        requests.labels("/a").inc()
+        pid_queue = multiprocessing.get_context("fork").Queue()
+        for _ in range(3):
+            process = multiprocessing.get_context("fork").Process(target=worker, args=(str(tmp_path), pid_queue))
+            process.start()
+            process.join()
+            mark_process_dead(pid_queue.get(), str(tmp_path))
+
+        # one aggregate file instead of one file per exited worker
+        assert sorted(name for name in os.listdir(tmp_path) if name.endswith(".db")) == \
+            ["counter_" + str(os.getpid()) + ".db", "counter_aggregate.db"]
+        text = registry.generate_latest()
+        assert 'requests_total{route="/a"} 7.0' in text and "duration_seconds_count 3.0" in text
+
+    def test_file_growth(self, tmp_path):
+        registry, requests, _, _ = get_metrics(tmp_path)
+        for i in range(3000):
+            requests.labels("/route/" + str(i)).inc()
+        totals = registry.collect()
+        assert len(totals) == 3000 and set(totals.values()) == {1.0}
@@ -0,0 +1,79 @@
+import json
+import os
+import threading
+import time
+from app.helper.log.logger import Logger
+from app.helper.pattern.process_local import ProcessLocal
+from app.helper.pattern.singleton import Singleton
+
+
+def in_child(func) -> int:
+    """
+    Runs func in a forked process and returns its result (an int between 0 and 255)
+    """
+    pid = os.fork()
+    if pid == 0:
+        code = 255
+        try:
+            code = func()
+        finally:
+            os._exit(code)
+    return os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+
+
+class TestSingleton:
+    """
+    Tests for the thread-safe singleton
+    """
+
+    def test_one_instance_for_concurrent_calls(self):
+        class Slow(metaclass=Singleton):
+            created = 0
+
+            def __init__(self):
+                time.sleep(0.05)
+                Slow.created += 1
+
+        instances = list()
+        threads = [threading.Thread(target=lambda: instances.append(Slow())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert Slow.created == 1 and all(instance is instances[0] for instance in instances)
+
+    def test_instance_is_kept_after_fork(self):
+        class Shared(metaclass=Singleton):
+            pass
+        instance = Shared()
+        assert in_child(lambda: 0 if Shared() is instance else 1) == 0
+
+
+class TestProcessLocal:
+    """
+    Tests for the per-process resources
+    """
+
+    def test_lazy_and_recreated_after_fork(self):
+        created = list()
+        resource = ProcessLocal(lambda: created.append(os.getpid()) or os.getpid())
+        assert not resource.created and not created
+        assert resource.get() == resource.get() == os.getpid() and created == [os.getpid()]
+        assert in_child(lambda: 0 if not resource.created and resource.get() == os.getpid() else 1) == 0
+
+    def test_forked_logger_does_not_write_the_buffer_of_the_parent(self, tmp_path):
+        path = tmp_path / "log.ndjson"
+        logger = Logger(1, Logger.SINK.FILE, file_path=str(path), file_flush_interval=60)
+        logger.log(Logger.LEVEL.INFO, 200, "parent")
+        parent_sink = logger.file_sink
+
+        def child():
+            logger.log(Logger.LEVEL.INFO, 200, "child")
+            logger.close()
+            # like the atexit handler which is inherited from the parent
+            parent_sink.close()
+            return 0 if logger.file_sink is not parent_sink else 1
+        assert in_child(child) == 0
+        logger.close()
+        messages = [json.loads(line)["message"] for line in path.read_text().splitlines()]
+        assert sorted(messages) == ["child", "parent"]
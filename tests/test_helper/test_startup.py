@@ -0,0 +1,33 @@
+import sys
+from app.helper.profiling import startup
+
+
+class TestStartupProfiler:
+    """
+    Tests for the import-time breakdown and the time to the first request
+    """
+
+    def test_import_breakdown(self, tmp_path, monkeypatch):
+        package = tmp_path / "slow_package"
+        package.mkdir()
+        (package / "__init__.py").write_text("")
+        (package / "child.py").write_text("import time\ntime.sleep(0.05)\n")
+        (package / "parent.py").write_text("import time\nfrom slow_package import child\ntime.sleep(0.02)\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        startup.enable()
+        try:
+            import slow_package.parent
+        finally:
+            startup.disable()
+            for name in ["slow_package", "slow_package.parent", "slow_package.child"]:
+                sys.modules.pop(name, None)
+        report = startup.report(top=1000)
+        assert report["top_self_ms"]["slow_package.child"] >= 50
+        # the submodule of "from package import module" is measured on its own
+        assert 20 <= report["top_self_ms"]["slow_package.parent"] < 50
+        assert report["uptime_seconds"] > 0
+
+    def test_first_request(self):
+        startup.first_request_done()
+        assert not startup.first_request_done()
+        assert startup.report()["time_to_first_request_seconds"] > 0
@@ -1,8 +1,13 @@
+import asyncio
 import json
 import pytest
 from dataclasses import asdict
 from fastapi.testclient import TestClient
+from app.configuration.getConfig import Config
 from app.main import app
+from app.routers import anonymize, benchmark
+from app.routers import config as config_router
+from app.middleware.request_logging import redact_query
 from app.model.BenchmarkModel import Benchmark
 
 
@@ -15,6 +20,17 @@ def get_client():
     return TestClient(app)
 
 
+@pytest.fixture
+def health_registry(monkeypatch):
+    """
+    A new health registry without cached results, the tmp folders are relative to the folder "app" (IS_LOCAL)
+    """
+    monkeypatch.chdir("app")
+    registry = config_router.create_health_registry(Config().snapshot)
+    monkeypatch.setattr(config_router, "health_registry", registry)
+    return registry
+
+
 def get_some_other_static_info():
     """
     Use functions outside of the TestClass-Scope to get global infos
@@ -37,7 +53,7 @@ class TestConfigRouter:
     Tests for the config router
     """
 
-    def test_health_endpoint(self):
+    def test_health_endpoint(self, health_registry):
         # get the test client (Test instance of the fastapi-app)
         client = get_client()
         # the enpoint to test
@@ -66,3 +82,182 @@ class TestBenchmarkRouter:
         assert benchmark_data.number == 1
         # you could also use the plain json:
         assert response.json()["number"] == 1
+
+
+class TestAnonymizeRouter:
+    """
+    Tests for the anonymize router
+    """
+
+    def test_stream_endpoint(self):
+        client = get_client()
+        endpoint = "/anonymize/stream/personal_data"
+        payload = "\n".join([
+            json.dumps({"name": "Jane", "plz": "12345", "password": "secret", "ip": "10.0.0.1"}),
+            "",
+            "no json",
+            json.dumps({"id": 2, "plz": 54321}),
+        ])
+        response = client.post(endpoint, data=payload, headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0] == {"plz": "12300", "ip": "10.0.0.0"}
+        assert lines[1]["line"] == 3
+        assert lines[2] == {"id": 2, "plz": "54300"}
+
+    def test_lines_split_across_chunks(self):
+        async def chunks():
+            for chunk in [b'{"id": 1, "pl', b'z": "12345"}\n{"id"', b": 2}\nno js", b"on\n", b'{"id": 3}']:
+                yield chunk
+
+        async def collect():
+            rule_set = anonymize.get_rule_set("personal_data")
+            return b"".join([output async for output in anonymize.anonymize_ndjson(chunks(), rule_set)])
+        lines = [json.loads(line) for line in asyncio.run(collect()).splitlines()]
+        assert lines == [{"id": 1, "plz": "12300"}, {"id": 2}, lines[2], {"id": 3}] and lines[2]["line"] == 3
+
+    def test_unknown_rule_set(self):
+        client = get_client()
+        response = client.post("/anonymize/stream/does_not_exist", data="{}")
+        assert response.status_code == 404
+
+
+class TestRequestLoggingMiddleware:
+    """
+    Tests for the trace id and the access log of the RequestLoggingMiddleware
+    """
+
+    def test_trace_id_propagation(self, capsys):
+        client = get_client()
+        response = client.get("/benchmark/json", headers={"X-Trace-Id": "trace-123"})
+        assert response.headers["X-Trace-Id"] == "trace-123"
+        access = [json.loads(line) for line in capsys.readouterr().out.splitlines() if "access" in line][-1]
+        assert access["trace_id"] == "trace-123" and access["path"] == "/benchmark/json"
+        assert access["message"]["status_code"] == 200
+        assert access["message"]["response_bytes"] == len(response.content)
+        assert access["message"]["duration_ms"] >= 0
+
+    def test_query_is_not_logged(self, capsys):
+        get_client().get("/benchmark/hi?name=Jane")
+        access = [json.loads(line) for line in capsys.readouterr().out.splitlines() if "access" in line][-1]
+        assert "query" not in access["message"] and "Jane" not in json.dumps(access)
+        # opt-in: only the names of the parameters
+        assert redact_query("name=Jane&plz=12345&empty=") == "name=***&plz=***&empty=***"
+
+    def test_traceparent_and_generated_trace_id(self):
+        client = get_client()
+        traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+        response = client.get("/benchmark/hi", headers={"traceparent": traceparent})
+        assert response.headers["X-Trace-Id"] == "4bf92f3577b34da6a3ce929d0e0e4736"
+        assert len(client.get("/benchmark/hi").headers["X-Trace-Id"]) == 32
+
+
+class TestMetricsRouter:
+    """
+    Tests for the /metrics endpoint
+    """
+
+    def test_request_metrics(self):
+        client = get_client()
+        client.get("/benchmark/hi")
+        client.get("/does/not/exist")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert 'http_requests_total{method="GET",route="/benchmark/hi",status_code="200"}' in response.text
+        assert 'route="<unmatched>",status_code="404"' in response.text
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/benchmark/hi",le="+Inf"}' in response.text
+        assert "logger_queue_pending" in response.text
+
+
+class TestResponseCache:
+    """
+    Tests for the cached responses with ETag/304
+    """
+
+    def test_etag_and_not_modified(self):
+        client = get_client()
+        response = client.get("/config/")
+        assert response.status_code == 200 and response.json() == Config().configuration_dict
+        etag = response.headers["ETag"]
+        assert client.get("/config/").headers["ETag"] == etag
+        not_modified = client.get("/config/", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304 and not_modified.content == b""
+        assert client.get("/config/", headers={"If-None-Match": '"other"'}).status_code == 200
+
+    def test_invalidation_on_config_change(self):
+        client = get_client()
+        client.get("/benchmark/json")
+        misses = benchmark.json_response.cache.misses
+        client.get("/benchmark/json")
+        assert benchmark.json_response.cache.misses == misses
+        Config().bump_revision()
+        assert client.get("/benchmark/json").json()["Hello"] == "World"
+        assert benchmark.json_response.cache.misses == misses + 1
+
+    def test_ttl_of_the_config(self):
+        # the TTL is read on every store, so a reloaded RESPONSE_TTL applies without a restart
+        assert benchmark.json_response.cache.ttl() == Config().response_cache_ttl
+
+
+class TestHealthRouter:
+    """
+    Tests for the liveness and readiness probes
+    """
+
+    def test_liveness_and_readiness(self, health_registry):
+        client = get_client()
+        liveness = client.get("/actuator/health/liveness")
+        assert liveness.status_code == 200 and list(liveness.json()["details"]) == ["event_loop"]
+        readiness = client.get("/actuator/health/readiness").json()
+        assert readiness["status"] == "UP"
+        assert "duration_ms" in readiness["details"]["logger"]
+
+    def test_failing_dependency(self, health_registry, monkeypatch):
+        def failing_sink():
+            raise ConnectionError("sink not reachable")
+
+        monkeypatch.setattr(health_registry.checks["logger"], "func", failing_sink)
+        client = get_client()
+        readiness = client.get("/actuator/health/readiness")
+        assert readiness.status_code == 503 and readiness.json()["details"]["logger"]["error"] == "sink not reachable"
+        # only the process itself counts for the liveness
+        assert client.get("/actuator/health/liveness").status_code == 200
+
+    def test_non_critical_dependency(self, health_registry, monkeypatch):
+        monkeypatch.setattr(health_registry.checks["logger"], "func", lambda: False)
+        config_router.apply_health_settings(health_registry, Config().snapshot.replace(
+            health={"INTERVAL": 10.0, "NON_CRITICAL": ["logger"]}))
+        readiness = get_client().get("/actuator/health/readiness")
+        assert readiness.status_code == 200 and readiness.json()["details"]["logger"]["status"] == "DOWN"
+
+
+class TestJobsRouter:
+    """
+    Tests for the job engine routes
+    """
+
+    def test_backgroundtask_job_status(self):
+        client = get_client()
+        response = client.post("/benchmark/backgroundtask/immediate_response?seconds_to_wait_on_server_side=0")
+        assert response.status_code == 200
+        uuid_ = response.json()["uuid"]
+        assert Config().job_engine.get(uuid_).wait(5)
+        status = client.get("/jobs/" + uuid_).json()
+        assert status["status"] == "success" and status["name"] == "wait_for_seconds"
+        assert client.get("/jobs/unknown").status_code == 404
+        assert client.delete("/jobs/" + uuid_).status_code == 409
+
+    def test_anonymize_job_result(self):
+        client = get_client()
+        response = client.post("/anonymize/job/secrets", json=[{"user": "a", "password": "secret"}])
+        assert response.status_code == 202
+        uuid_ = response.json()["uuid"]
+        assert Config().job_engine.get(uuid_).wait(10)
+        result = client.get("/jobs/" + uuid_ + "/result")
+        assert result.status_code == 200 and result.json()["result"] == [{"user": "a"}]
+
+    def test_startup_report(self):
+        client = get_client()
+        client.get("/benchmark/hi")
+        report = client.get("/actuator/startup").json()
+        assert report["time_to_first_request_seconds"] > 0 and "top_self_ms" in report